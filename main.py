@@ -10,237 +10,4883 @@ sudo pacman -S espeak-ng festival festival-de  # Backend for pyttsx3
 # festival-de provides high-quality German voices
 # Optional: sudo pacman -S festival-english for English voices
 """
+import time
+
+# Process start to first audio is reported by the one-shot commands (--timing)
+MODULE_START: float = time.perf_counter()
+
 import shutil
 import os
+import abc
+import argparse
+import atexit
+import contextlib
+import ctypes
+import ctypes.util
+import functools
+import gc
+import fcntl
+import hashlib
+import http
+import importlib.util
+import io
+import json
+import mmap
+import platform
+import queue
+import re
+import resource
+import select
+import stat
+import tempfile
+import statistics
+import struct
+import subprocess
+import sys
 import threading
-from random import randint
-from typing import Dict, List
-import pyttsx3
-import colorama
+import unicodedata
+import wave
+from array import array
+from bisect import bisect_right
+from collections import OrderedDict, deque
+from random import randint, random, randrange
+from typing import Dict, List, Optional, Tuple
+
+# pyttsx3 and colorama are imported where they are needed, so one-shot
+# commands that are served from the caches never load them
+
+CACHE_DIR: str = os.path.join(
+    os.environ.get("XDG_CACHE_HOME", os.path.expanduser("~/.cache")), "trashtalk-tool"
+)
 
 
-# Initialize colorama
-colorama.init()
+def process_uptime() -> float:
+    """Seconds since this process was started, including interpreter startup"""
+    try:
+        with open("/proc/self/stat", "rb") as file:
+            # Field 22, counted after the parenthesised command name
+            started = int(file.read().rsplit(b")", 1)[1].split()[19])
+        return time.clock_gettime(time.CLOCK_BOOTTIME) - started / os.sysconf("SC_CLK_TCK")
+    except (OSError, ValueError, IndexError, AttributeError):
+        return time.perf_counter() - MODULE_START
+
+
+def pyttsx3_engine():
+    """Default engine factory; imports pyttsx3 on first use"""
+    import pyttsx3
+    return pyttsx3.init()
 
 
 # -----------------------------------------------------------------------------
-# PYTTSX3 TTS SYSTEM
+# INSTRUMENTATION
 # -----------------------------------------------------------------------------
-class ArchTTS:
-    """TTS System using pyttsx3"""
+class MemorySink:
+    """Keeps every recorded sample in memory"""
 
-    def __init__(self):
-        self.tts_engine = None
-        self.available_voices = []
-        self.current_voice_id = None
-        self.is_initialized = False
-        self.settings = {
-            "rate": 160,  # words per minute
-            "volume": 0.8,  # 0.0 to 1.0
-            "voice": "auto"  # set first available voice
-        }
-        self.initialize_engine()
+    def __init__(self) -> None:
+        self.samples: List[dict] = []
 
-    def initialize_engine(self):
-        """Initialize pyttsx3 TTS engine"""
+    def attach(self, metrics: "Metrics") -> None:
+        pass
+
+    def record(self, sample: dict) -> None:
+        self.samples.append(sample)
+
+    def flush(self, metrics: "Metrics") -> None:
+        pass
+
+
+class JsonLinesSink:
+    """Appends every recorded sample as one JSON line to a file"""
+
+    def __init__(self, path: str) -> None:
+        self.path = path
+        self._file = open(path, "a", encoding="utf-8", buffering=1)
+        self._lock = threading.Lock()
+
+    def attach(self, metrics: "Metrics") -> None:
+        pass
+
+    def record(self, sample: dict) -> None:
+        line = json.dumps(sample, ensure_ascii=False)
+        with self._lock:
+            self._file.write(line + "\n")
+
+    def flush(self, metrics: "Metrics") -> None:
+        with self._lock:
+            self._file.flush()
+
+
+class PrometheusSink:
+    """Rewrites a Prometheus text-format file with the aggregated metrics
+
+    Meant for the node_exporter textfile collector: the file is replaced
+    atomically at most every interval seconds and on flush().
+    """
+
+    def __init__(self, path: str, interval: float = 5.0, prefix: str = "trashtalk") -> None:
+        self.path = path
+        self.interval = interval
+        self.prefix = prefix
+        self._metrics: Optional["Metrics"] = None
+        self._last_write = 0.0
+        self._lock = threading.Lock()
+
+    def attach(self, metrics: "Metrics") -> None:
+        self._metrics = metrics
+
+    def record(self, sample: dict) -> None:
+        if self._metrics is not None and time.monotonic() - self._last_write >= self.interval:
+            # Another thread already rewriting the file covers this sample too
+            if self._lock.acquire(blocking=False):
+                try:
+                    self._write(self._metrics)
+                finally:
+                    self._lock.release()
+
+    def flush(self, metrics: "Metrics") -> None:
+        with self._lock:
+            self._write(metrics)
+
+    def _write(self, metrics: "Metrics") -> None:
+        self._last_write = time.monotonic()
+
+        counters, timers = metrics.snapshot()
+        lines = []
+        for name in sorted({name for name, _ in counters}):
+            lines.append(f"# TYPE {self.prefix}_{name}_total counter")
+            for (metric, labels), value in sorted(counters.items()):
+                if metric == name:
+                    lines.append(f"{self.prefix}_{name}_total{self._labels(labels)} {value}")
+        for name in sorted({name for name, _ in timers}):
+            lines.append(f"# TYPE {self.prefix}_{name}_seconds summary")
+            for (metric, labels), (count, total, maximum) in sorted(timers.items()):
+                if metric == name:
+                    label_text = self._labels(labels)
+                    lines.append(f"{self.prefix}_{name}_seconds_count{label_text} {count}")
+                    lines.append(f"{self.prefix}_{name}_seconds_sum{label_text} {total:.6f}")
+                    lines.append(f"{self.prefix}_{name}_seconds_max{label_text} {maximum:.6f}")
+
+        temp_path = f"{self.path}.{os.getpid()}.tmp"
         try:
-            self.tts_engine = pyttsx3.init()
-            self.is_initialized = True
+            with open(temp_path, "w", encoding="utf-8") as file:
+                file.write("\n".join(lines) + "\n")
+            os.replace(temp_path, self.path)
+        except OSError:
+            pass
 
-            # Get available voices
-            voices = self.tts_engine.getProperty('voices')
-            if voices:
-                self.available_voices = voices
+    @staticmethod
+    def _labels(labels: tuple) -> str:
+        if not labels:
+            return ""
+        pairs = ",".join(f'{key}="{PrometheusSink._escape(str(value))}"' for key, value in labels)
+        return "{" + pairs + "}"
 
-                selected_voice = self._select_best_voice(voices)
-                if selected_voice:
-                    self.current_voice_id = selected_voice.id
-                    self.settings["voice"] = selected_voice.name
-                else:
-                    self.current_voice_id = voices[0].id
-                    self.settings["voice"] = voices[0].name
+    @staticmethod
+    def _escape(value: str) -> str:
+        return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
 
-                self.tts_engine.setProperty('voice', self.current_voice_id)
 
-            # Set initial properties
-            self.tts_engine.setProperty('rate', self.settings["rate"])
-            self.tts_engine.setProperty('volume', self.settings["volume"])
+class _Timer:
+    __slots__ = ("metrics", "name", "labels", "start")
 
-            #print("pyttsx3 TTS Engine initialisiert")
-            if self.current_voice_id:
-                voice_info = self.settings["voice"]
-                if "festival" in self.current_voice_id.lower() and "de" in self.current_voice_id.lower():
-                    voice_info += " (festival-de)"
-                #print(f"Stimme: {voice_info}")
+    def __init__(self, metrics: "Metrics", name: str, labels: dict) -> None:
+        self.metrics = metrics
+        self.name = name
+        self.labels = labels
 
-        except Exception as e:
-            print(f"Fehler beim Initialisieren der TTS Engine: {e}")
-            print("Stelle sicher, dass TTS Backends installiert sind: sudo pacman -S espeak-ng festival festival-de")
-            self.is_initialized = False
+    def __enter__(self) -> "_Timer":
+        self.start = time.perf_counter()
+        return self
 
-    def speak_text(self, text: str) -> bool:
-        """Main TTS function using pyttsx3"""
-        if not self.is_initialized or not self.tts_engine:
-            print("TTS Engine nicht verfügbar!")
+    def __exit__(self, exc_type, exc, traceback) -> bool:
+        if exc_type is not None:
+            self.labels = dict(self.labels, error=exc_type.__name__)
+        self.metrics.observe(self.name, time.perf_counter() - self.start, **self.labels)
+        return False
+
+
+class _NullTimer:
+    __slots__ = ()
+
+    def __enter__(self) -> "_NullTimer":
+        return self
+
+    def __exit__(self, exc_type, exc, traceback) -> bool:
+        return False
+
+
+_NULL_TIMER = _NullTimer()
+
+
+class Metrics:
+    """Counters and timers for the hot paths, forwarded to pluggable sinks
+
+    Disabled until a sink is added; timer() then hands out one shared
+    no-op context manager and incr()/observe() return immediately.
+    """
+
+    def __init__(self) -> None:
+        self.enabled = False
+        self.sinks: List = []
+        self._counters: Dict[tuple, float] = {}
+        self._timers: Dict[tuple, List[float]] = {}  # key -> [count, sum, max]
+        self._lock = threading.Lock()
+
+    def add_sink(self, sink) -> None:
+        sink.attach(self)
+        self.sinks.append(sink)
+        self.enabled = True
+
+    def incr(self, name: str, value: float = 1, **labels) -> None:
+        if not self.enabled:
+            return
+
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + value
+        self._record("counter", name, value, labels)
+
+    def observe(self, name: str, seconds: float, **labels) -> None:
+        if not self.enabled:
+            return
+
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            stats = self._timers.setdefault(key, [0, 0.0, 0.0])
+            stats[0] += 1
+            stats[1] += seconds
+            stats[2] = max(stats[2], seconds)
+        self._record("timer", name, seconds, labels)
+
+    def timer(self, name: str, **labels):
+        if not self.enabled:
+            return _NULL_TIMER
+        return _Timer(self, name, labels)
+
+    def snapshot(self) -> Tuple[dict, dict]:
+        with self._lock:
+            return dict(self._counters), {key: tuple(value) for key, value in self._timers.items()}
+
+    def flush(self) -> None:
+        for sink in self.sinks:
+            sink.flush(self)
+
+    def _record(self, kind: str, name: str, value: float, labels: dict) -> None:
+        sample = {"ts": time.time(), "kind": kind, "name": name, "value": value, "labels": labels}
+        for sink in self.sinks:
+            sink.record(sample)
+
+
+metrics = Metrics()
+
+
+def configure_metrics(spec: Optional[str]) -> None:
+    """Add sinks from a spec such as memory,jsonl:/tmp/tt.jsonl,prom:/tmp/tt.prom"""
+    for part in (spec or "").split(","):
+        kind, _, path = part.strip().partition(":")
+        if not kind:
+            continue
+        if kind == "memory":
+            metrics.add_sink(MemorySink())
+        elif kind == "jsonl" and path:
+            metrics.add_sink(JsonLinesSink(path))
+        elif kind == "prom" and path:
+            metrics.add_sink(PrometheusSink(path))
+        else:
+            raise ValueError(f"Unbekannte Metrik-Ausgabe: {part}")
+
+
+# -----------------------------------------------------------------------------
+# AUDIO CACHE & PLAYBACK
+# -----------------------------------------------------------------------------
+class AudioCache:
+    """Content-addressed on-disk WAV cache with LRU eviction by total size"""
+
+    def __init__(self, directory: str = os.path.join(CACHE_DIR, "audio"),
+                 max_bytes: int = 256 * 1024 * 1024) -> None:
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.total_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        # key -> size in bytes, least recently used first
+        self._entries: "OrderedDict[str, int]" = OrderedDict()
+        self._lock = threading.Lock()
+
+        os.makedirs(self.directory, exist_ok=True)
+        self._load()
+
+    @staticmethod
+    def make_key(text: str, voice_id: Optional[str], rate: int, volume: float) -> str:
+        """Build the cache key from normalized text and the active voice settings"""
+        normalized = " ".join(text.split())
+        payload = json.dumps([normalized, voice_id, rate, round(volume, 3)], ensure_ascii=False)
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def _load(self) -> None:
+        """Rebuild the LRU order from the files on disk (mtime = last use)"""
+        found = []
+        with os.scandir(self.directory) as entries:
+            for entry in entries:
+                if entry.name.endswith(".tmp.wav"):
+                    # Leftover of an interrupted render
+                    try:
+                        os.remove(entry.path)
+                    except OSError:
+                        pass
+                elif entry.name.endswith(".wav"):
+                    stat = entry.stat()
+                    found.append((stat.st_mtime, entry.name[:-4], stat.st_size))
+
+        for _, key, size in sorted(found):
+            self._entries[key] = size
+            self.total_bytes += size
+        self._evict()
+
+    def path_for(self, key: str) -> str:
+        return os.path.join(self.directory, f"{key}.wav")
+
+    def temp_path_for(self, key: str) -> str:
+        return os.path.join(self.directory, f"{key}.{os.getpid()}.{threading.get_ident()}.tmp.wav")
+
+    def lookup(self, key: str) -> Optional[str]:
+        """Returns the WAV path for key or None, refreshing its LRU position"""
+        with self._lock:
+            if key not in self._entries:
+                self.misses += 1
+                metrics.incr("audio_cache_misses")
+                return None
+
+            path = self.path_for(key)
+            try:
+                os.utime(path)
+            except OSError:
+                # File vanished behind our back
+                self.total_bytes -= self._entries.pop(key)
+                self.misses += 1
+                metrics.incr("audio_cache_misses")
+                return None
+
+            self._entries.move_to_end(key)
+            self.hits += 1
+            metrics.incr("audio_cache_hits")
+            return path
+
+    def store(self, key: str, temp_path: str) -> Optional[str]:
+        """Move a freshly rendered file into the cache and evict old entries"""
+        try:
+            size = os.path.getsize(temp_path)
+            if size == 0:
+                os.remove(temp_path)
+                return None
+            path = self.path_for(key)
+            os.replace(temp_path, path)
+        except OSError:
+            return None
 
+        with self._lock:
+            self.total_bytes -= self._entries.pop(key, 0)
+            self._entries[key] = size
+            self.total_bytes += size
+            self._evict()
+        return path
+
+    def _evict(self) -> None:
+        # Always keep the newest entry, even if it alone exceeds the budget
+        while self.total_bytes > self.max_bytes and len(self._entries) > 1:
+            key, size = self._entries.popitem(last=False)
+            self.total_bytes -= size
+            try:
+                os.remove(self.path_for(key))
+            except OSError:
+                pass
+
+    def clear(self) -> None:
+        with self._lock:
+            for key in list(self._entries):
+                try:
+                    os.remove(self.path_for(key))
+                except OSError:
+                    pass
+            self._entries.clear()
+            self.total_bytes = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+class WavPlayer:
+    """Plays WAV files through the first available command line player"""
+
+    PLAYERS = (
+        ["pw-play"],
+        ["paplay"],
+        ["aplay", "-q"],
+    )
+    # Extra arguments to read the WAV data from stdin instead of a file
+    STDIN_ARGS = {"pw-play": ["-"], "paplay": [], "aplay": ["-"]}
+
+    def __init__(self) -> None:
+        self.command: Optional[List[str]] = None
+        self._process: Optional[subprocess.Popen] = None
+
+        for command in self.PLAYERS:
+            if shutil.which(command[0]):
+                self.command = command
+                break
+
+    @property
+    def available(self) -> bool:
+        return self.command is not None
+
+    def play_file(self, path: str) -> bool:
+        """Play a WAV file and block until it is finished"""
+        if not self.command:
             return False
 
         try:
-            # Ensure engine is properly configured
-            self.tts_engine.setProperty('rate', self.settings["rate"])
-            self.tts_engine.setProperty('volume', self.settings["volume"])
-            if self.current_voice_id:
-                self.tts_engine.setProperty('voice', self.current_voice_id)
+            self._process = subprocess.Popen(
+                self.command + [path], stdin=subprocess.DEVNULL, stdout=subprocess.DEVNULL,
+                stderr=subprocess.DEVNULL
+            )
+            return self._process.wait() == 0
+        except OSError:
+            return False
+        finally:
+            self._process = None
 
-            # Speak the text
-            self.tts_engine.say(text)
-            self.tts_engine.runAndWait()
+    def play_bytes(self, data: bytes) -> bool:
+        """Play WAV data from memory and block until it is finished"""
+        if not self.command:
+            return False
 
-            return True
+        try:
+            self._process = subprocess.Popen(
+                self.command + self.STDIN_ARGS[self.command[0]],
+                stdin=subprocess.PIPE, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+            )
+            try:
+                self._process.stdin.write(data)
+                self._process.stdin.close()
+            except BrokenPipeError:
+                pass
+            return self._process.wait() == 0
+        except OSError:
+            return False
+        finally:
+            self._process = None
 
-        except Exception as e:
-            print(f"TTS Fehler: {e}")
+    def play_pcm(self, pcm, sample_rate: int, channels: int = 1) -> bool:
+        """Play raw signed 16 bit PCM from any buffer (bytes, memoryview of an mmap)"""
+        if not self.command:
             return False
 
-    def list_voices(self):
-        """Lists all available voices"""
-        if not self.available_voices:
-            print("Keine Stimmen verfügbar")
+        try:
+            self._process = subprocess.Popen(
+                self.command + self.raw_arguments(sample_rate, channels), stdin=subprocess.PIPE, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+            )
+            try:
+                self._process.stdin.write(pcm)
+                self._process.stdin.close()
+            except BrokenPipeError:
+                pass
+            return self._process.wait() == 0
+        except OSError:
+            return False
+        finally:
+            self._process = None
+
+    def raw_arguments(self, sample_rate: int, channels: int = 1) -> List[str]:
+        """Extra arguments to read raw signed 16 bit PCM from stdin"""
+        name = self.command[0]
+        if name == "pw-play":
+            return ["--format", "s16", "--rate", str(sample_rate), "--channels", str(channels), "-"]
+        if name == "paplay":
+            return ["--raw", "--format=s16le", f"--rate={sample_rate}", f"--channels={channels}"]
+        return ["-t", "raw", "-f", "S16_LE", "-r", str(sample_rate), "-c", str(channels), "-"]
+
+    def stop(self) -> None:
+        process = self._process
+        if process and process.poll() is None:
+            process.terminate()
+
+
+# -----------------------------------------------------------------------------
+# AUDIO OUTPUT
+# -----------------------------------------------------------------------------
+class AudioSink(abc.ABC):
+    """Destination for raw 16 bit PCM, used as open() -> write()... -> close() per stream"""
+
+    def open(self, sample_rate: int, channels: int = 1) -> None:
+        pass
+
+    @abc.abstractmethod
+    def write(self, pcm) -> None:
+        """Play or store one chunk of the current stream"""
+
+    def close(self) -> None:
+        """End of the current stream"""
+
+    def abort(self) -> None:
+        """End the current stream now, dropping whatever was not played yet"""
+        self.close()
+
+    def shutdown(self) -> None:
+        """Finish everything, the sink is not used afterwards"""
+
+
+class DeviceSink(AudioSink):
+    """Sound card through the command line player, fed raw PCM over stdin
+
+    The player process stays alive while the format does not change, so
+    consecutive streams play without a gap. Its pipe is shrunk to `pipe_size`
+    so that stop() and the end of a stream are not delayed by pipe buffering.
+    """
+
+    F_SETPIPE_SZ = 1031
+
+    def __init__(self, player: Optional[WavPlayer] = None, pipe_size: int = 4096) -> None:
+        self.player = player or WavPlayer()
+        if not self.player.available:
+            raise OSError("Kein Audio-Player gefunden (pw-play, paplay oder aplay)")
+        self.pipe_size = pipe_size
+        self._process: Optional[subprocess.Popen] = None
+        self._format: Optional[Tuple[int, int]] = None
+
+    def open(self, sample_rate: int, channels: int = 1) -> None:
+        if self._process is not None and self._process.poll() is None and self._format == (sample_rate, channels):
             return
 
-        print("Verfügbare Stimmen:")
-        print("=" * 50)
+        self.shutdown()
+        self._process = subprocess.Popen(
+            self.player.command + self.player.raw_arguments(sample_rate, channels),
+            stdin=subprocess.PIPE, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+        )
+        self._format = (sample_rate, channels)
+        try:
+            fcntl.fcntl(self._process.stdin.fileno(), self.F_SETPIPE_SZ, self.pipe_size)
+        except OSError:
+            pass
 
-        for i, voice in enumerate(self.available_voices):
-            is_current = "Aktiv" if voice.id == self.current_voice_id else " "
-            voice_type = self._get_voice_type(voice.id.lower())
-            # Extract language info if available
-            lang_info = ""
+    def write(self, pcm) -> None:
+        if self._process is None:
+            raise OSError("Audio-Player ist nicht geöffnet")
+        try:
+            self._process.stdin.write(pcm)
+        except (BrokenPipeError, ValueError) as e:
+            self._process = None
+            raise OSError(f"Audio-Player beendet: {e}")
 
-            if hasattr(voice, 'languages') and voice.languages:
-                lang_info = f" [{', '.join(voice.languages)}]"
+    def close(self) -> None:
+        if self._process is not None:
+            try:
+                self._process.stdin.flush()
+            except (BrokenPipeError, ValueError):
+                self._process = None
 
-            print(f"  {is_current} {i}: {voice.name}{voice_type}{lang_info}")
-            print(f"      ID: {voice.id}")
+    def abort(self) -> None:
+        process, self._process = self._process, None
+        if process is not None and process.poll() is None:
+            process.terminate()
+            process.wait()
+
+    def shutdown(self) -> None:
+        process, self._process = self._process, None
+        if process is not None:
+            try:
+                process.stdin.close()
+            except (BrokenPipeError, ValueError):
+                pass
+            process.wait()
+
+
+class WavFileSink(AudioSink):
+    """Appends every stream to one WAV file, e.g. to check output on CI"""
+
+    def __init__(self, path: str) -> None:
+        self.path = path
+        self._file = None
+        self._format: Optional[Tuple[int, int]] = None
+
+    def open(self, sample_rate: int, channels: int = 1) -> None:
+        if self._file is None:
+            self._file = wave.open(self.path, "wb")
+            self._file.setnchannels(channels)
+            self._file.setsampwidth(2)
+            self._file.setframerate(sample_rate)
+            self._format = (sample_rate, channels)
+        elif self._format != (sample_rate, channels):
+            raise ValueError(f"{self.path} hat bereits das Format {self._format[0]} Hz / {self._format[1]} Kanäle")
+
+    def write(self, pcm) -> None:
+        self._file.writeframes(pcm)
+
+    def close(self) -> None:
+        # writeframes() keeps the header up to date, the data only needs flushing
+        if self._file is not None:
+            self._file._file.flush()
+
+    def shutdown(self) -> None:
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+
+class NullSink(AudioSink):
+    """Discards audio; counts it and optionally takes as long as real playback"""
+
+    def __init__(self, realtime: bool = False) -> None:
+        self.realtime = realtime
+        self.bytes_written = 0
+        self.streams = 0
+        self._bytes_per_second = 2 * 22050
+
+    def open(self, sample_rate: int, channels: int = 1) -> None:
+        self.streams += 1
+        self._bytes_per_second = 2 * sample_rate * channels
+
+    def write(self, pcm) -> None:
+        size = len(memoryview(pcm).cast("B"))
+        self.bytes_written += size
+        if self.realtime:
+            time.sleep(size / self._bytes_per_second)
+
+
+def create_sink(spec: str) -> AudioSink:
+    """Sink from a command line spec: device, null, null:realtime or wav:PATH"""
+    kind, _, argument = spec.partition(":")
+    if kind == "device":
+        return DeviceSink()
+    if kind == "null":
+        return NullSink(realtime=argument == "realtime")
+    if kind == "wav" and argument:
+        return WavFileSink(argument)
+    raise ValueError(f"Unbekannte Audio-Ausgabe: {spec}")
+
+
+class RingBuffer:
+    """Byte ring for exactly one producer and one consumer thread
+
+    Each side only advances its own counter and the counters never wrap
+    around, so no lock is needed: the producer at worst sees too little
+    free space and the consumer too little data.
+    """
+
+    def __init__(self, capacity: int) -> None:
+        self.capacity = capacity
+        self._data = bytearray(capacity)
+        self.written = 0
+        self.read = 0
+
+    def available(self) -> int:
+        return self.written - self.read
+
+    def free(self) -> int:
+        return self.capacity - (self.written - self.read)
+
+    def write(self, data) -> int:
+        """Producer: copy as much of data as fits, returns the byte count"""
+        data = memoryview(data).cast("B")
+        size = min(len(data), self.free())
+        start = self.written % self.capacity
+        first = min(size, self.capacity - start)
+        self._data[start:start + first] = data[:first]
+        self._data[:size - first] = data[first:size]
+        self.written += size
+        return size
+
+    def read_into(self, out: memoryview) -> int:
+        """Consumer: fill out with up to len(out) bytes, returns the byte count"""
+        size = min(len(out), self.available())
+        start = self.read % self.capacity
+        first = min(size, self.capacity - start)
+        out[:first] = self._data[start:start + first]
+        out[first:size] = self._data[:size - first]
+        self.read += size
+        return size
+
+    def skip_to(self, position: int) -> None:
+        """Consumer: drop everything before position"""
+        self.read = max(self.read, min(position, self.written))
+
+
+class _Stream:
+    """One utterance on its way through a RingBufferPlayer"""
+
+    def __init__(self, chunks, sample_rate: int, channels: int, generation: int) -> None:
+        self.chunks = chunks
+        self.sample_rate = sample_rate
+        self.channels = channels
+        self.generation = generation
+        self.start: Optional[int] = None
+        # Ring position after the last byte, set once the producer is done
+        self.end: Optional[int] = None
+        self.failed = False
+        self.done = threading.Event()
+
+
+class RingBufferPlayer:
+    """Gapless PCM playback through an AudioSink
+
+    A producer thread copies submitted audio into a RingBuffer, a consumer
+    thread moves it from there to the sink in periods of latency / 4. A
+    stream starts once `latency` seconds of it are buffered (or all of it,
+    if it is shorter), and running dry in the middle of a stream counts as
+    an underrun. Offers the WavPlayer interface so ArchTTS can use either.
+
+    Streams change their format without a gap, so the ring is sized for
+    MAX_RATE/MAX_CHANNELS and holds at least two latencies of audio.
+    """
+
+    available = True
+    MAX_RATE = 48000
+    MAX_CHANNELS = 2
+
+    def __init__(self, sink: AudioSink, latency: float = 0.1, buffer_seconds: float = 2.0) -> None:
+        self.sink = sink
+        self.latency = latency
+        seconds = max(buffer_seconds, 2 * latency)
+        self.ring = RingBuffer(max(4096, int(seconds * 2 * self.MAX_RATE * self.MAX_CHANNELS)))
+        self.underruns = 0
+        self.streams = 0
+
+        self._pending: "queue.Queue[Optional[_Stream]]" = queue.Queue()
+        # Streams the producer has started, oldest first; read by the consumer
+        self._active: deque = deque()
+        self._generation = 0
+        self._data_ready = threading.Event()
+        self._space_ready = threading.Event()
+        self._closed = False
+
+        self._producer = threading.Thread(target=self._produce, name="audio-producer", daemon=True)
+        self._consumer = threading.Thread(target=self._consume, name="audio-consumer", daemon=True)
+        self._producer.start()
+        self._consumer.start()
+
+    def play_pcm(self, pcm, sample_rate: int, channels: int = 1, wait: bool = True) -> bool:
+        """Play raw 16 bit PCM; with wait=False, pcm must stay valid until it was played"""
+        return self._submit([pcm], sample_rate, channels, wait)
+
+    def play_bytes(self, data: bytes, wait: bool = True) -> bool:
+        return self._play_wav(io.BytesIO(data), wait)
+
+    def play_file(self, path: str, wait: bool = True) -> bool:
+        try:
+            return self._play_wav(open(path, "rb"), wait)
+        except OSError:
+            return False
+
+    def _play_wav(self, file, wait: bool) -> bool:
+        try:
+            wav_file = wave.open(file, "rb")
+        except (wave.Error, EOFError):
+            file.close()
+            return False
+        if wav_file.getsampwidth() != 2:
+            wav_file.close()
+            return False
+
+        def chunks():
+            # Read lazily in the producer thread, the file is never loaded at once
+            with wav_file:
+                frames = max(1, int(self.latency * wav_file.getframerate()))
+                while True:
+                    data = wav_file.readframes(frames)
+                    if not data:
+                        break
+                    yield data
+            file.close()
+
+        return self._submit(chunks(), wav_file.getframerate(), wav_file.getnchannels(), wait)
+
+    def _submit(self, chunks, sample_rate: int, channels: int, wait: bool) -> bool:
+        stream = _Stream(chunks, sample_rate, channels, self._generation)
+        self._pending.put(stream)
+        if not wait:
+            return True
+        stream.done.wait()
+        return not stream.failed
+
+    def drain(self) -> None:
+        """Block until everything submitted so far was handed to the sink"""
+        stream = _Stream([], 22050, 1, self._generation)
+        self._pending.put(stream)
+        stream.done.wait()
+
+    def stop(self) -> None:
+        """Drop everything queued or buffered; waiting play_*() calls return False"""
+        self._generation += 1
+        self._data_ready.set()
+        self._space_ready.set()
+
+    def close(self) -> None:
+        if self._closed:
+            return
+        self._closed = True
+        self._pending.put(None)
+        self._producer.join()
+        self._consumer.join()
+        self.sink.shutdown()
+
+    def _produce(self) -> None:
+        while True:
+            stream = self._pending.get()
+            if stream is None:
+                self._active.append(None)
+                self._data_ready.set()
+                return
+
+            stream.start = self.ring.written
+            self._active.append(stream)
+            try:
+                for chunk in stream.chunks:
+                    chunk = memoryview(chunk).cast("B")
+                    while len(chunk) and stream.generation == self._generation:
+                        written = self.ring.write(chunk)
+                        chunk = chunk[written:]
+                        self._data_ready.set()
+                        if len(chunk):
+                            self._space_ready.clear()
+                            if not self.ring.free():
+                                self._space_ready.wait(0.05)
+                    if stream.generation != self._generation:
+                        break
+            except Exception as e:
+                metrics.incr("errors", op="playback")
+                print(f"TTS Fehler: {e}")
+                stream.failed = True
+            stream.end = self.ring.written
+            self._data_ready.set()
+
+    def _consume(self) -> None:
+        # A quarter latency at the largest format; smaller formats use part of it
+        period = memoryview(bytearray(max(256, int(self.latency / 4 * 2 * self.MAX_RATE * self.MAX_CHANNELS))))
+        while True:
+            if not self._active:
+                self._data_ready.clear()
+                if not self._active:
+                    self._data_ready.wait(0.05)
+                continue
+
+            stream = self._active[0]
+            if stream is None:
+                return
+            self._play_stream(stream, period)
+            self._active.popleft()
+            stream.done.set()
+
+    def _play_stream(self, stream: _Stream, period: memoryview) -> None:
+        bytes_per_second = 2 * stream.sample_rate * stream.channels
+        size = min(len(period), max(2 * stream.channels, int(self.latency / 4 * bytes_per_second)))
+        size -= size % (2 * stream.channels)
+        # More than the ring can hold would never be reached and never start
+        prebuffer = min(int(self.latency * bytes_per_second), self.ring.capacity - size)
+
+        started = opened = False
+        starved = False
+        while True:
+            if stream.generation != self._generation:
+                # Stopped: wait for the producer to give up, then drop the rest
+                while stream.end is None:
+                    self._data_ready.clear()
+                    if stream.end is None:
+                        self._data_ready.wait(0.05)
+                self.ring.skip_to(stream.end)
+                self._space_ready.set()
+                if opened:
+                    self.sink.abort()
+                stream.failed = True
+                return
+
+            end = stream.end
+            pending = (end if end is not None else self.ring.written) - self.ring.read
+            if not started and end is None and pending < prebuffer:
+                self._wait_for_data()
+                continue
+
+            if pending > 0:
+                started = True
+                starved = False
+                try:
+                    if not opened:
+                        self.sink.open(stream.sample_rate, stream.channels)
+                        opened = True
+                    count = self.ring.read_into(period[:min(size, pending)])
+                    self._space_ready.set()
+                    self.sink.write(period[:count])
+                except (OSError, ValueError) as e:
+                    metrics.incr("errors", op="playback")
+                    print(f"TTS Fehler: {e}")
+                    stream.generation = -1
+                continue
+
+            if end is not None:
+                if opened:
+                    self.sink.close()
+                    self.streams += 1
+                return
+
+            if started and not starved:
+                starved = True
+                self.underruns += 1
+                metrics.incr("playback_underruns")
+            self._wait_for_data()
+
+    def _wait_for_data(self) -> None:
+        self._data_ready.clear()
+        self._data_ready.wait(0.01)
+
+
+def pcm_to_wav(pcm, sample_rate: int, channels: int = 1, target=None) -> Optional[bytes]:
+    """Wrap raw 16 bit PCM into a WAV container, returned as bytes or written to target"""
+    output = target if target is not None else io.BytesIO()
+    with wave.open(output, "wb") as wav_file:
+        wav_file.setnchannels(channels)
+        wav_file.setsampwidth(2)
+        wav_file.setframerate(sample_rate)
+        wav_file.writeframes(pcm)
+    return output.getvalue() if target is None else None
+
+
+# -----------------------------------------------------------------------------
+# AUDIO POST-PROCESSING
+# -----------------------------------------------------------------------------
+def _numpy():
+    """Import NumPy, which only the post-processing needs"""
+    try:
+        import numpy
+    except ImportError:
+        raise ImportError("NumPy wird für die Audio-Nachbearbeitung benötigt: pip install numpy") from None
+    return numpy
+
+
+class AudioProcessor:
+    """Vectorized post-processing of 16 bit PCM with NumPy
+
+    Trims leading and trailing silence down to `padding` seconds,
+    normalizes to a peak or RMS level in dBFS, applies a gain (the playback
+    volume) and optionally resamples. process_batch() pads all items into
+    one matrix, so silence detection and level measurement run as single
+    array operations over the whole batch. Multi-channel audio is processed
+    as interleaved frames: a frame counts as sound if any channel is loud,
+    and all channels share one gain.
+    """
+
+    NORMALIZE = (None, "peak", "rms")
+
+    def __init__(self, trim: bool = True, threshold_db: float = -40.0, padding: float = 0.05,
+                 normalize: Optional[str] = None, target_db: Optional[float] = None,
+                 sample_rate: Optional[int] = None) -> None:
+        if normalize not in self.NORMALIZE:
+            raise ValueError(f"Unbekannte Normalisierung: {normalize}")
+        self.np = _numpy()
+        self.trim = trim
+        self.threshold_db = threshold_db
+        self.padding = padding
+        self.normalize = normalize
+        self.target_db = target_db if target_db is not None else (-1.0 if normalize == "peak" else -20.0)
+        self.sample_rate = sample_rate
+
+    @classmethod
+    def from_spec(cls, spec: str) -> "AudioProcessor":
+        """Processor from a command line spec, e.g. trim,rms:-20 or trim:-35,peak,resample:16000"""
+        options = {"trim": False}
+        for part in spec.split(","):
+            name, _, value = part.strip().partition(":")
+            if name and name not in ("trim", "peak", "rms", "resample"):
+                raise ValueError(f"Unbekannte Nachbearbeitung: {part}")
+            try:
+                if name == "trim":
+                    options["trim"] = True
+                    if value:
+                        options["threshold_db"] = float(value)
+                elif name in ("peak", "rms"):
+                    options["normalize"] = name
+                    if value:
+                        options["target_db"] = float(value)
+                elif name == "resample":
+                    options["sample_rate"] = int(value)
+            except ValueError:
+                raise ValueError(f"Ungültiger Wert in der Nachbearbeitung: {part}") from None
+        return cls(**options)
+
+    def process(self, pcm, sample_rate: int, gain: float = 1.0, channels: int = 1):
+        """Returns (int16 samples, sample rate) for one piece of audio"""
+        return self.process_batch([pcm], sample_rate, [gain], channels)[0]
+
+    def process_batch(self, items: List, sample_rate: int, gains: Optional[List[float]] = None,
+                      channels: int = 1) -> List[tuple]:
+        """Process PCM buffers of the same format, returns (int16 samples, sample rate) per item"""
+        np = self.np
+        count = len(items)
+        if not count:
+            return []
+
+        # Rows of frames, one column per channel; a trailing partial frame is dropped
+        arrays = [np.frombuffer(pcm, dtype="<i2", count=len(pcm) // (2 * channels) * channels)
+                  for pcm in items]
+        lengths = np.array([len(array) // channels for array in arrays])
+        width = int(lengths.max())
+        matrix = np.zeros((count, width, channels), dtype=np.float32)
+        for row, array in enumerate(arrays):
+            matrix[row, :len(array) // channels] = array.reshape(-1, channels)
+        matrix *= 1.0 / 32768.0
+
+        starts = np.zeros(count, dtype=np.int64)
+        ends = lengths.astype(np.int64)
+        if self.trim and width:
+            loud = (np.abs(matrix) > 10.0 ** (self.threshold_db / 20.0)).any(axis=2)
+            has_sound = loud.any(axis=1)
+            first = loud.argmax(axis=1)
+            last = width - loud[:, ::-1].argmax(axis=1)
+            padding = int(self.padding * sample_rate)
+            starts = np.where(has_sound, np.maximum(first - padding, 0), 0)
+            ends = np.where(has_sound, np.minimum(last + padding, lengths), 0)
+            positions = np.arange(width)
+            matrix[(positions < starts[:, None]) | (positions >= ends[:, None])] = 0.0
+
+        factors = np.asarray(gains if gains is not None else [1.0] * count, dtype=np.float32)
+        if self.normalize and width:
+            if self.normalize == "peak":
+                level = np.abs(matrix).max(axis=(1, 2))
+            else:
+                level = np.sqrt(np.square(matrix).sum(axis=(1, 2)) / np.maximum((ends - starts) * channels, 1))
+            target = 10.0 ** (self.target_db / 20.0)
+            factors *= np.where(level > 0, target / np.maximum(level, 1e-9), 1.0).astype(np.float32)
+
+        matrix *= factors[:, None, None]
+        np.clip(matrix, -1.0, 32767.0 / 32768.0, out=matrix)
+
+        results = []
+        for row in range(count):
+            frames = matrix[row, starts[row]:ends[row]]
+            rate = sample_rate
+            if self.sample_rate and self.sample_rate != sample_rate and len(frames) > 1:
+                length = max(1, int(round(len(frames) * self.sample_rate / sample_rate)))
+                positions, original = np.linspace(0, len(frames) - 1, length), np.arange(len(frames))
+                frames = np.stack([np.interp(positions, original, frames[:, channel])
+                                   for channel in range(channels)], axis=1)
+                rate = self.sample_rate
+            results.append((np.round(frames.reshape(-1) * 32768.0).astype("<i2"), rate))
+        return results
+
+    def process_wav(self, audio: bytes, gain: float = 1.0) -> bytes:
+        """Post-process the contents of a 16 bit WAV file, anything else is returned as is"""
+        with wave.open(io.BytesIO(audio), "rb") as wav_file:
+            if wav_file.getsampwidth() != 2:
+                return audio
+            sample_rate, channels = wav_file.getframerate(), wav_file.getnchannels()
+            pcm = wav_file.readframes(wav_file.getnframes())
+        samples, rate = self.process(pcm, sample_rate, gain=gain, channels=channels)
+        return pcm_to_wav(samples, rate, channels)
+
+    def process_files(self, paths: List[str], gain: float = 1.0) -> None:
+        """Post-process 16 bit WAV files in place, one batch per sample rate and channel count"""
+        groups: Dict[Tuple[int, int], List[Tuple[str, bytes]]] = {}
+        for path in paths:
+            with wave.open(path, "rb") as wav_file:
+                if wav_file.getsampwidth() != 2:
+                    continue
+                groups.setdefault((wav_file.getframerate(), wav_file.getnchannels()), []).append(
+                    (path, wav_file.readframes(wav_file.getnframes()))
+                )
+
+        for (sample_rate, channels), entries in groups.items():
+            results = self.process_batch([pcm for _, pcm in entries], sample_rate, [gain] * len(entries), channels)
+            for (path, _), (samples, rate) in zip(entries, results):
+                with open(path, "wb") as file:
+                    pcm_to_wav(samples, rate, channels, target=file)
+
+
+# -----------------------------------------------------------------------------
+# NATIVE ESPEAK-NG
+# -----------------------------------------------------------------------------
+class PcmBuffer:
+    """Preallocated byte buffer the synthesizer writes samples into
+
+    The buffer only grows, by swapping in a larger bytearray, so views
+    handed out earlier stay valid; they show new samples once the buffer
+    is reused by the next synthesis.
+    """
+
+    def __init__(self, capacity: int = 1 << 20) -> None:
+        self.length = 0
+        self._allocate(capacity)
+
+    def _allocate(self, capacity: int) -> None:
+        data = bytearray(capacity)
+        if self.length:
+            data[:self.length] = self._data[:self.length]
+        self._data = data
+        self._address = ctypes.addressof((ctypes.c_char * capacity).from_buffer(data))
+
+    @property
+    def capacity(self) -> int:
+        return len(self._data)
+
+    def clear(self) -> None:
+        self.length = 0
+
+    def write_from(self, address: int, size: int) -> None:
+        """Append size bytes from a C pointer"""
+        end = self.length + size
+        if end > len(self._data):
+            self._allocate(max(end, 2 * len(self._data)))
+        ctypes.memmove(self._address + self.length, address, size)
+        self.length = end
+
+    def view(self) -> memoryview:
+        """The samples as bytes, without copying"""
+        return memoryview(self._data)[:self.length]
+
+    def samples(self) -> memoryview:
+        """The samples as signed 16 bit integers, without copying"""
+        return self.view().cast("h")
+
+
+class EspeakNG:
+    """libespeak-ng driven directly through ctypes
+
+    The library runs in synchronous mode: espeak_Synth() returns when the
+    text is done and hands every block of samples to our callback, which
+    copies it into a PcmBuffer. No audio device, driver loop or temp file
+    is involved. libespeak-ng keeps global state, so there is one instance
+    per process (shared()) and calls are serialized.
+    """
+
+    AUDIO_OUTPUT_SYNCHRONOUS = 2
+    CHARS_UTF8 = 0x1
+    SSML = 0x10
+    PHONEMES = 0x100
+    END_PAUSE = 0x1000
+    PARAMETER_RATE = 1
+    PARAMETER_VOLUME = 2
+
+    _shared: Optional["EspeakNG"] = None
+    _shared_lock = threading.Lock()
+
+    def __init__(self, library: Optional[str] = None) -> None:
+        name = library or ctypes.util.find_library("espeak-ng") or "libespeak-ng.so.1"
+        self.lib = ctypes.CDLL(name)
+        self._declare()
+
+        self.sample_rate = self.lib.espeak_Initialize(self.AUDIO_OUTPUT_SYNCHRONOUS, 0, None, 0)
+        if self.sample_rate <= 0:
+            raise OSError(f"{name}: espeak_Initialize fehlgeschlagen")
+
+        # The callback object must live as long as the library may call it
+        self._callback = self._callback_type(self._on_samples)
+        self.lib.espeak_SetSynthCallback(self._callback)
+
+        self.buffer = PcmBuffer()
+        self._target: Optional[PcmBuffer] = None
+        self._lock = threading.Lock()
+        self._applied: Tuple = (None, None, None)
+
+    @classmethod
+    def shared(cls) -> "EspeakNG":
+        """The process wide instance; raises OSError without libespeak-ng"""
+        with cls._shared_lock:
+            if cls._shared is None:
+                cls._shared = cls()
+            return cls._shared
+
+    def _declare(self) -> None:
+        lib = self.lib
+        self._callback_type = ctypes.CFUNCTYPE(ctypes.c_int, ctypes.c_void_p, ctypes.c_int, ctypes.c_void_p)
+
+        lib.espeak_Initialize.argtypes = [ctypes.c_int, ctypes.c_int, ctypes.c_char_p, ctypes.c_int]
+        lib.espeak_Initialize.restype = ctypes.c_int
+        lib.espeak_SetSynthCallback.argtypes = [self._callback_type]
+        lib.espeak_SetSynthCallback.restype = None
+        lib.espeak_SetVoiceByName.argtypes = [ctypes.c_char_p]
+        lib.espeak_SetVoiceByName.restype = ctypes.c_int
+        lib.espeak_SetParameter.argtypes = [ctypes.c_int, ctypes.c_int, ctypes.c_int]
+        lib.espeak_SetParameter.restype = ctypes.c_int
+        lib.espeak_Synth.argtypes = [ctypes.c_void_p, ctypes.c_size_t, ctypes.c_uint, ctypes.c_int, ctypes.c_uint,
+                                     ctypes.c_uint, ctypes.POINTER(ctypes.c_uint), ctypes.c_void_p]
+        lib.espeak_Synth.restype = ctypes.c_int
+        # Missing in old libespeak builds; text_to_phonemes() needs it
+        self.has_phonemes = hasattr(lib, "espeak_TextToPhonemes")
+        if self.has_phonemes:
+            lib.espeak_TextToPhonemes.argtypes = [ctypes.POINTER(ctypes.c_void_p), ctypes.c_int, ctypes.c_int]
+            lib.espeak_TextToPhonemes.restype = ctypes.c_char_p
+
+    def _on_samples(self, wav: Optional[int], count: int, events: Optional[int]) -> int:
+        if wav and count > 0 and self._target is not None:
+            self._target.write_from(wav, count * 2)
+        return 0
+
+    def _configure(self, voice: Optional[str], rate: Optional[int], volume: Optional[float]) -> None:
+        # Like ArchTTS._apply_engine_properties, only push what changed
+        applied_voice, applied_rate, applied_volume = self._applied
+        if voice and voice != applied_voice:
+            if self.lib.espeak_SetVoiceByName(voice.encode("utf-8")) != 0:
+                raise ValueError(f"Unbekannte Stimme: {voice}")
+        if rate is not None and rate != applied_rate:
+            self.lib.espeak_SetParameter(self.PARAMETER_RATE, int(rate), 0)
+        if volume is not None and volume != applied_volume:
+            self.lib.espeak_SetParameter(self.PARAMETER_VOLUME, int(round(volume * 100)), 0)
+        self._applied = (voice or applied_voice, rate if rate is not None else applied_rate,
+                         volume if volume is not None else applied_volume)
+
+    def synthesize(self, text: str, voice: Optional[str] = None, rate: Optional[int] = None,
+                   volume: Optional[float] = None, flags: int = 0,
+                   into: Optional[PcmBuffer] = None) -> memoryview:
+        """Synthesize text into a buffer and return a view of its samples
+
+        Without into, the shared buffer of this instance is used and the
+        view is only valid until the next call.
+        """
+        target = into if into is not None else self.buffer
+        data = text.encode("utf-8") + b"\0"
+
+        with self._lock:
+            self._configure(voice, rate, volume)
+            target.clear()
+            self._target = target
+            try:
+                result = self.lib.espeak_Synth(data, len(data), 0, 0, 0,
+                                               self.CHARS_UTF8 | self.END_PAUSE | flags, None, None)
+            finally:
+                self._target = None
+
+        if result != 0:
+            raise RuntimeError(f"espeak_Synth fehlgeschlagen ({result})")
+        return target.view()
+
+    CLAUSE_PUNCTUATION = ".,?!;:…"
+
+    def text_to_phonemes(self, text: str, voice: Optional[str] = None) -> str:
+        """Text as espeak-ng input with every clause in [[phoneme mnemonics]]
+
+        The library translates one clause per call and drops its
+        punctuation, so the punctuation that ended each clause in text is
+        put back behind its brackets; intonation and pauses then follow it
+        as they would for the plain text.
+        """
+        if not self.has_phonemes:
+            raise RuntimeError("espeak_TextToPhonemes wird von dieser libespeak-ng nicht unterstützt")
+
+        encoded = text.encode("utf-8")
+        data = ctypes.create_string_buffer(encoded)
+        start = ctypes.addressof(data)
+        pointer = ctypes.c_void_p(start)
+        clauses = []
+        with self._lock:
+            self._configure(voice, None, None)
+            while pointer.value:
+                position = pointer.value
+                result = self.lib.espeak_TextToPhonemes(ctypes.byref(pointer), self.CHARS_UTF8, 0)
+                consumed = encoded[position - start:(pointer.value or start + len(encoded)) - start]
+                ending = consumed.decode("utf-8", "replace").rstrip()[-1:]
+                phonemes = result.decode("utf-8").strip() if result else ""
+                if phonemes:
+                    clauses.append(f"[[{phonemes}]]{ending if ending in self.CLAUSE_PUNCTUATION else ''}")
+                if pointer.value == position:
+                    break
+        return " ".join(clauses)
+
+    def synthesize_phonemes(self, phonemes: str, voice: Optional[str] = None, rate: Optional[int] = None,
+                            volume: Optional[float] = None, into: Optional[PcmBuffer] = None) -> memoryview:
+        """Like synthesize(), starting from text_to_phonemes() output"""
+        return self.synthesize(phonemes, voice, rate, volume, flags=self.PHONEMES, into=into)
+
+
+class PhonemeCache:
+    """LRU of espeak-ng phoneme strings per (normalized text, language)
+
+    Sits below the audio cache: audio depends on voice, rate and volume,
+    phonemes only on text and language. After a rate change or a switch to
+    a sibling voice the audio cache misses, but synthesis starts from the
+    cached phonemes and skips the text analysis.
+    """
+
+    def __init__(self, max_bytes: int = 8 * 1024 * 1024) -> None:
+        self.max_bytes = max_bytes
+        self._entries: "OrderedDict[Tuple[str, str], str]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.total_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        # Summed text analysis time of all misses, to estimate what hits save
+        self.analysis_time = 0.0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    @staticmethod
+    def _size(key: Tuple[str, str], phonemes: str) -> int:
+        return len(key[0].encode("utf-8")) + len(phonemes.encode("utf-8")) + len(key[1]) + 64
+
+    def lookup(self, text: str, language: str) -> Optional[str]:
+        with self._lock:
+            phonemes = self._entries.get((text, language))
+            if phonemes is None:
+                self.misses += 1
+                metrics.incr("phoneme_cache_misses")
+                return None
+            self._entries.move_to_end((text, language))
+            self.hits += 1
+            metrics.incr("phoneme_cache_hits")
+            return phonemes
+
+    def store(self, text: str, language: str, phonemes: str, analysis_time: float = 0.0) -> None:
+        key = (text, language)
+        with self._lock:
+            self.analysis_time += analysis_time
+            if key in self._entries:
+                self.total_bytes -= self._size(key, self._entries.pop(key))
+            self._entries[key] = phonemes
+            self.total_bytes += self._size(key, phonemes)
+            while self.total_bytes > self.max_bytes and self._entries:
+                old_key, old_phonemes = self._entries.popitem(last=False)
+                self.total_bytes -= self._size(old_key, old_phonemes)
+
+    @property
+    def hit_rate(self) -> float:
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+    @property
+    def saved_seconds(self) -> float:
+        """Estimated analysis time the hits did not have to spend"""
+        return self.hits * self.analysis_time / self.misses if self.misses else 0.0
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self.total_bytes = 0
+
+
+# -----------------------------------------------------------------------------
+# TEXT NORMALIZATION
+# -----------------------------------------------------------------------------
+_GERMAN_UNITS = ("null", "eins", "zwei", "drei", "vier", "fünf", "sechs", "sieben", "acht", "neun", "zehn",
+                 "elf", "zwölf", "dreizehn", "vierzehn", "fünfzehn", "sechzehn", "siebzehn", "achtzehn",
+                 "neunzehn")
+_GERMAN_TENS = ("", "", "zwanzig", "dreißig", "vierzig", "fünfzig", "sechzig", "siebzig", "achtzig", "neunzig")
+_ENGLISH_UNITS = ("zero", "one", "two", "three", "four", "five", "six", "seven", "eight", "nine", "ten",
+                  "eleven", "twelve", "thirteen", "fourteen", "fifteen", "sixteen", "seventeen", "eighteen",
+                  "nineteen")
+_ENGLISH_TENS = ("", "", "twenty", "thirty", "forty", "fifty", "sixty", "seventy", "eighty", "ninety")
+
+
+def _german_below_thousand(number: int, compound: bool) -> str:
+    """compound: "ein" instead of "eins" when followed by another word part"""
+    if number == 1 and compound:
+        return "ein"
+    if number < 20:
+        return _GERMAN_UNITS[number]
+    if number < 100:
+        units, tens = number % 10, _GERMAN_TENS[number // 10]
+        return tens if not units else f"{'ein' if units == 1 else _GERMAN_UNITS[units]}und{tens}"
+    hundreds, rest = divmod(number, 100)
+    words = f"{'ein' if hundreds == 1 else _GERMAN_UNITS[hundreds]}hundert"
+    return words + (_german_below_thousand(rest, compound) if rest else "")
+
+
+def german_number(number: int) -> str:
+    if number < 1000:
+        return _german_below_thousand(number, compound=False)
+
+    parts = []
+    for value, singular, plural in ((10 ** 9, "eine Milliarde", "Milliarden"), (10 ** 6, "eine Million", "Millionen")):
+        count, number = divmod(number, value)
+        if count:
+            parts.append(singular if count == 1 else f"{german_number(count)} {plural}")
+
+    words = ""
+    thousands, rest = divmod(number, 1000)
+    if thousands:
+        words = f"{_german_below_thousand(thousands, compound=True)}tausend"
+    if rest:
+        words += _german_below_thousand(rest, compound=False)
+    if words:
+        parts.append(words)
+    return " ".join(parts)
+
+
+def english_number(number: int) -> str:
+    if number < 20:
+        return _ENGLISH_UNITS[number]
+    if number < 100:
+        tens, units = divmod(number, 10)
+        return _ENGLISH_TENS[tens] + (f"-{_ENGLISH_UNITS[units]}" if units else "")
+    if number < 1000:
+        hundreds, rest = divmod(number, 100)
+        return f"{_ENGLISH_UNITS[hundreds]} hundred" + (f" {english_number(rest)}" if rest else "")
+
+    for value, name in ((10 ** 9, "billion"), (10 ** 6, "million"), (1000, "thousand")):
+        if number >= value:
+            count, rest = divmod(number, value)
+            return f"{english_number(count)} {name}" + (f" {english_number(rest)}" if rest else "")
+    return ""
+
+
+_GERMAN_ORDINALS = {1: "erst", 3: "dritt", 7: "siebt", 8: "acht"}
+_ENGLISH_ORDINALS = {"one": "first", "two": "second", "three": "third", "five": "fifth", "eight": "eighth",
+                     "nine": "ninth", "twelve": "twelfth"}
+
+
+def german_ordinal(number: int) -> str:
+    """Ordinal stem without ending, "dritt" for 3, "einundzwanzigst" for 21"""
+    rest = number % 100
+    if 0 < rest < 20:
+        head = german_number(number - rest) if number >= 100 else ""
+        return head + _GERMAN_ORDINALS.get(rest, german_number(rest) + "t")
+    return german_number(number) + "st"
+
+
+def english_ordinal(number: int) -> str:
+    head, last = re.match(r"(.*?)([a-z]+)$", english_number(number)).groups()
+    if last in _ENGLISH_ORDINALS:
+        return head + _ENGLISH_ORDINALS[last]
+    if last.endswith("y"):
+        return f"{head}{last[:-1]}ieth"
+    return f"{head}{last}th"
+
+
+def german_time(hours: int, minutes: int) -> str:
+    words = "ein Uhr" if hours == 1 else f"{german_number(hours)} Uhr"
+    return f"{words} {german_number(minutes)}" if minutes else words
+
+
+def english_time(hours: int, minutes: int) -> str:
+    if not minutes:
+        return f"{english_number(hours)} o'clock"
+    if minutes < 10:
+        return f"{english_number(hours)} oh {english_number(minutes)}"
+    return f"{english_number(hours)} {english_number(minutes)}"
+
+
+# Per language: number words, decimal/thousands separators, abbreviations and symbols
+NORMALIZATION_RULES: Dict[str, dict] = {
+    "de": {
+        "number": german_number,
+        "digits": _GERMAN_UNITS[:10],
+        "decimal": ",",
+        "thousands": ".",
+        "point": "Komma",
+        "dot": "Punkt",
+        "minus": "minus",
+        "one": "ein",
+        "ordinal": german_ordinal,
+        # "der 3. Platz", "am 3. Mai": the ending follows the article, "3. Mai" alone is "dritter"
+        "ordinal_endings": {"der": "e", "die": "e", "das": "e", "den": "en", "dem": "en", "des": "en",
+                            "am": "en", "im": "en", "vom": "en", "zum": "en", "zur": "en", "beim": "en", "": "er"},
+        "months": ("Januar", "Februar", "März", "April", "Mai", "Juni", "Juli", "August", "September",
+                   "Oktober", "November", "Dezember"),
+        "time": german_time,
+        "clock": "Uhr",
+        # (singular, plural) for amounts like "1.234,50 €"
+        "currencies": {"€": ("Euro", "Euro"), "$": ("Dollar", "Dollar")},
+        "cents": ("Cent", "Cent"),
+        "abbreviations": {
+            "z.b.": "zum Beispiel", "bzw.": "beziehungsweise", "usw.": "und so weiter", "d.h.": "das heißt",
+            "ca.": "circa", "dr.": "Doktor", "bspw.": "beispielsweise",
+            "ggf.": "gegebenenfalls", "evtl.": "eventuell", "u.a.": "unter anderem", "vgl.": "vergleiche",
+        },
+        # Case-sensitive, so "LG Fernseher" stays a brand
+        "slang": {
+            "btw": "by the way", "mfg": "mit freundlichen Grüßen", "MfG": "mit freundlichen Grüßen",
+            "lg": "liebe Grüße", "imho": "meiner Meinung nach", "omg": "oh mein Gott", "wtf": "what the fuck",
+            "lol": "lol",
+        },
+        # Only expanded in front of a number
+        "numbered": {"nr.": "Nummer"},
+        # Can end a sentence, their period then stays
+        "closing": ("usw.",),
+        # Count of the lines a watch burst leaves out
+        "more": "Und {} weitere",
+        "symbols": {"%": " Prozent", "&": " und ", "€": " Euro", "$": " Dollar", "+": " plus ", "°": " Grad"},
+        "emoji": {"😂": "lachend", "🤣": "lachend", "😀": "grinsend", "😊": "lächelnd", "😭": "weinend",
+                  "❤": "Herz", "👍": "Daumen hoch", "👎": "Daumen runter", "🔥": "Feuer", "🙏": "bitte"},
+    },
+    "en": {
+        "number": english_number,
+        "digits": _ENGLISH_UNITS[:10],
+        "decimal": ".",
+        "thousands": ",",
+        "point": "point",
+        "dot": "point",
+        "minus": "minus",
+        "one": "one",
+        "ordinal": english_ordinal,
+        "time": english_time,
+        "clock": "o'clock",
+        "currencies": {"€": ("euro", "euros"), "$": ("dollar", "dollars")},
+        "cents": ("cent", "cents"),
+        "abbreviations": {
+            "e.g.": "for example", "i.e.": "that is", "etc.": "et cetera", "vs.": "versus", "mr.": "mister",
+            "mrs.": "missus", "dr.": "doctor",
+        },
+        "slang": {
+            "btw": "by the way", "imo": "in my opinion", "imho": "in my humble opinion", "idk": "I don't know",
+            "tbh": "to be honest", "omg": "oh my god", "afaik": "as far as I know", "wtf": "what the fuck",
+            "lol": "lol",
+        },
+        "numbered": {"no.": "number"},
+        "closing": ("etc.",),
+        "more": "And {} more",
+        "symbols": {"%": " percent", "&": " and ", "€": " euros", "$": " dollars", "+": " plus ", "°": " degrees"},
+        "emoji": {"😂": "laughing", "🤣": "laughing", "😀": "grinning", "😊": "smiling", "😭": "crying",
+                  "❤": "heart", "👍": "thumbs up", "👎": "thumbs down", "🔥": "fire", "🙏": "please"},
+    },
+}
+
+_EMOJI_LEFTOVERS = re.compile("[\U0001F000-\U0001FAFF\u2600-\u27BF\uFE0F\u200D]+")
+
+
+@functools.lru_cache(maxsize=None)
+def _compiled_rules(language: str) -> dict:
+    """Compile the regexes of one language on first use"""
+    rules = NORMALIZATION_RULES[language]
+    thousands, decimal = re.escape(rules["thousands"]), re.escape(rules["decimal"])
+    abbreviations = sorted(rules["abbreviations"], key=len, reverse=True)
+    # Versions and dotted decimals; one dot is a decimal point where "." is the separator
+    dots = 2 if rules["decimal"] == "." else 1
+    number = (rf"\d{{1,3}}(?:{thousands}\d{{3}})+(?:{decimal}\d+)?(?!\d)"
+              rf"|(?P<dotted>\d+(?:\.\d+){{{dots},}})|\d+(?:{decimal}\d+)?")
+    currencies = "".join(re.escape(symbol) for symbol in ("€", "$") if symbol in rules["symbols"])
+    integer = rf"\d{{1,3}}(?:{thousands}\d{{3}})+|\d+"
+    if "ordinal_endings" in rules:
+        # German "3." is only an ordinal after an article or in front of a month
+        articles = "|".join(article for article in rules["ordinal_endings"] if article)
+        ordinal = rf"(?<![\w.,])(?:(?P<article>{articles})\s+)?(?P<number>\d{{1,3}})\.(?=\s+(?P<next>\w+))"
+    else:
+        ordinal = rf"(?<![\w.,])(?P<number>{integer})(?:st|nd|rd|th)\b"
+    return {
+        "abbreviations": re.compile(
+            r"(?<!\w)(" + "|".join(re.escape(key) for key in abbreviations) + r")(?!\w)", re.IGNORECASE
+        ),
+        "slang": re.compile(r"(?<!\w)(" + "|".join(map(re.escape, rules["slang"])) + r")(?!\w)"),
+        "minus": re.compile(r"(?<![\w)])[-−–](?=\d)"),
+        "time": re.compile(
+            rf"(?<![\d:.,])([01]?\d|2[0-3]):([0-5]\d)(?![\d:])(?:\s*{re.escape(rules['clock'])}(?!\w))?"
+        ),
+        "ordinal": re.compile(ordinal, re.IGNORECASE),
+        # Whole amounts and amounts with two-digit cents, either separator
+        "money": re.compile(
+            rf"(?<![\d.,])(?P<amount>{integer})(?:[.,](?P<cents>\d\d))?\s?(?P<symbol>[{currencies}])"
+        ),
+        "numbered": re.compile(
+            r"(?<!\w)(" + "|".join(re.escape(key) for key in rules["numbered"]) + r")(?=\s*\d)", re.IGNORECASE
+        ),
+        "symbols": re.compile("|".join(re.escape(symbol) for symbol in rules["symbols"])),
+        "emoji": re.compile("|".join(re.escape(emoji) for emoji in rules["emoji"])),
+        "number": re.compile(number),
+        # "$5" is read "five dollars": move the symbol behind the amount,
+        # unless it already follows one ("2,5 € 12:00")
+        "currency": re.compile(rf"(?<!\d)(?<!\d\s)([{currencies}])\s?({number.replace('?P<dotted>', '?:')})"),
+        "thousands": rules["thousands"],
+    }
+
+
+def _expand_abbreviation(match, rules: dict) -> str:
+    key = match.group(0).lower()
+    words = rules["abbreviations"][key]
+    if key in rules["closing"]:
+        # Keep the sentence's period when the abbreviation ends it
+        rest = match.string[match.end():]
+        if not rest.strip() or rest.startswith("\n") or re.match(r"\s+[A-ZÄÖÜ]", rest):
+            words += "."
+    return words
+
+
+def _spell_ordinal(match, rules: dict) -> str:
+    number = int(match.group("number").replace(rules["thousands"], ""))
+    if "ordinal_endings" not in rules:
+        return f" {rules['ordinal'](number)} "
+
+    article = match.group("article")
+    if article is None and match.group("next") not in rules["months"]:
+        return match.group(0)
+    words = rules["ordinal"](number) + rules["ordinal_endings"][(article or "").lower()]
+    return f"{article} {words} " if article else f" {words} "
+
+
+def _spell_money(match, rules: dict, compiled: dict) -> str:
+    amount = int(match.group("amount").replace(compiled["thousands"], ""))
+    cents = int(match.group("cents") or 0)
+
+    def count(number: int, names: Tuple[str, str]) -> str:
+        words = rules["one"] if number == 1 else _spell_integer(str(number), rules)
+        return f"{words} {names[number != 1]}"
+
+    parts = []
+    if amount or not cents:
+        parts.append(count(amount, rules["currencies"][match.group("symbol")]))
+    if cents:
+        parts.append(count(cents, rules["cents"]))
+    return f" {' '.join(parts)} "
+
+
+def _spell_integer(digits: str, rules: dict) -> str:
+    if len(digits) > 12:
+        return " ".join(rules["digits"][int(digit)] for digit in digits)
+    return rules["number"](int(digits))
+
+
+def _spell_number(match, rules: dict, compiled: dict) -> str:
+    token = match.group(0)
+    if match.group("dotted"):
+        # Versions and dates: every part on its own, "zwei Punkt fünf"
+        return " " + f" {rules['dot']} ".join(_spell_integer(part, rules) for part in token.split(".")) + " "
+
+    integer, _, fraction = token.replace(compiled["thousands"], "").partition(rules["decimal"])
+    words = _spell_integer(integer, rules)
+    if fraction:
+        words += f" {rules['point']} " + " ".join(rules["digits"][int(digit)] for digit in fraction)
+    return f" {words} "
+
+
+@functools.lru_cache(maxsize=4096)
+def normalize_text(text: str, language: str = "de", ssml: bool = False) -> str:
+    """Expand abbreviations, slang, symbols, emoji and numbers before synthesis
+
+    Results are memoized, so equivalent inputs end up as the same string
+    (and the same audio cache key) without re-running the rules.
+    """
+    if language not in NORMALIZATION_RULES:
+        language = "de"
+    rules = NORMALIZATION_RULES[language]
+    compiled = _compiled_rules(language)
+
+    text = compiled["emoji"].sub(lambda match: f" {rules['emoji'][match.group(0)]} ", text)
+    text = _EMOJI_LEFTOVERS.sub(" ", text)
+    text = compiled["abbreviations"].sub(lambda match: _expand_abbreviation(match, rules), text)
+    text = compiled["slang"].sub(lambda match: rules["slang"][match.group(0)], text)
+    text = compiled["numbered"].sub(lambda match: rules["numbered"][match.group(0).lower()], text)
+    text = compiled["minus"].sub(f" {rules['minus']} ", text)
+    text = compiled["currency"].sub(r"\2\1", text)
+    text = compiled["money"].sub(lambda match: _spell_money(match, rules, compiled), text)
+    text = compiled["time"].sub(
+        lambda match: f" {rules['time'](int(match.group(1)), int(match.group(2)))} ", text
+    )
+    text = compiled["ordinal"].sub(lambda match: _spell_ordinal(match, rules), text)
+    text = compiled["number"].sub(lambda match: _spell_number(match, rules, compiled), text)
+    text = compiled["symbols"].sub(lambda match: rules["symbols"][match.group(0)], text)
+    text = " ".join(text.split())
+    text = re.sub(r"\s+([.,!?;:])", r"\1", text)
+
+    if ssml:
+        escaped = text.replace("&", "&amp;").replace("<", "&lt;").replace(">", "&gt;")
+        return f'<speak xml:lang="{language}">{escaped}</speak>'
+    return text
+
+
+SENTENCE_END = re.compile(r"(?<=[.!?…])\s+|\n+")
+CLAUSE_END = re.compile(r"(?<=[,;:])\s+")
+
+
+def split_sentences(text: str, max_chars: int = 160) -> List[str]:
+    """Split text into sentences, and overly long sentences into clauses"""
+    chunks = []
+    for sentence in SENTENCE_END.split(text):
+        sentence = sentence.strip()
+        if not sentence:
+            continue
+        if len(sentence) <= max_chars:
+            chunks.append(sentence)
+            continue
+
+        current = ""
+        for clause in CLAUSE_END.split(sentence):
+            if current and len(current) + 1 + len(clause) > max_chars:
+                chunks.append(current)
+                current = clause
+            else:
+                current = f"{current} {clause}".strip()
+        if current:
+            chunks.append(current)
+
+    return chunks
+
+
+# -----------------------------------------------------------------------------
+# PYTTSX3 TTS SYSTEM
+# -----------------------------------------------------------------------------
+class VoiceInfo:
+    """Plain copy of a pyttsx3 voice that can be stored in the voice cache"""
+
+    def __init__(self, id: str, name: str, languages: Optional[List[str]] = None,
+                 gender: Optional[str] = None, age: Optional[int] = None) -> None:
+        self.id = id
+        self.name = name
+        self.languages = languages or []
+        self.gender = gender
+        self.age = age
+
+    @classmethod
+    def from_voice(cls, voice) -> "VoiceInfo":
+        languages = [
+            language.decode("utf-8", errors="ignore") if isinstance(language, bytes) else str(language)
+            for language in (getattr(voice, "languages", None) or [])
+        ]
+        return cls(voice.id, voice.name, languages, getattr(voice, "gender", None), getattr(voice, "age", None))
+
+    def to_dict(self) -> dict:
+        return {"id": self.id, "name": self.name, "languages": self.languages,
+                "gender": self.gender, "age": self.age}
+
+
+class VoiceCatalog:
+    """Search structures over the available voices, built once per voice list
+
+    Names and ids are normalized and tagged with language, backend and
+    gender a single time, so filtering and the best-voice lookup no longer
+    rescan every voice.
+    """
+
+    GERMAN_KEYWORDS = ('german', 'deutsch', 'de-de', 'de_de', 'de', 'festival_de')
+    ENGLISH_KEYWORDS = ('english', 'en-us', 'en_us', 'en-gb')
+
+    def __init__(self, voices) -> None:
+        self.voices = list(voices)
+        self.best_index: Optional[int] = None
+        self._ids: Dict[str, int] = {}
+        self._by_language: Dict[str, List[int]] = {}
+        self._by_backend: Dict[str, List[int]] = {}
+        self._by_gender: Dict[str, List[int]] = {}
+        self._haystacks: List[str] = []
+        self._labels: List[str] = []
+        self._languages: List[List[str]] = []
+        self._backends: List[str] = []
+
+        german_match = english_match = None
+        for index, voice in enumerate(self.voices):
+            voice_name = voice.name.lower() if voice.name else ""
+            voice_id = voice.id.lower() if voice.id else ""
+
+            self._ids.setdefault(voice.id, index)
+            self._haystacks.append(f"{voice_name} {voice_id}")
+            self._labels.append(ArchTTS._get_voice_type(voice_id))
+
+            languages = self._language_tags(voice, voice_name, voice_id)
+            self._languages.append(languages)
+            for language in languages:
+                self._by_language.setdefault(language, []).append(index)
+
+            backend = self._backend_tag(voice_name, voice_id)
+            self._backends.append(backend)
+            self._by_backend.setdefault(backend, []).append(index)
+
+            gender = str(getattr(voice, "gender", None) or "").lower()
+            if gender:
+                self._by_gender.setdefault(gender, []).append(index)
+
+            # Same priority as before: festival-de, any German, any English
+            if any(keyword in voice_name or keyword in voice_id for keyword in self.GERMAN_KEYWORDS):
+                if self.best_index is None and 'festival' in voice_id and 'de' in voice_id:
+                    self.best_index = index
+                if german_match is None:
+                    german_match = index
+            if english_match is None and any(
+                    keyword in voice_name or keyword in voice_id for keyword in self.ENGLISH_KEYWORDS):
+                english_match = index
+
+        if self.best_index is None:
+            self.best_index = german_match if german_match is not None else english_match
+
+    @staticmethod
+    def _language_tags(voice, voice_name: str, voice_id: str) -> List[str]:
+        tags = []
+        for language in getattr(voice, "languages", None) or []:
+            if isinstance(language, bytes):
+                language = language.decode("utf-8", errors="ignore")
+            language = str(language).strip().lower().replace("_", "-")
+            if language:
+                tags.append(language)
+                tags.append(language.split("-")[0])
+
+        tokens = set(re.split(r"[^a-z0-9]+", f"{voice_name} {voice_id}"))
+        if tokens & {"german", "deutsch", "de"}:
+            tags.append("de")
+        if tokens & {"english", "en"}:
+            tags.append("en")
+
+        return list(dict.fromkeys(tags))
+
+    @staticmethod
+    def _backend_tag(voice_name: str, voice_id: str) -> str:
+        if "festival" in voice_id:
+            return "festival"
+        if "mbrola" in voice_id or "mb-" in voice_id or "mbrola" in voice_name:
+            return "mbrola"
+        # On Linux pyttsx3 drives espeak(-ng), whose ids rarely say so
+        return "espeak"
+
+    def __len__(self) -> int:
+        return len(self.voices)
+
+    def best(self):
+        return self.voices[self.best_index] if self.best_index is not None else None
+
+    def index_of(self, voice_id: Optional[str]) -> Optional[int]:
+        return self._ids.get(voice_id)
+
+    def languages_of(self, index: int) -> List[str]:
+        return self._languages[index]
+
+    def backend_of(self, index: int) -> str:
+        return self._backends[index]
+
+    def label_of(self, index: int) -> str:
+        return self._labels[index]
+
+    def by_language(self, language: str) -> List:
+        return [self.voices[index] for index in self._by_language.get(language.lower().replace("_", "-"), [])]
+
+    def by_backend(self, backend: str) -> List:
+        return [self.voices[index] for index in self._by_backend.get(backend.lower(), [])]
+
+    def search(self, query: str) -> List[int]:
+        """Indices of all voices matching every word of the query
+
+        Words that name a language, backend or gender use the indexes,
+        anything else is matched as a substring of name and id.
+        """
+        result: Optional[set] = None
+        for word in query.lower().split():
+            if word in self._by_language or word in self._by_backend or word in self._by_gender:
+                matches = set(self._by_language.get(word, []))
+                matches.update(self._by_backend.get(word, []))
+                matches.update(self._by_gender.get(word, []))
+            else:
+                candidates = result if result is not None else range(len(self.voices))
+                matches = {index for index in candidates if word in self._haystacks[index]}
+            result = matches if result is None else result & matches
+            if not result:
+                return []
+
+        return sorted(result) if result is not None else list(range(len(self.voices)))
+
+
+class ArchTTS:
+    """TTS System using pyttsx3
+
+    The pyttsx3 engine itself is created lazily on the first utterance that
+    is not served from the audio cache. The voice list and the selected
+    voice are restored from a cache file as long as the installed TTS
+    backends did not change.
+    """
+
+    VOICE_CACHE_PATH: str = os.path.join(CACHE_DIR, "voices.json")
+    # Files whose presence and mtime identify the installed TTS backends
+    BACKEND_BINARIES = ("espeak", "espeak-ng", "festival", "mbrola")
+    BACKENDS = ("pyttsx3", "espeak-ng")
+    BACKEND_DATA_DIRS = (
+        "/usr/share/espeak-ng-data",
+        "/usr/share/espeak-ng-data/voices",
+        "/usr/lib/espeak-ng-data",
+        "/usr/share/festival/voices",
+        "/usr/share/mbrola",
+    )
+
+    _shared: Optional["ArchTTS"] = None
+    _shared_lock = threading.Lock()
+
+    @classmethod
+    def shared(cls) -> "ArchTTS":
+        """Returns the process-wide ArchTTS instance"""
+        with cls._shared_lock:
+            if cls._shared is None:
+                cls._shared = cls()
+            return cls._shared
+
+    def __init__(self, engine_factory=None, voice_cache_path: Optional[str] = None):
+        # Anything that returns a pyttsx3-compatible engine, e.g. FakeEngine
+        self.engine_factory = engine_factory or pyttsx3_engine
+        self.voice_cache_path = voice_cache_path or self.VOICE_CACHE_PATH
+
+        self.tts_engine = None
+        # (voice, rate, volume) last pushed to tts_engine
+        self._applied_profile: Optional[tuple] = None
+        self.available_voices = []
+        self.catalog = VoiceCatalog([])
+        self.current_voice_id = None
+        self.is_initialized = False
+        self.settings = {
+            "rate": 160,  # words per minute
+            "volume": 0.8,  # 0.0 to 1.0
+            "voice": "auto"  # set first available voice
+        }
+
+        # _lock guards the engine, _speech_lock keeps utterances from overlapping.
+        # They are separate so the next sentence can be rendered during playback.
+        self._lock = threading.RLock()
+        self._speech_lock = threading.RLock()
+        self._cancelled = threading.Event()
+
+        # Optional pre-rendered phrases, see Soundbank
+        self.soundbank: Optional["Soundbank"] = None
+
+        # With post-processing, volume is applied at playback and never re-synthesized
+        self.postprocessor: Optional[AudioProcessor] = None
+
+        # Synthesis backend: pyttsx3's driver loop, or libespeak-ng straight into memory
+        self.backend = "pyttsx3"
+        self.native: Optional[EspeakNG] = None
+        # Second cache tier of the espeak-ng backend, see PhonemeCache
+        self.phoneme_cache: Optional[PhonemeCache] = None
+
+        # Long texts are rendered sentence by sentence while the previous one plays
+        self.streaming = True
+        # Wrap normalized text in <speak>, only for backends that parse SSML
+        self.ssml = False
+        self.last_time_to_first_audio: Optional[float] = None
+
+        # Rendered-audio cache, only useful if we can play WAV files ourselves
+        self.player = WavPlayer()
+        self.audio_cache: Optional[AudioCache] = None
+        if self.player.available:
+            try:
+                self.audio_cache = AudioCache()
+            except OSError:
+                self.audio_cache = None
+
+        # Only touch the engine now if we know nothing about this host yet
+        if not self._load_voice_cache():
+            self.initialize_engine()
+
+    def initialize_engine(self):
+        """Initialize pyttsx3 TTS engine"""
+        with metrics.timer("engine_init", mode="eager"):
+            self._initialize_engine()
+
+    def _initialize_engine(self):
+        try:
+            self.tts_engine = self.engine_factory()
+            self.is_initialized = True
+
+            # Get available voices
+            voices = self.tts_engine.getProperty('voices')
+            if voices:
+                self.available_voices = [VoiceInfo.from_voice(voice) for voice in voices]
+                self.catalog = VoiceCatalog(self.available_voices)
+
+                selected_voice = self.catalog.best()
+                if selected_voice:
+                    self.current_voice_id = selected_voice.id
+                    self.settings["voice"] = selected_voice.name
+                else:
+                    self.current_voice_id = voices[0].id
+                    self.settings["voice"] = voices[0].name
+
+                self.tts_engine.setProperty('voice', self.current_voice_id)
+
+            # Set initial properties
+            self.tts_engine.setProperty('rate', self.settings["rate"])
+            self.tts_engine.setProperty('volume', self.profile()[2])
+            self._applied_profile = self.profile()
+
+            #print("pyttsx3 TTS Engine initialisiert")
+            if self.current_voice_id:
+                voice_info = self.settings["voice"]
+                if "festival" in self.current_voice_id.lower() and "de" in self.current_voice_id.lower():
+                    voice_info += " (festival-de)"
+                #print(f"Stimme: {voice_info}")
+
+            self._store_voice_cache()
+
+        except Exception as e:
+            metrics.incr("errors", op="engine_init")
+            print(f"Fehler beim Initialisieren der TTS Engine: {e}")
+            print("Stelle sicher, dass TTS Backends installiert sind: sudo pacman -S espeak-ng festival festival-de")
+            self.is_initialized = False
+
+    def _ensure_engine(self) -> bool:
+        """Create the pyttsx3 engine on first use"""
+        if self.tts_engine is not None:
+            return True
+
+        with self._lock:
+            if self.tts_engine is None:
+                try:
+                    with metrics.timer("engine_init", mode="lazy"):
+                        self.tts_engine = self.engine_factory()
+                    self._applied_profile = None
+                except Exception as e:
+                    metrics.incr("errors", op="engine_init")
+                    print(f"Fehler beim Initialisieren der TTS Engine: {e}")
+                    print("Stelle sicher, dass TTS Backends installiert sind: sudo pacman -S espeak-ng festival festival-de")
+                    self.is_initialized = False
+                    return False
+        return True
+
+    @classmethod
+    def _backend_fingerprint(cls) -> str:
+        """Hash over everything that changes when TTS backends are (un)installed"""
+        # find_spec locates pyttsx3 without importing it
+        spec = importlib.util.find_spec("pyttsx3")
+        parts = [spec.origin if spec else None]
+        try:
+            parts.append(os.stat(spec.origin).st_mtime_ns)
+        except (OSError, AttributeError, TypeError):
+            pass
+
+        for binary in cls.BACKEND_BINARIES:
+            path = shutil.which(binary)
+            parts.append(path)
+            if path:
+                parts.append(os.stat(path).st_mtime_ns)
+
+        for directory in cls.BACKEND_DATA_DIRS:
+            try:
+                parts.append(os.stat(directory).st_mtime_ns)
+            except OSError:
+                parts.append(None)
+
+        return hashlib.sha256(json.dumps(parts).encode("utf-8")).hexdigest()
+
+    def _load_voice_cache(self) -> bool:
+        try:
+            with open(self.voice_cache_path, "r", encoding="utf-8") as file:
+                data = json.load(file)
+            if data.get("fingerprint") != self._backend_fingerprint() or not data.get("voices"):
+                return False
+            voices = [VoiceInfo(**voice) for voice in data["voices"]]
+        except (OSError, ValueError, TypeError, KeyError):
+            return False
+
+        self.available_voices = voices
+        self.catalog = VoiceCatalog(voices)
+        selected_voice = next((voice for voice in voices if voice.id == data.get("selected")), voices[0])
+        self.current_voice_id = selected_voice.id
+        self.settings["voice"] = selected_voice.name
+        self.is_initialized = True
+        return True
+
+    def _store_voice_cache(self) -> None:
+        if not self.available_voices:
+            return
+
+        data = {
+            "fingerprint": self._backend_fingerprint(),
+            "selected": self.current_voice_id,
+            "voices": [voice.to_dict() for voice in self.available_voices],
+        }
+        temp_path = f"{self.voice_cache_path}.{os.getpid()}.tmp"
+        try:
+            os.makedirs(os.path.dirname(self.voice_cache_path), exist_ok=True)
+            with open(temp_path, "w", encoding="utf-8") as file:
+                json.dump(data, file, ensure_ascii=False)
+            os.replace(temp_path, self.voice_cache_path)
+        except OSError:
+            pass
+
+    def speak_text(self, text: str) -> bool:
+        """Main TTS function using pyttsx3"""
+        if not self.is_initialized:
+            metrics.incr("errors", op="speak")
+            print("TTS Engine nicht verfügbar!")
+
+            return False
+
+        text = self.normalize(text)
+        if not text:
+            return False
+
+        with self._speech_lock, metrics.timer("speak"):
+            self._cancelled.clear()
+            start = time.perf_counter()
+            self.last_time_to_first_audio = None
+
+            try:
+                # Pre-rendered phrases from the soundbank need no synthesis at all
+                if self.soundbank is not None and self._play_from_soundbank(text, start):
+                    return True
+
+                chunks = split_sentences(text) if self.streaming else []
+                if len(chunks) > 1:
+                    return self._speak_streaming(chunks, start)
+
+                # Cached audio is played directly without touching the synthesizer
+                path = self._cached_render(text)
+                if path:
+                    self.last_time_to_first_audio = time.perf_counter() - start
+                    if self._play(path):
+                        return True
+
+                return self._say([text], start)
+
+            except Exception as e:
+                metrics.incr("errors", op="speak")
+                print(f"TTS Fehler: {e}")
+                return False
+            finally:
+                if self.last_time_to_first_audio is not None:
+                    metrics.observe("time_to_first_audio", self.last_time_to_first_audio)
+
+    def _play_from_soundbank(self, text: str, start: float) -> bool:
+        entry = self.soundbank.lookup(AudioCache.make_key(text, *self.profile()))
+        if entry is None:
+            metrics.incr("soundbank_misses")
+            return False
+
+        metrics.incr("soundbank_hits")
+        pcm, sample_rate, channels = entry
+        try:
+            self.last_time_to_first_audio = time.perf_counter() - start
+            return self._play_pcm(pcm, sample_rate, channels)
+        finally:
+            pcm.release()
+
+    def play_audio(self, audio: bytes) -> bool:
+        """Play already rendered WAV data, e.g. from the prefetcher"""
+        with self._speech_lock:
+            self._cancelled.clear()
+            self.last_time_to_first_audio = 0.0
+            if self.postprocessor is not None:
+                return self._play_wav(io.BytesIO(audio))
+            with metrics.timer("playback"):
+                return self.player.play_bytes(audio)
+
+    def _speak_streaming(self, chunks: List[str], start: float) -> bool:
+        """Render chunk N+1 while chunk N is playing"""
+        if self.audio_cache is None:
+            # Without our own player the engine queues the sentences itself
+            return self._say(chunks, start)
+
+        end = object()
+        rendered: "queue.Queue" = queue.Queue(maxsize=1)
+
+        def produce() -> None:
+            try:
+                for chunk in chunks:
+                    if self._cancelled.is_set():
+                        break
+                    rendered.put((chunk, self._cached_render(chunk)))
+            except Exception as e:
+                metrics.incr("errors", op="render")
+                print(f"TTS Fehler: {e}")
+            finally:
+                rendered.put(end)
+
+        producer = threading.Thread(target=produce, name="speech-render", daemon=True)
+        producer.start()
+
+        success = True
+        while True:
+            item = rendered.get()
+            if item is end:
+                break
+            if self._cancelled.is_set():
+                # Keep draining so the producer can finish
+                continue
+
+            chunk, path = item
+            if self.last_time_to_first_audio is None:
+                self.last_time_to_first_audio = time.perf_counter() - start
+            # A ring buffer player queues the sentence and plays it seamlessly after the previous one
+            if not (path and self._play(path, wait=False)):
+                success = self._say([chunk], start) and success
+
+        producer.join()
+        if isinstance(self.player, RingBufferPlayer):
+            self.player.drain()
+        return success
+
+    def _say(self, texts: List[str], start: float) -> bool:
+        """Speak through the engine's own playback"""
+        if not self._ensure_engine():
+            return False
+
+        def on_start(name=None):
+            if self.last_time_to_first_audio is None:
+                self.last_time_to_first_audio = time.perf_counter() - start
+
+        # Synthesis and playback cannot be told apart inside runAndWait()
+        with self._lock, metrics.timer("engine_say"):
+            # Ensure engine is properly configured
+            self._apply_engine_properties()
+
+            # Speak the text
+            token = self.tts_engine.connect('started-utterance', on_start)
+            try:
+                for text in texts:
+                    self.tts_engine.say(text)
+                self.tts_engine.runAndWait()
+            finally:
+                self.tts_engine.disconnect(token)
+
+        return True
+
+    def _play(self, path: str, wait: bool = True) -> bool:
+        if self.postprocessor is not None:
+            try:
+                with open(path, "rb") as file:
+                    return self._play_wav(file, wait)
+            except OSError:
+                return False
+        if not wait and isinstance(self.player, RingBufferPlayer):
+            return self.player.play_file(path, wait=False)
+        with metrics.timer("playback"):
+            return self.player.play_file(path)
+
+    def _play_wav(self, file, wait: bool = True) -> bool:
+        try:
+            with wave.open(file, "rb") as wav_file:
+                if wav_file.getsampwidth() != 2:
+                    return False
+                pcm = wav_file.readframes(wav_file.getnframes())
+                return self._play_pcm(pcm, wav_file.getframerate(), wav_file.getnchannels(), wait)
+        except (wave.Error, EOFError):
+            return False
+
+    def _play_pcm(self, pcm, sample_rate: int, channels: int = 1, wait: bool = True) -> bool:
+        if self.postprocessor is not None:
+            with metrics.timer("postprocess"):
+                pcm, sample_rate = self.postprocessor.process(
+                    pcm, sample_rate, gain=self.settings["volume"], channels=channels
+                )
+        if not wait and isinstance(self.player, RingBufferPlayer):
+            return self.player.play_pcm(pcm, sample_rate, channels, wait=False)
+        with metrics.timer("playback"):
+            return self.player.play_pcm(pcm, sample_rate, channels)
+
+    def use_postprocessing(self, processor: Optional[AudioProcessor]) -> bool:
+        """Trim and normalize at playback and apply the volume there instead of at synthesis
+
+        Audio is then synthesized and cached at full volume, so changing the
+        volume no longer invalidates the audio cache or the soundbank. Needs
+        our own player; None switches post-processing off.
+        """
+        if processor is not None and not self.player.available:
+            print("Nachbearbeitung braucht einen Audio-Player (pw-play, paplay oder aplay)")
+            return False
+        self.postprocessor = processor
+        return True
+
+    def use_output(self, sink: AudioSink, latency: float = 0.1) -> None:
+        """Play through a RingBufferPlayer on sink instead of one player process per utterance"""
+        self.player = RingBufferPlayer(sink, latency)
+        atexit.register(self.player.close)
+        if self.audio_cache is None:
+            try:
+                self.audio_cache = AudioCache()
+            except OSError:
+                self.audio_cache = None
+
+    def _cached_render(self, text: str) -> Optional[str]:
+        """Returns the cached WAV for text, rendering it on a miss"""
+        if self.audio_cache is None:
+            return None
+
+        key = AudioCache.make_key(text, *self.profile())
+        path = self.audio_cache.lookup(key)
+        if path is None:
+            path = self._render_to_cache(key, text)
+        return path
+
+    def language(self) -> str:
+        """Normalization language of the current voice (German by default)"""
+        index = self.catalog.index_of(self.current_voice_id)
+        for language in (self.catalog.languages_of(index) if index is not None else []):
+            if language in NORMALIZATION_RULES:
+                return language
+        return "de"
+
+    def normalize(self, text: str) -> str:
+        return normalize_text(text, self.language(), self.ssml)
+
+    def use_backend(self, backend: str) -> bool:
+        """Switch between "pyttsx3" and "espeak-ng" (libespeak-ng through ctypes)"""
+        if backend not in self.BACKENDS:
+            raise ValueError(f"Unbekanntes Backend: {backend}")
+
+        if backend == "espeak-ng":
+            try:
+                self.native = EspeakNG.shared()
+            except OSError as e:
+                print(f"libespeak-ng nicht verfügbar, verwende pyttsx3: {e}")
+                return False
+            if self.native.has_phonemes and self.phoneme_cache is None:
+                self.phoneme_cache = PhonemeCache()
+        else:
+            self.native = None
+        self.backend = backend
+        return True
+
+    def phoneme_language(self) -> str:
+        """Phonemes are shared by all voices of this language"""
+        index = self.catalog.index_of(self.current_voice_id)
+        languages = self.catalog.languages_of(index) if index is not None else []
+        return languages[0] if languages else str(self.current_voice_id)
+
+    def render_pcm(self, text: str, into: Optional[PcmBuffer] = None) -> Optional[Tuple[memoryview, int]]:
+        """Synthesize text to raw 16 bit mono PCM, returns (samples, sample rate)
+
+        Only available with the espeak-ng backend. The view points into the
+        synthesizer's buffer, or into `into`, and is not copied.
+        """
+        if self.native is None:
+            return None
+        return self._render_pcm(self.normalize(text), into)
+
+    def _render_pcm(self, text: str, into: Optional[PcmBuffer] = None) -> Tuple[memoryview, int]:
+        voice_id, rate, volume = self.profile()
+        if self.phoneme_cache is not None and not self.ssml:
+            language = self.phoneme_language()
+            phonemes = self.phoneme_cache.lookup(text, language)
+            if phonemes is not None:
+                with metrics.timer("synth", backend="espeak-ng", source="phonemes"):
+                    pcm = self.native.synthesize_phonemes(phonemes, voice_id, rate, volume, into=into)
+                return pcm, self.native.sample_rate
+
+            # A miss is synthesized from the text itself, the cache only serves later renders
+            with metrics.timer("synth", backend="espeak-ng"):
+                pcm = self.native.synthesize(text, voice_id, rate, volume, into=into)
+            start = time.perf_counter()
+            phonemes = self.native.text_to_phonemes(text, voice_id)
+            self.phoneme_cache.store(text, language, phonemes, time.perf_counter() - start)
+            return pcm, self.native.sample_rate
+
+        with metrics.timer("synth", backend="espeak-ng"):
+            pcm = self.native.synthesize(text, voice_id, rate, volume,
+                                         flags=EspeakNG.SSML if self.ssml else 0, into=into)
+        return pcm, self.native.sample_rate
+
+    def render_to_file(self, text: str, path: str) -> bool:
+        """Synthesize text into a WAV file instead of speaking it"""
+        if not self._render_file(self.normalize(text), path):
+            return False
+        if self.postprocessor is not None:
+            # Exported files carry the volume that playback would apply
+            self.postprocessor.process_files([path], gain=self.settings["volume"])
+        return True
+
+    def _render_file(self, text: str, path: str) -> bool:
+        if not self.is_initialized:
+            return False
+
+        if self.native is not None:
+            with self._lock:
+                pcm, sample_rate = self._render_pcm(text)
+                with open(path, "wb") as file:
+                    pcm_to_wav(pcm, sample_rate, target=file)
+            return True
+
+        if not self._ensure_engine():
+            return False
+
+        with self._lock, metrics.timer("synth"):
+            self._apply_engine_properties()
+            self.tts_engine.save_to_file(text, path)
+            self.tts_engine.runAndWait()
+
+        return os.path.exists(path) and os.path.getsize(path) > 0
+
+    def render_to_bytes(self, text: str, use_cache: bool = True) -> Optional[bytes]:
+        """Synthesize text and return the contents of the WAV file"""
+        text = self.normalize(text)
+        path = self._cached_render(text) if use_cache else None
+        if path:
+            try:
+                with open(path, "rb") as file:
+                    return file.read()
+            except OSError:
+                # Evicted in the meantime, render again below
+                pass
+
+        if self.native is not None:
+            # Straight from the sample buffer, no temp file needed
+            with self._lock:
+                pcm, sample_rate = self._render_pcm(text)
+                return pcm_to_wav(pcm, sample_rate)
+
+        fd, temp_path = tempfile.mkstemp(prefix="trashtalk-", suffix=".wav")
+        os.close(fd)
+        try:
+            if self._render_file(text, temp_path):
+                with open(temp_path, "rb") as file:
+                    return file.read()
+        finally:
+            os.remove(temp_path)
+        return None
+
+    def _render_to_cache(self, key: str, text: str) -> Optional[str]:
+        temp_path = self.audio_cache.temp_path_for(key)
+        try:
+            if self._render_file(text, temp_path):
+                return self.audio_cache.store(key, temp_path)
+        finally:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+        return None
+
+    def profile(self) -> Tuple[Optional[str], int, float]:
+        """The (voice, rate, volume) combination the next utterance is synthesized with"""
+        volume = 1.0 if self.postprocessor is not None else self.settings["volume"]
+        return self.current_voice_id, self.settings["rate"], volume
+
+    def _apply_engine_properties(self) -> None:
+        # Only push what changed since the last utterance
+        voice_id, rate, volume = profile = self.profile()
+        applied_voice, applied_rate, applied_volume = self._applied_profile or (None, None, None)
+
+        if rate != applied_rate:
+            self.tts_engine.setProperty('rate', rate)
+        if volume != applied_volume:
+            self.tts_engine.setProperty('volume', volume)
+        if voice_id and voice_id != applied_voice:
+            self.tts_engine.setProperty('voice', voice_id)
+        self._applied_profile = profile
+
+    def list_voices(self, indices: Optional[List[int]] = None):
+        """Lists all available voices, or only those with the given indices"""
+        if not self.available_voices:
+            print("Keine Stimmen verfügbar")
+            return
+
+        print("Verfügbare Stimmen:")
+        print("=" * 50)
+
+        if indices is None:
+            indices = range(len(self.available_voices))
+
+        for i in indices:
+            voice = self.available_voices[i]
+            is_current = "Aktiv" if voice.id == self.current_voice_id else " "
+            voice_type = self.catalog.label_of(i)
+            # Extract language info if available
+            lang_info = ""
+
+            if hasattr(voice, 'languages') and voice.languages:
+                lang_info = f" [{', '.join(voice.languages)}]"
+
+            print(f"  {is_current} {i}: {voice.name}{voice_type}{lang_info}")
+            print(f"      ID: {voice.id}")
+
+            # Show additional info if available
+            if hasattr(voice, 'age'):
+                print(f"      Age: {voice.age}")
+
+            if hasattr(voice, 'gender'):
+                print(f"      Gender: {voice.gender}")
+            print()
+
+    def change_voice(self, voice_index: int) -> bool:
+        """Change to a specific voice by index"""
+        with metrics.timer("change_voice"):
+            return self._change_voice(voice_index)
+
+    def _change_voice(self, voice_index: int) -> bool:
+        if not self.available_voices or voice_index < 0 or voice_index >= len(self.available_voices):
+            return False
+
+        try:
+            selected_voice = self.available_voices[voice_index]
+            # Applied to the engine before the next utterance, so we never
+            # touch it while the speech worker is talking
+            self.current_voice_id = selected_voice.id
+            self.settings["voice"] = selected_voice.name
+
+            print(f"Stimme geändert zu: {selected_voice.name}")
+            return True
+
+        except Exception as e:
+            metrics.incr("errors", op="change_voice")
+            print(f"Fehler beim Ändern der Stimme: {e}")
+            return False
+
+    def change_settings(self, rate=None, volume=None):
+        """Change TTS settings"""
+        if not self.is_initialized:
+            return False
+
+        try:
+            if rate is not None:
+                # Validate rate (typically 50-400 WPM)
+                rate = max(50, min(400, rate))
+                self.settings["rate"] = rate
+                print(f"Geschwindigkeit auf {rate} WPM gesetzt")
+
+            if volume is not None:
+                # Validate volume (0.0 to 1.0)
+                volume = max(0.0, min(1.0, volume))
+                self.settings["volume"] = volume
+                print(f"Lautstärke auf {int(volume * 100)}% gesetzt")
+            return True
+
+        except Exception as e:
+            metrics.incr("errors", op="change_settings")
+            print(f"Fehler beim Ändern der Einstellungen: {e}")
+            return False
+
+    def test_voice(self, text="Test deutschen Stimme mit festival-de."):
+        """Test the current voice with sample text"""
+        return self.speak_text(text)
+
+    def get_status(self) -> str:
+        """Returns current TTS status"""
+        if not self.is_initialized:
+            return "TTS Engine nicht initialisiert"
+
+        status = f"pyttsx3 TTS Engine aktiv\n"
+        status += f"Aktuelle Stimme: {self.settings['voice']}\n"
+        status += f"Geschwindigkeit: {self.settings['rate']} WPM\n"
+        status += f"Lautstärke: {int(self.settings['volume'] * 100)}%\n"
+        status += f"Verfügbare Stimmen: {len(self.available_voices)}"
+
+        if self.audio_cache is not None:
+            cache = self.audio_cache
+            status += (f"\nAudio-Cache: {len(cache)} Einträge, "
+                       f"{cache.total_bytes / (1024 * 1024):.1f} MB, "
+                       f"{cache.hits} Treffer / {cache.misses} Fehlschläge")
+
+        if self.last_time_to_first_audio is not None:
+            status += f"\nZeit bis Audio (zuletzt): {self.last_time_to_first_audio * 1000:.0f} ms"
+
+        if self.phoneme_cache is not None:
+            phonemes = self.phoneme_cache
+            status += (f"\nPhonem-Cache: {len(phonemes)} Einträge, {phonemes.hit_rate * 100:.0f}% Treffer, "
+                       f"{phonemes.saved_seconds * 1000:.0f} ms Analyse gespart")
+
+        if isinstance(self.player, RingBufferPlayer):
+            status += (f"\nAudio-Ausgabe: {type(self.player.sink).__name__}, "
+                       f"Puffer {self.player.latency * 1000:.0f} ms, {self.player.underruns} Aussetzer")
+
+        return status
+
+    def stop(self) -> None:
+        """Interrupt the utterance that is currently playing"""
+        self._cancelled.set()
+        self.player.stop()
+        if self.tts_engine:
+            try:
+                self.tts_engine.stop()
+            except Exception:
+                pass
+
+    def reinitialize(self):
+        """Reinitialize the TTS engine"""
+        self.stop()
+        with self._lock:
+            self.initialize_engine()
+
+    @staticmethod
+    def _select_best_voice(voices):
+        return VoiceCatalog(voices).best()
+
+    @staticmethod
+    def _get_voice_type(voice_id):
+        if "festival" in voice_id and "de" in voice_id:
+            return " [festival-de - DEUTSCH]"
+        elif "festival" in voice_id:
+            return " [festival]"
+        elif "espeak" in voice_id:
+            return " [espeak]"
+        return ""
+
+
+
+# -----------------------------------------------------------------------------
+# SPEECH WORKER
+# -----------------------------------------------------------------------------
+class SpeechWorker:
+    """Long-lived background thread that speaks queued texts one after another"""
+
+    POLICIES = ("drop-oldest", "reject", "block")
+
+    def __init__(self, tts: ArchTTS, maxsize: int = 8, policy: str = "drop-oldest") -> None:
+        if policy not in self.POLICIES:
+            raise ValueError(f"Unbekannte Queue-Strategie: {policy}")
+
+        self.tts = tts
+        self.policy = policy
+        self.dropped = 0
+        self.rejected = 0
+        # Items are (text, pre-rendered audio, enqueue time) tuples, None stops the worker
+        self._queue: "queue.Queue[Optional[Tuple[str, Optional[bytes], float]]]" = queue.Queue(maxsize=maxsize)
+        self._current: Optional[str] = None
+        self._thread = threading.Thread(target=self._run, name="speech-worker", daemon=True)
+        self._thread.start()
+
+    @property
+    def pending(self) -> int:
+        return self._queue.qsize()
+
+    @property
+    def busy(self) -> bool:
+        return self._current is not None or not self._queue.empty()
+
+    def enqueue(self, text: str, timeout: Optional[float] = None, audio: Optional[bytes] = None) -> bool:
+        """Queue text (or its pre-rendered audio) for speaking; returns False if it was rejected"""
+        item = (text, audio, time.perf_counter())
+        try:
+            self._queue.put_nowait(item)
+            return True
+        except queue.Full:
+            pass
+
+        if self.policy == "reject":
+            self.rejected += 1
+            metrics.incr("speech_queue_rejected")
+            return False
+
+        if self.policy == "block":
+            try:
+                self._queue.put(item, timeout=timeout)
+                return True
+            except queue.Full:
+                self.rejected += 1
+                metrics.incr("speech_queue_rejected")
+                return False
+
+        # drop-oldest: make room by discarding the longest waiting text
+        while True:
+            try:
+                self._queue.get_nowait()
+                self._queue.task_done()
+                self.dropped += 1
+                metrics.incr("speech_queue_dropped")
+            except queue.Empty:
+                pass
+            try:
+                self._queue.put_nowait(item)
+                return True
+            except queue.Full:
+                continue
+
+    def flush(self) -> int:
+        """Discard all queued texts that have not started yet"""
+        flushed = 0
+        while True:
+            try:
+                self._queue.get_nowait()
+            except queue.Empty:
+                return flushed
+            self._queue.task_done()
+            flushed += 1
+
+    def cancel_current(self) -> None:
+        """Stop the utterance that is currently being spoken"""
+        if self._current is not None:
+            self.tts.stop()
+
+    def wait(self) -> None:
+        """Block until every queued text has been spoken"""
+        self._queue.join()
+
+    def shutdown(self, timeout: float = 2.0) -> None:
+        self.flush()
+        self.cancel_current()
+        try:
+            self._queue.put(None, timeout=timeout)
+        except queue.Full:
+            return
+        self._thread.join(timeout)
+
+    def _run(self) -> None:
+        while True:
+            item = self._queue.get()
+            try:
+                if item is None:
+                    return
+                text, audio, enqueued = item
+                metrics.observe("speech_queue_wait", time.perf_counter() - enqueued)
+                self._current = text
+                if not (audio and self.tts.play_audio(audio)):
+                    self.tts.speak_text(text)
+            except Exception as e:
+                metrics.incr("errors", op="speech_worker")
+                print(f"TTS Fehler: {e}")
+            finally:
+                self._current = None
+                self._queue.task_done()
+
+
+# -----------------------------------------------------------------------------
+# LINE STORE
+# -----------------------------------------------------------------------------
+class LineStore:
+    """Random access to the non-empty lines of a text file via an offset index
+
+    The index lives in a hidden sidecar next to the text file
+    (".<name>.idx") and holds the byte offset of every non-empty line.
+    It is only rebuilt when the file's size or mtime no longer match.
+    """
+
+    INDEX_MAGIC = b"TTLIDX01"
+    # magic, mtime_ns, size, line count
+    INDEX_HEADER = struct.Struct("<8sQQQ")
+    OFFSET = struct.Struct("<Q")
+
+    def __init__(self, path: str) -> None:
+        self.path = path
+        directory, name = os.path.split(path)
+        self.index_path = os.path.join(directory, f".{name}.idx")
+        self.count = 0
+        self._stat_key = None
+        self._data: Optional[mmap.mmap] = None
+        self._index = None  # mmap of the sidecar or in-memory array fallback
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        self.refresh()
+        return self.count
+
+    @property
+    def version(self) -> Optional[tuple]:
+        """(mtime_ns, size) of the file the current index belongs to"""
+        return self._stat_key
+
+    def refresh(self) -> None:
+        """Reload or rebuild the index if the text file changed on disk"""
+        stat = os.stat(self.path)
+        stat_key = (stat.st_mtime_ns, stat.st_size)
+
+        with self._lock:
+            if stat_key == self._stat_key:
+                return
+
+            if not self._load_index(stat_key):
+                self._build_index(stat_key)
+            self._map_data(stat.st_size)
+            self._stat_key = stat_key
+
+    def line(self, number: int) -> str:
+        """Returns the non-empty line with the given number"""
+        # refresh() may swap the mappings from another thread
+        with self._lock:
+            return self._read_line(number)
+
+    def line_if_current(self, number: int, version: Optional[tuple]) -> Optional[str]:
+        """Like line(), but None if the file changed since version"""
+        with self._lock:
+            if version != self._stat_key:
+                return None
+            return self._read_line(number)
+
+    def _read_line(self, number: int) -> str:
+        if number < 0 or number >= self.count:
+            raise IndexError(number)
+
+        offset = self.OFFSET.unpack_from(self._index, self._index_base() + number * self.OFFSET.size)[0]
+        end = self._data.find(b"\n", offset)
+        if end == -1:
+            end = len(self._data)
+        return self._data[offset:end].decode("utf-8", errors="replace").strip()
+
+    def random_line(self) -> Optional[str]:
+        self.refresh()
+        if not self.count:
+            return None
+        return self.line(randint(0, self.count - 1))
+
+    def append(self, text: str) -> None:
+        """Append a line to the file and the index without re-indexing"""
+        text = text.strip()
+        if not text or "\n" in text:
+            raise ValueError("Es kann nur genau eine nicht-leere Zeile angehängt werden")
+
+        self.refresh()
+        with self._lock:
+            with open(self.path, "ab") as file:
+                offset = file.tell()
+                if offset and self._data is not None and self._data[offset - 1:offset] != b"\n":
+                    file.write(b"\n")
+                    offset += 1
+                file.write(text.encode("utf-8") + b"\n")
+
+            stat = os.stat(self.path)
+            stat_key = (stat.st_mtime_ns, stat.st_size)
+
+            if isinstance(self._index, array):
+                self._index.append(offset)
+                self.count += 1
+            else:
+                self._close_index()
+                try:
+                    with open(self.index_path, "r+b") as index_file:
+                        index_file.write(self.INDEX_HEADER.pack(self.INDEX_MAGIC, *stat_key, self.count + 1))
+                        index_file.seek(0, os.SEEK_END)
+                        index_file.write(self.OFFSET.pack(offset))
+                except OSError:
+                    pass
+                if not self._load_index(stat_key):
+                    self._build_index(stat_key)
+
+            self._map_data(stat.st_size)
+            self._stat_key = stat_key
+
+    def close(self) -> None:
+        with self._lock:
+            self._close_index()
+            if self._data is not None:
+                self._data.close()
+                self._data = None
+            self._stat_key = None
+
+    def _index_base(self) -> int:
+        return 0 if isinstance(self._index, array) else self.INDEX_HEADER.size
+
+    def _close_index(self) -> None:
+        if isinstance(self._index, mmap.mmap):
+            self._index.close()
+        self._index = None
+
+    def _map_data(self, size: int) -> None:
+        if self._data is not None:
+            self._data.close()
+            self._data = None
+        if size:
+            with open(self.path, "rb") as file:
+                self._data = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+
+    def _load_index(self, stat_key) -> bool:
+        """Map the sidecar index if it matches the current file"""
+        self._close_index()
+        try:
+            with open(self.index_path, "rb") as index_file:
+                header = index_file.read(self.INDEX_HEADER.size)
+                if len(header) != self.INDEX_HEADER.size:
+                    return False
+                magic, mtime_ns, size, count = self.INDEX_HEADER.unpack(header)
+                if magic != self.INDEX_MAGIC or (mtime_ns, size) != stat_key:
+                    return False
+                if os.fstat(index_file.fileno()).st_size != self.INDEX_HEADER.size + count * self.OFFSET.size:
+                    return False
+                self._index = mmap.mmap(index_file.fileno(), 0, access=mmap.ACCESS_READ)
+        except OSError:
+            return False
+
+        self.count = count
+        return True
+
+    def _build_index(self, stat_key) -> None:
+        """Scan the file once and record the offset of every non-empty line"""
+        offsets = array("Q")
+        position = 0
+        with open(self.path, "rb") as file:
+            for raw_line in file:
+                if raw_line.strip():
+                    offsets.append(position)
+                position += len(raw_line)
+
+        self.count = len(offsets)
+        temp_path = f"{self.index_path}.{os.getpid()}.tmp"
+        try:
+            with open(temp_path, "wb") as index_file:
+                index_file.write(self.INDEX_HEADER.pack(self.INDEX_MAGIC, *stat_key, len(offsets)))
+                offsets.tofile(index_file)
+            os.replace(temp_path, self.index_path)
+        except OSError:
+            # Read-only directory: keep the index in memory only
+            self._index = offsets
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+            return
+
+        if not self._load_index(stat_key):
+            self._index = offsets
+
+
+# -----------------------------------------------------------------------------
+# PHRASE SAMPLER
+# -----------------------------------------------------------------------------
+def parse_phrase(raw: str) -> Tuple[str, float, List[str]]:
+    """Split a phrase line into text, weight and tags
+
+    Lines may carry optional tab-separated columns:
+    "text<TAB>weight<TAB>tag1,tag2". Missing or invalid weights count as 1.
+    """
+    if "\t" not in raw:
+        return raw, 1.0, []
+
+    columns = raw.split("\t")
+    text = columns[0].strip()
+    weight = 1.0
+    if len(columns) > 1 and columns[1].strip():
+        try:
+            weight = max(0.0, float(columns[1]))
+        except ValueError:
+            pass
+    tags = []
+    if len(columns) > 2:
+        tags = [tag.strip().lower() for tag in columns[2].split(",") if tag.strip()]
+    return text, weight, tags
+
+
+def _build_alias_table(weights: array) -> Tuple[array, array]:
+    """Vose's alias method: O(n) build, O(1) weighted pick"""
+    count = len(weights)
+    total = sum(weights)
+    if total <= 0:
+        weights = array("d", [1.0]) * count
+        total = float(count)
+
+    scaled = array("d", (weight * count / total for weight in weights))
+    small = array("Q", (i for i in range(count) if scaled[i] < 1.0))
+    large = array("Q", (i for i in range(count) if scaled[i] >= 1.0))
+    probability = array("d", [1.0]) * count
+    alias = array("Q", range(count))
+
+    while small and large:
+        less = small.pop()
+        more = large.pop()
+        probability[less] = scaled[less]
+        alias[less] = more
+        scaled[more] = scaled[more] + scaled[less] - 1.0
+        if scaled[more] < 1.0:
+            small.append(more)
+        else:
+            large.append(more)
+
+    return probability, alias
+
+
+class _AliasTable:
+    """Alias table stored in a buffer (mmap or bytes) at fixed offsets"""
+
+    __slots__ = ("buffer", "count", "probability_offset", "alias_offset", "members_offset")
+
+    PROBABILITY = struct.Struct("=d")
+    INDEX = struct.Struct("=Q")
+
+    def __init__(self, buffer, count: int, probability_offset: int, alias_offset: int,
+                 members_offset: Optional[int] = None) -> None:
+        self.buffer = buffer
+        self.count = count
+        self.probability_offset = probability_offset
+        self.alias_offset = alias_offset
+        self.members_offset = members_offset
+
+    def pick(self) -> int:
+        slot = randrange(self.count)
+        if random() >= self.PROBABILITY.unpack_from(self.buffer, self.probability_offset + slot * 8)[0]:
+            slot = self.INDEX.unpack_from(self.buffer, self.alias_offset + slot * 8)[0]
+        return self.member(slot)
+
+    def member(self, slot: int) -> int:
+        """Line number for a slot of this table"""
+        if self.members_offset is None:
+            return slot
+        return self.INDEX.unpack_from(self.buffer, self.members_offset + slot * 8)[0]
+
+    def cumulative_weights(self) -> array:
+        """Running sum of the relative slot weights, recovered in O(n)"""
+        # Slot i keeps its own probability plus whatever the slots aliased
+        # to it give away; weight-0 slots are never an alias target
+        weights = array("d", [0.0]) * self.count
+        for slot in range(self.count):
+            probability = self.PROBABILITY.unpack_from(self.buffer, self.probability_offset + slot * 8)[0]
+            weights[slot] += probability
+            if probability < 1.0:
+                alias = self.INDEX.unpack_from(self.buffer, self.alias_offset + slot * 8)[0]
+                weights[alias] += 1.0 - probability
+        total = 0.0
+        for slot in range(self.count):
+            total += weights[slot]
+            weights[slot] = total
+        return weights
+
+    def slot_of(self, number: int) -> Optional[int]:
+        """Slot of a line number, None if the line is not in this table"""
+        if self.members_offset is None:
+            return number if 0 <= number < self.count else None
+        # Members are stored in line order
+        low, high = 0, self.count
+        while low < high:
+            middle = (low + high) // 2
+            if self.member(middle) < number:
+                low = middle + 1
+            else:
+                high = middle
+        return low if low < self.count and self.member(low) == number else None
+
+
+class PhraseSampler:
+    """Weighted random phrase picks with optional no-repeat modes and tags
+
+    weighted  plain weighted pick via alias table
+    window    weighted, but none of the last `window` lines is repeated
+    shuffle   every line once before any line comes again (weights ignored)
+
+    The alias tables for all lines and for every tag are built once per
+    corpus version and stored in a sidecar next to the text file
+    (".<name>.sampler"), so a pick is O(1) regardless of corpus size.
+    """
+
+    MODES = ("weighted", "window", "shuffle")
+    MAGIC = b"TTSAMP01"
+    # magic, mtime_ns, size, line count, tag directory offset, tag directory length
+    HEADER = struct.Struct("<8sQQQQQ")
+
+    def __init__(self, store: LineStore, mode: str = "window", window: int = 8) -> None:
+        if mode not in self.MODES:
+            raise ValueError(f"Unbekannter Modus: {mode}")
+
+        self.store = store
+        self.mode = mode
+        self.window = window
+        directory, name = os.path.split(store.path)
+        self.path = os.path.join(directory, f".{name}.sampler")
+
+        self._version: Optional[tuple] = None
+        self._buffer = None
+        self._table: Optional[_AliasTable] = None
+        self._tag_tables: Dict[str, _AliasTable] = {}
+        self._recent: deque = deque()
+        self._recent_set: set = set()
+        self._bags: Dict[Optional[str], List] = {}  # tag -> [permutation, remaining]
+        self._cumulative: Dict[Optional[str], array] = {}  # tag -> running weight sums
+        self._lock = threading.Lock()
+
+    def tags(self) -> List[str]:
+        self.refresh()
+        return sorted(self._tag_tables)
+
+    def pick(self, tag: Optional[str] = None) -> Optional[str]:
+        """Returns the text of a random phrase, optionally only with tag"""
+        # Pick again if the corpus changed between choosing and reading the line
+        while True:
+            number, version = self._pick(tag)
+            if number is None:
+                return None
+            raw = self.store.line_if_current(number, version)
+            if raw is not None:
+                return parse_phrase(raw)[0]
+
+    def pick_index(self, tag: Optional[str] = None) -> Optional[int]:
+        return self._pick(tag)[0]
+
+    def _pick(self, tag: Optional[str]) -> Tuple[Optional[int], Optional[tuple]]:
+        """A line number and the corpus version it belongs to"""
+        self.refresh()
+        with self._lock:
+            version = self._version
+            table = self._table if tag is None else self._tag_tables.get(tag.lower())
+            if table is None or not table.count:
+                return None, version
+
+            if self.mode == "shuffle":
+                return self._pick_from_bag(tag, table), version
+
+            number = table.pick()
+            if self.mode == "window":
+                # Rejection sampling, then a weighted pick among the allowed
+                # lines when the recent ones carry most of the weight
+                limit = min(self.window, table.count - 1)
+                attempts = 0
+                while number in self._recent_set and attempts < 32:
+                    number = table.pick()
+                    attempts += 1
+                if number in self._recent_set and limit > 0:
+                    cumulative = self._cumulative.get(tag)
+                    if cumulative is None:
+                        cumulative = self._cumulative[tag] = table.cumulative_weights()
+                    number = self._pick_excluding(table, cumulative, list(self._recent)[-limit:])
+                self._remember(number, limit)
+            return number, version
+
+    def refresh(self) -> None:
+        """Load or rebuild the tables if the corpus changed"""
+        self.store.refresh()
+        with self._lock:
+            if self.store.version == self._version:
+                return
+            if not self._load(self.store.version):
+                self._build(self.store.version)
+            self._version = self.store.version
+            self._recent.clear()
+            self._recent_set.clear()
+            self._bags.clear()
+            self._cumulative.clear()
+
+    def _remember(self, number: int, limit: int) -> None:
+        if limit <= 0:
+            return
+        self._recent.append(number)
+        self._recent_set.add(number)
+        while len(self._recent) > limit:
+            self._recent_set.discard(self._recent.popleft())
+
+    @staticmethod
+    def _pick_excluding(table: _AliasTable, cumulative: array, excluded: List[int]) -> int:
+        """Weighted pick among the lines of table that are not in excluded
+
+        Falls back to the heaviest excluded line if no other line has weight.
+        """
+        def weight(slot: int) -> float:
+            return cumulative[slot] - (cumulative[slot - 1] if slot else 0.0)
+
+        slots = sorted({slot for slot in map(table.slot_of, excluded) if slot is not None})
+        allowed = cumulative[-1] - sum(map(weight, slots))
+        if allowed <= cumulative[-1] * 1e-12:
+            return table.member(max(slots, key=weight))
+
+        # Draw in the allowed weight only, then skip over the excluded ranges
+        position = random() * allowed
+        for slot in slots:
+            start = cumulative[slot] - weight(slot)
+            if position < start:
+                break
+            position = cumulative[slot] + (position - start)
+        slot = bisect_right(cumulative, position)
+        if slot >= table.count or slot in slots or weight(slot) <= 0.0:
+            # Rounding at a range boundary: take the last allowed line instead
+            slot = next(slot for slot in reversed(range(table.count))
+                        if slot not in slots and weight(slot) > 0.0)
+        return table.member(slot)
+
+    def _pick_from_bag(self, tag: Optional[str], table: _AliasTable) -> int:
+        """Lazy Fisher-Yates shuffle, O(1) per pick after an O(n) first fill"""
+        bag = self._bags.get(tag)
+        if bag is None:
+            bag = self._bags[tag] = [array("Q", range(table.count)), table.count]
+        permutation, remaining = bag
+        if remaining == 0:
+            remaining = table.count
+
+        slot = randrange(remaining)
+        remaining -= 1
+        permutation[slot], permutation[remaining] = permutation[remaining], permutation[slot]
+        bag[1] = remaining
+        return table.member(permutation[remaining])
+
+    def _close(self) -> None:
+        if isinstance(self._buffer, mmap.mmap):
+            self._buffer.close()
+        self._buffer = None
+        self._table = None
+        self._tag_tables = {}
+
+    def _load(self, version: Optional[tuple]) -> bool:
+        self._close()
+        try:
+            with open(self.path, "rb") as file:
+                header = file.read(self.HEADER.size)
+                if len(header) != self.HEADER.size:
+                    return False
+                magic, mtime_ns, size, count, directory_offset, directory_length = self.HEADER.unpack(header)
+                if magic != self.MAGIC or (mtime_ns, size) != version or count != self.store.count:
+                    return False
+                buffer = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        except (OSError, ValueError):
+            return False
+
+        try:
+            directory = json.loads(buffer[directory_offset:directory_offset + directory_length])
+        except ValueError:
+            buffer.close()
+            return False
+
+        self._install(buffer, count, directory)
+        return True
+
+    def _install(self, buffer, count: int, directory: dict) -> None:
+        base = self.HEADER.size
+        self._buffer = buffer
+        self._table = _AliasTable(buffer, count, base, base + count * 8)
+        self._tag_tables = {
+            tag: _AliasTable(buffer, size, offset + size * 8, offset + size * 16, offset)
+            for tag, (offset, size) in directory.items()
+        }
+
+    def _build(self, version: Optional[tuple]) -> None:
+        """Parse every line once and write all alias tables to the sidecar"""
+        count = self.store.count
+        weights = array("d", [1.0]) * count
+        members: Dict[str, array] = {}
+        member_weights: Dict[str, array] = {}
+        for number in range(count):
+            _, weight, tags = parse_phrase(self.store.line(number))
+            weights[number] = weight
+            for tag in tags:
+                members.setdefault(tag, array("Q")).append(number)
+                member_weights.setdefault(tag, array("d")).append(weight)
+
+        # Layout: header, main probabilities, main aliases, then per tag
+        # members/probabilities/aliases, then the JSON tag directory
+        blocks = list(_build_alias_table(weights))
+        offset = self.HEADER.size + count * 16
+        directory = {}
+        for tag in sorted(members):
+            probability, alias = _build_alias_table(member_weights[tag])
+            directory[tag] = (offset, len(members[tag]))
+            blocks.extend((members[tag], probability, alias))
+            offset += len(members[tag]) * 24
+        directory_bytes = json.dumps(directory).encode("utf-8")
+
+        data = bytearray(self.HEADER.pack(self.MAGIC, *(version or (0, 0)), count, offset, len(directory_bytes)))
+        for block in blocks:
+            data += block.tobytes()
+        data += directory_bytes
+
+        temp_path = f"{self.path}.{os.getpid()}.tmp"
+        try:
+            with open(temp_path, "wb") as file:
+                file.write(data)
+            os.replace(temp_path, self.path)
+        except OSError:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+        if not self._load(version):
+            # Read-only directory: keep the tables in memory
+            self._install(bytes(data), count, directory)
+
+
+# -----------------------------------------------------------------------------
+# PREFETCH
+# -----------------------------------------------------------------------------
+class Prefetcher:
+    """Picks the next phrases ahead of time and renders them in the background
+
+    While the current phrase plays, up to `depth` upcoming picks are rendered
+    into memory (at most max_bytes in total). A pick whose audio is ready and
+    still matches the current voice settings is a hit and can be played
+    without any synthesis.
+    """
+
+    def __init__(self, tts: ArchTTS, sampler: PhraseSampler, depth: int = 2,
+                 max_bytes: int = 16 * 1024 * 1024) -> None:
+        self.tts = tts
+        self.sampler = sampler
+        self.depth = depth
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        # Entries are [text, corpus version, profile, audio or None]
+        self._upcoming: deque = deque()
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._closed = False
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def buffered_bytes(self) -> int:
+        return sum(len(entry[3]) for entry in list(self._upcoming) if entry[3])
+
+    def next(self) -> Tuple[Optional[str], Optional[bytes]]:
+        """Returns the next phrase and its audio, if it was rendered in time"""
+        self.sampler.refresh()
+        version = self.sampler.store.version
+
+        with self._lock:
+            entry = self._upcoming.popleft() if self._upcoming else None
+            if entry is not None and entry[1] != version:
+                # Text file changed, everything prefetched is stale
+                self._upcoming.clear()
+                entry = None
+
+        if entry is None:
+            text, audio = self.sampler.pick(), None
+        else:
+            text, audio = entry[0], entry[3] if entry[2] == self.tts.profile() else None
+
+        if text is not None:
+            if audio:
+                self.hits += 1
+                metrics.incr("prefetch_hits")
+            else:
+                self.misses += 1
+                metrics.incr("prefetch_misses")
+
+        self._start()
+        self._wake.set()
+        return text, audio
+
+    def close(self) -> None:
+        self._closed = True
+        self._wake.set()
+
+    def _start(self) -> None:
+        if self._thread is None and self.tts.player.available and self.depth > 0:
+            self._thread = threading.Thread(target=self._run, name="prefetch", daemon=True)
+            self._thread.start()
+
+    def _run(self) -> None:
+        while not self._closed:
+            self._wake.wait()
+            self._wake.clear()
+
+            while not self._closed:
+                with self._lock:
+                    if len(self._upcoming) >= self.depth or self.buffered_bytes >= self.max_bytes:
+                        break
+                try:
+                    text = self.sampler.pick()
+                except (OSError, ValueError):
+                    break
+                if text is None:
+                    break
+
+                entry = [text, self.sampler.store.version, self.tts.profile(), None]
+                with self._lock:
+                    self._upcoming.append(entry)
+
+                try:
+                    with metrics.timer("prefetch_render"):
+                        audio = self.tts.render_to_bytes(text)
+                except Exception:
+                    metrics.incr("errors", op="prefetch")
+                    audio = None
+                if audio and self.buffered_bytes + len(audio) <= self.max_bytes:
+                    entry[3] = audio
+
+
+# -----------------------------------------------------------------------------
+# SOUNDBANK
+# -----------------------------------------------------------------------------
+class Soundbank:
+    """Single-file store for pre-rendered phrase audio, read through mmap
+
+    Layout (little endian):
+      header    magic, version, index offset, entry count, voice table offset/length
+      data      raw 16 bit PCM of all phrases, back to back
+      index     entries sorted by hash: hash[16], offset, length, sample rate,
+                channels, sample width, voice number
+      voices    JSON list of voice ids
+
+    Lookups binary-search the mapped index, so opening a bank costs one
+    mmap no matter how many phrases it holds. Appends write new audio and
+    a new index behind the old one and then switch the header over; the
+    space of replaced entries and old indexes is reclaimed by compact().
+    Appends with commit=False only write audio and keep the new entries in
+    memory until the next commit, so large builds do not rewrite the index
+    for every batch.
+    """
+
+    MAGIC = b"TTSBANK1"
+    VERSION = 1
+    HEADER = struct.Struct("<8sIQQQQ")
+    ENTRY = struct.Struct("<16sQQIHHI")
+
+    def __init__(self, path: str) -> None:
+        self.path = path
+        self._map: Optional[mmap.mmap] = None
+        self.count = 0
+        self._index_offset = self.HEADER.size
+        self.voices: List[Optional[str]] = []
+        # Entries and voices including uncommitted appends, None when all is committed
+        self._entries: Optional[Dict[bytes, tuple]] = None
+        self._pending_voices: List[Optional[str]] = []
+        self._lock = threading.Lock()
+
+        if not os.path.exists(path):
+            with open(path, "wb") as file:
+                file.write(self._pack_header(self.HEADER.size, 0, self.HEADER.size, 2))
+                file.write(b"[]")
+        self._open()
+
+    @staticmethod
+    def key_hash(key: str) -> bytes:
+        """16 byte bank hash for an AudioCache key"""
+        return bytes.fromhex(key)[:16]
+
+    def __len__(self) -> int:
+        return self.count
+
+    def lookup(self, key: str) -> Optional[Tuple[memoryview, int, int]]:
+        """Returns (pcm view, sample rate, channels); release the view when done
+
+        The view stays valid across later appends and compaction.
+        """
+        wanted = self.key_hash(key)
+        with self._lock:
+            position = self._find(wanted)
+            if position is None:
+                return None
+            _, offset, length, sample_rate, channels, _, _ = self.ENTRY.unpack_from(
+                self._map, self._index_offset + position * self.ENTRY.size
+            )
+            return memoryview(self._map)[offset:offset + length], sample_rate, channels
+
+    def append(self, items: List[Tuple[str, bytes, int, int, Optional[str]]], commit: bool = True) -> None:
+        """Add (key, pcm, sample rate, channels, voice id) items, replacing equal keys
+
+        With commit=False the items are not visible to lookups until a later
+        append commits them.
+        """
+        with self._lock:
+            if not items and self._entries is None:
+                return
+            if self._entries is None:
+                self._entries = self._read_entries()
+                self._pending_voices = list(self.voices)
+
+            entries, voices = self._entries, self._pending_voices
+            with open(self.path, "r+b") as file:
+                offset = file.seek(0, os.SEEK_END)
+                for key, pcm, sample_rate, channels, voice_id in items:
+                    if voice_id not in voices:
+                        voices.append(voice_id)
+                    file.write(pcm)
+                    entries[self.key_hash(key)] = (offset, len(pcm), sample_rate, channels, 2, voices.index(voice_id))
+                    offset += len(pcm)
+
+                if commit:
+                    self._write_index(file, offset, entries, voices)
+                    self._entries = None
+            if commit:
+                self._open_locked()
+
+    def compact(self) -> int:
+        """Rewrite the bank without dead audio and old indexes; returns bytes saved"""
+        self.append([])
+        with self._lock:
+            entries = self._read_entries()
+            before = os.path.getsize(self.path)
+            temp_path = f"{self.path}.{os.getpid()}.tmp"
+            with open(temp_path, "wb") as file:
+                file.write(bytes(self.HEADER.size))
+                offset = self.HEADER.size
+                compacted = {}
+                for key_hash, (old_offset, length, *rest) in sorted(entries.items(), key=lambda item: item[1][0]):
+                    file.write(self._map[old_offset:old_offset + length])
+                    compacted[key_hash] = (offset, length, *rest)
+                    offset += length
+                self._write_index(file, offset, compacted, self.voices)
+
+            self._close_map()
+            os.replace(temp_path, self.path)
+            self._open_locked()
+            return before - os.path.getsize(self.path)
+
+    def close(self) -> None:
+        self.append([])
+        with self._lock:
+            self._close_map()
+
+    @classmethod
+    def build(cls, path: str, corpus_path: str, tts: "ArchTTS", batch_size: int = 256,
+              progress: bool = True) -> "Soundbank":
+        """Render every phrase of a text file with tts and add it to the bank
+
+        Phrases are rendered past the AudioCache, a build would otherwise
+        flush the user's cached audio. The index is committed whenever the
+        uncommitted entries outnumber the committed ones, so index writes
+        stay linear in the size of the bank.
+        """
+        bank = cls(path)
+        store = LineStore(corpus_path)
+        total = len(store)
+        pending = []
+        uncommitted = 0
+        for number in range(total):
+            text = parse_phrase(store.line(number))[0]
+            key = AudioCache.make_key(tts.normalize(text), *tts.profile())
+            if bank._contains(key):
+                continue
+
+            audio = tts.render_to_bytes(text, use_cache=False)
+            if audio:
+                with wave.open(io.BytesIO(audio), "rb") as wav_file:
+                    if wav_file.getsampwidth() == 2:
+                        pcm = wav_file.readframes(wav_file.getnframes())
+                        pending.append((key, pcm, wav_file.getframerate(), wav_file.getnchannels(),
+                                        tts.current_voice_id))
+
+            if len(pending) >= batch_size:
+                uncommitted += len(pending)
+                commit = uncommitted >= len(bank)
+                bank.append(pending, commit=commit)
+                pending = []
+                if commit:
+                    uncommitted = 0
+            if progress:
+                print(f"\r{number + 1}/{total} Phrasen", end="", flush=True)
+
+        bank.append(pending)
+        store.close()
+        if progress and total:
+            print()
+        return bank
+
+    def _contains(self, key: str) -> bool:
+        with self._lock:
+            if self._entries is not None:
+                return self.key_hash(key) in self._entries
+            return self._find(self.key_hash(key)) is not None
+
+    def _find(self, wanted: bytes) -> Optional[int]:
+        low, high = 0, self.count
+        while low < high:
+            middle = (low + high) // 2
+            start = self._index_offset + middle * self.ENTRY.size
+            current = self._map[start:start + 16]
+            if current == wanted:
+                return middle
+            if current < wanted:
+                low = middle + 1
+            else:
+                high = middle
+        return None
+
+    def _read_entries(self) -> Dict[bytes, tuple]:
+        entries = {}
+        for position in range(self.count):
+            key_hash, *rest = self.ENTRY.unpack_from(self._map, self._index_offset + position * self.ENTRY.size)
+            entries[key_hash] = tuple(rest)
+        return entries
+
+    def _write_index(self, file, index_offset: int, entries: Dict[bytes, tuple], voices: List) -> None:
+        """Write index and voice table at index_offset, then switch the header"""
+        file.seek(index_offset)
+        for key_hash in sorted(entries):
+            file.write(self.ENTRY.pack(key_hash, *entries[key_hash]))
+        voices_offset = file.tell()
+        voices_bytes = json.dumps(voices).encode("utf-8")
+        file.write(voices_bytes)
+        file.flush()
+        os.fsync(file.fileno())
+
+        file.seek(0)
+        file.write(self._pack_header(index_offset, len(entries), voices_offset, len(voices_bytes)))
+        file.flush()
+
+    def _pack_header(self, index_offset: int, count: int, voices_offset: int, voices_length: int) -> bytes:
+        return self.HEADER.pack(self.MAGIC, self.VERSION, index_offset, count, voices_offset, voices_length)
+
+    def _open(self) -> None:
+        with self._lock:
+            self._open_locked()
+
+    def _open_locked(self) -> None:
+        self._close_map()
+        with open(self.path, "rb") as file:
+            self._map = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+
+        magic, version, index_offset, count, voices_offset, voices_length = self.HEADER.unpack_from(self._map)
+        if magic != self.MAGIC or version != self.VERSION:
+            self._close_map()
+            raise ValueError(f"{self.path} ist keine Soundbank-Datei")
+
+        self._index_offset = index_offset
+        self.count = count
+        self.voices = json.loads(self._map[voices_offset:voices_offset + voices_length])
+
+    def _close_map(self) -> None:
+        if self._map is not None:
+            try:
+                self._map.close()
+            except BufferError:
+                # Views from lookup() are still alive; they keep the old
+                # mapping (and the replaced file) alive until they are released
+                pass
+            self._map = None
+
+
+# -----------------------------------------------------------------------------
+# BATCH RENDERING
+# -----------------------------------------------------------------------------
+# Engine of the current batch worker process, created by _init_batch_worker
+_batch_tts: Optional[ArchTTS] = None
+# Post-processing of the current batch worker, applied once per shard
+_batch_processor: Optional[AudioProcessor] = None
+
+
+def wav_duration(path: str) -> float:
+    """Returns the length of a WAV file in seconds"""
+    with wave.open(path, "rb") as wav_file:
+        return wav_file.getnframes() / float(wav_file.getframerate())
+
+
+def _render_tts(voice_id: Optional[str], rate: Optional[int], volume: Optional[float],
+                backend: str = "pyttsx3", engine_factory=None) -> ArchTTS:
+    """A private ArchTTS for render workers, set up without printing"""
+    tts = ArchTTS(engine_factory=engine_factory)
+    if backend != "pyttsx3":
+        tts.use_backend(backend)
+
+    if voice_id:
+        tts.current_voice_id = voice_id
+        tts.settings["voice"] = voice_id
+    if rate is not None:
+        tts.settings["rate"] = max(50, min(400, rate))
+    if volume is not None:
+        tts.settings["volume"] = max(0.0, min(1.0, volume))
+    return tts
+
+
+def _init_batch_worker(voice_id: Optional[str], rate: Optional[int], volume: Optional[float],
+                       backend: str = "pyttsx3", postprocess: Optional[str] = None) -> None:
+    global _batch_tts, _batch_processor
+    _batch_tts = _render_tts(voice_id, rate, volume, backend)
+    _batch_processor = AudioProcessor.from_spec(postprocess) if postprocess else None
+
+
+def _render_batch_shard(shard: List[Tuple[int, str]], output_dir: str) -> List[dict]:
+    """Render one shard of lines in a worker process"""
+    results = []
+    for number, text in shard:
+        filename = f"{number:06d}.wav"
+        path = os.path.join(output_dir, filename)
+        entry = {"line": number, "text": text, "file": filename, "ok": False,
+                 "duration": 0.0, "render_time": 0.0, "bytes": 0}
+
+        start = time.perf_counter()
+        try:
+            entry["ok"] = _batch_tts.render_to_file(text, path)
+            if entry["ok"]:
+                entry["duration"] = round(wav_duration(path), 4)
+                entry["bytes"] = os.path.getsize(path)
+        except Exception as e:
+            entry["error"] = str(e)
+        entry["render_time"] = round(time.perf_counter() - start, 4)
+
+        results.append(entry)
+
+    if _batch_processor is not None:
+        # The volume is already part of the synthesis here, so unity gain
+        rendered = [entry for entry in results if entry["ok"]]
+        paths = [os.path.join(output_dir, entry["file"]) for entry in rendered]
+        _batch_processor.process_files(paths)
+        for entry, path in zip(rendered, paths):
+            entry["duration"] = round(wav_duration(path), 4)
+            entry["bytes"] = os.path.getsize(path)
+    return results
+
+
+def render_batch(input_path: str, output_dir: str, workers: Optional[int] = None,
+                 chunksize: Optional[int] = None, voice_id: Optional[str] = None,
+                 rate: Optional[int] = None, volume: Optional[float] = None,
+                 progress: bool = True, backend: str = "pyttsx3", postprocess: Optional[str] = None) -> dict:
+    """Render every non-empty line of a text file to its own WAV file
+
+    The lines are sharded across a process pool, each worker process
+    owns its own engine. A manifest.json with per-line durations and
+    throughput statistics is written next to the audio files.
+    """
+    store = LineStore(input_path)
+    total = len(store)
+    lines = [(number, parse_phrase(store.line(number))[0]) for number in range(total)]
+    store.close()
+
+    os.makedirs(output_dir, exist_ok=True)
+    workers = workers or os.cpu_count() or 1
+    if not chunksize:
+        chunksize = max(1, min(64, total // (workers * 4)))
+    shards = [lines[i:i + chunksize] for i in range(0, total, chunksize)]
+
+    entries: List[dict] = []
+    start = time.perf_counter()
+    from concurrent.futures import ProcessPoolExecutor, as_completed
+
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_batch_worker,
+                             initargs=(voice_id, rate, volume, backend, postprocess)) as executor:
+        futures = [executor.submit(_render_batch_shard, shard, output_dir) for shard in shards]
+        for future in as_completed(futures):
+            entries.extend(future.result())
+            if progress:
+                print(f"\r{len(entries)}/{total} Zeilen gerendert", end="", flush=True)
+    wall_time = time.perf_counter() - start
+    if progress and total:
+        print()
+
+    entries.sort(key=lambda entry: entry["line"])
+    rendered = [entry for entry in entries if entry["ok"]]
+    audio_seconds = sum(entry["duration"] for entry in rendered)
+    manifest = {
+        "input": os.path.abspath(input_path),
+        "voice": voice_id or "auto",
+        "rate": rate,
+        "volume": volume,
+        "entries": entries,
+        "stats": {
+            "lines": total,
+            "rendered": len(rendered),
+            "failed": total - len(rendered),
+            "workers": workers,
+            "chunksize": chunksize,
+            "wall_time": round(wall_time, 4),
+            "lines_per_second": round(total / wall_time, 2) if wall_time else 0.0,
+            "audio_seconds": round(audio_seconds, 4),
+            # Seconds of audio produced per second of wall time
+            "speedup": round(audio_seconds / wall_time, 2) if wall_time else 0.0,
+        },
+    }
+
+    with open(os.path.join(output_dir, "manifest.json"), "w", encoding="utf-8") as file:
+        json.dump(manifest, file, ensure_ascii=False, indent=2)
+
+    return manifest
+
+
+# -----------------------------------------------------------------------------
+# RENDER QUEUE
+# -----------------------------------------------------------------------------
+class RenderQueue:
+    """Resumable render jobs in a SQLite file, shared by any number of workers
+
+    Every non-empty line of the corpus is one job: pending -> running ->
+    done, or back to pending after an error until max_attempts is reached,
+    then failed. Workers claim small batches under a lease. A job whose
+    lease ran out, because its worker crashed or hung, is claimed again by
+    somebody else, and only the lease owner may complete it. Output files
+    are written under a temporary name and renamed, so a job is either
+    fully rendered or rendered again.
+
+    WAL lets readers and one writer work concurrently but needs shared
+    memory, so it is only safe on a local disk. For a file shared over NFS
+    create the queue with journal_mode="delete".
+    """
+
+    JOURNAL_MODES = ("wal", "delete", "truncate")
+    STATES = ("pending", "running", "done", "failed")
+
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS meta (
+            key TEXT PRIMARY KEY,
+            value TEXT
+        );
+        CREATE TABLE IF NOT EXISTS jobs (
+            id INTEGER PRIMARY KEY,
+            line INTEGER NOT NULL UNIQUE,
+            text TEXT NOT NULL,
+            state TEXT NOT NULL DEFAULT 'pending',
+            attempts INTEGER NOT NULL DEFAULT 0,
+            lease_owner TEXT,
+            lease_until REAL,
+            error TEXT,
+            duration REAL,
+            render_time REAL,
+            updated REAL
+        );
+        CREATE INDEX IF NOT EXISTS jobs_claim ON jobs (state, lease_until);
+    """
+
+    def __init__(self, path: str, journal_mode: Optional[str] = None, timeout: float = 30.0,
+                 create: bool = True) -> None:
+        import sqlite3
+
+        if not create and not os.path.exists(path):
+            raise ValueError(f"Warteschlange {path} ist nicht initialisiert (zuerst: queue init)")
+        self.path = path
+        # Autocommit; write transactions are opened explicitly with BEGIN IMMEDIATE
+        self.db = sqlite3.connect(path, timeout=timeout, isolation_level=None)
+        self.db.row_factory = sqlite3.Row
+        if journal_mode:
+            if journal_mode not in self.JOURNAL_MODES:
+                raise ValueError(f"Unbekannter Journal-Modus: {journal_mode}")
+            self.db.execute(f"PRAGMA journal_mode={journal_mode}")
+        self.db.execute("PRAGMA synchronous=NORMAL")
+        self.db.executescript(self.SCHEMA)
+
+    @contextlib.contextmanager
+    def _transaction(self):
+        # IMMEDIATE takes the write lock up front, so two workers can never claim the same job
+        self.db.execute("BEGIN IMMEDIATE")
+        try:
+            yield self.db
+        except BaseException:
+            self.db.execute("ROLLBACK")
+            raise
+        else:
+            self.db.execute("COMMIT")
+
+    def meta(self) -> Dict[str, object]:
+        return {row["key"]: json.loads(row["value"]) for row in self.db.execute("SELECT key, value FROM meta")}
+
+    def settings(self) -> Dict[str, object]:
+        """Render settings stored by add_corpus(); ValueError for a queue that was never initialised"""
+        settings = self.meta()
+        if "output" not in settings:
+            raise ValueError(f"Warteschlange {self.path} ist nicht initialisiert (zuerst: queue init)")
+        return settings
+
+    def add_corpus(self, input_path: str, output_dir: str, voice_id: Optional[str] = None,
+                   rate: Optional[int] = None, volume: Optional[float] = None, backend: str = "pyttsx3",
+                   max_attempts: int = 3) -> int:
+        """Create one job per non-empty line; lines that already have a job are kept as they are"""
+        store = LineStore(input_path)
+        jobs = []
+        for number in range(len(store)):
+            text = parse_phrase(store.line(number))[0]
+            if text.strip():
+                jobs.append((number, text, time.time()))
+        store.close()
+
+        settings = {
+            "input": os.path.abspath(input_path), "output": os.path.abspath(output_dir), "voice": voice_id,
+            "rate": rate, "volume": volume, "backend": backend, "max_attempts": max_attempts,
+        }
+        with self._transaction() as db:
+            before = db.execute("SELECT COUNT(*) FROM jobs").fetchone()[0]
+            db.executemany("INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)",
+                           [(key, json.dumps(value)) for key, value in settings.items()])
+            db.executemany("INSERT OR IGNORE INTO jobs (line, text, updated) VALUES (?, ?, ?)", jobs)
+            return db.execute("SELECT COUNT(*) FROM jobs").fetchone()[0] - before
+
+    def claim(self, worker: str, batch_size: int = 16, lease: float = 120.0,
+              max_attempts: int = 3) -> List[Tuple[int, int, str]]:
+        """Lease up to batch_size jobs, returns (id, line, text) tuples"""
+        now = time.time()
+        with self._transaction() as db:
+            # A job whose lease keeps running out takes its worker down; stop handing it out
+            db.execute(
+                "UPDATE jobs SET state = 'failed', lease_owner = NULL, lease_until = NULL, "
+                "error = 'Lease abgelaufen', updated = ? "
+                "WHERE state = 'running' AND lease_until < ? AND attempts >= ?",
+                (now, now, max_attempts)
+            )
+            rows = db.execute(
+                "SELECT id, line, text FROM jobs WHERE state = 'pending' "
+                "OR (state = 'running' AND lease_until < ?) ORDER BY id LIMIT ?",
+                (now, batch_size)
+            ).fetchall()
+            db.executemany(
+                "UPDATE jobs SET state = 'running', attempts = attempts + 1, lease_owner = ?, "
+                "lease_until = ?, updated = ? WHERE id = ?",
+                [(worker, now + lease, now, row["id"]) for row in rows]
+            )
+        return [(row["id"], row["line"], row["text"]) for row in rows]
+
+    def renew(self, worker: str, lease: float = 120.0) -> None:
+        """Extend the leases of every job the worker holds"""
+        with self._transaction() as db:
+            db.execute("UPDATE jobs SET lease_until = ? WHERE state = 'running' AND lease_owner = ?",
+                       (time.time() + lease, worker))
+
+    def complete(self, job_id: int, worker: str, duration: float, render_time: float) -> bool:
+        """Mark a job done; False if the lease was lost to another worker in the meantime"""
+        with self._transaction() as db:
+            cursor = db.execute(
+                "UPDATE jobs SET state = 'done', lease_owner = NULL, lease_until = NULL, error = NULL, "
+                "duration = ?, render_time = ?, updated = ? "
+                "WHERE id = ? AND state = 'running' AND lease_owner = ?",
+                (duration, render_time, time.time(), job_id, worker)
+            )
+            return cursor.rowcount == 1
+
+    def fail(self, job_id: int, worker: str, error: str, max_attempts: int = 3) -> None:
+        """Give the job back for another attempt, or mark it failed after max_attempts"""
+        with self._transaction() as db:
+            db.execute(
+                "UPDATE jobs SET state = CASE WHEN attempts >= ? THEN 'failed' ELSE 'pending' END, "
+                "lease_owner = NULL, lease_until = NULL, error = ?, updated = ? "
+                "WHERE id = ? AND state = 'running' AND lease_owner = ?",
+                (max_attempts, error, time.time(), job_id, worker)
+            )
+
+    def release(self, worker: str) -> int:
+        """Hand back all jobs of a worker that stops early; the attempt is not counted"""
+        with self._transaction() as db:
+            cursor = db.execute(
+                "UPDATE jobs SET state = 'pending', attempts = MAX(attempts - 1, 0), lease_owner = NULL, "
+                "lease_until = NULL, updated = ? WHERE state = 'running' AND lease_owner = ?",
+                (time.time(), worker)
+            )
+            return cursor.rowcount
+
+    def retry_failed(self) -> int:
+        with self._transaction() as db:
+            cursor = db.execute("UPDATE jobs SET state = 'pending', attempts = 0, updated = ? "
+                                "WHERE state = 'failed'", (time.time(),))
+            return cursor.rowcount
+
+    def status(self) -> dict:
+        counts = dict.fromkeys(self.STATES, 0)
+        for row in self.db.execute("SELECT state, COUNT(*) AS jobs FROM jobs GROUP BY state"):
+            counts[row["state"]] = row["jobs"]
+
+        row = self.db.execute(
+            "SELECT COALESCE(SUM(duration), 0) AS audio, COALESCE(SUM(render_time), 0) AS render_time, "
+            "MIN(updated) AS first, MAX(updated) AS last FROM jobs WHERE state = 'done'"
+        ).fetchone()
+        workers = self.db.execute(
+            "SELECT COUNT(DISTINCT lease_owner) FROM jobs WHERE state = 'running' AND lease_until >= ?",
+            (time.time(),)
+        ).fetchone()[0]
+        return dict(counts, total=sum(counts.values()), workers=workers,
+                    audio_seconds=round(row["audio"], 2), render_time=round(row["render_time"], 2))
+
+    def close(self) -> None:
+        self.db.close()
+
+
+def work_queue(path: str, worker: Optional[str] = None, batch_size: int = 16, lease: float = 120.0,
+               progress: bool = True) -> int:
+    """Claim and render jobs until the queue is finished; returns the number rendered"""
+    queue_db = RenderQueue(path, create=False)
+    try:
+        settings = queue_db.settings()
+    except ValueError:
+        queue_db.close()
+        raise
+    worker = worker or f"{platform.node()}:{os.getpid()}"
+    output_dir = settings["output"]
+    max_attempts = settings.get("max_attempts", 3)
+    os.makedirs(output_dir, exist_ok=True)
+
+    tts = _render_tts(settings.get("voice"), settings.get("rate"), settings.get("volume"),
+                      settings.get("backend", "pyttsx3"))
+    rendered = 0
+    try:
+        while True:
+            jobs = queue_db.claim(worker, batch_size, lease, max_attempts)
+            renewed = time.monotonic()
+            if not jobs:
+                status = queue_db.status()
+                if not status["running"]:
+                    break
+                # Others are still busy; their jobs come back if a lease runs out
+                time.sleep(min(lease, 5.0))
+                continue
+
+            for job_id, number, text in jobs:
+                output_path = os.path.join(output_dir, f"{number:06d}.wav")
+                temp_path = f"{output_path}.{os.getpid()}.tmp"
+                start = time.perf_counter()
+                try:
+                    if not tts.render_to_file(text, temp_path):
+                        raise RuntimeError("Synthese lieferte keine Audiodaten")
+                    duration = wav_duration(temp_path)
+                    os.replace(temp_path, output_path)
+                except Exception as e:
+                    metrics.incr("errors", op="queue_render")
+                    queue_db.fail(job_id, worker, str(e), max_attempts)
+                    continue
+                finally:
+                    if os.path.exists(temp_path):
+                        os.remove(temp_path)
+
+                if queue_db.complete(job_id, worker, round(duration, 4), round(time.perf_counter() - start, 4)):
+                    rendered += 1
+                    metrics.incr("queue_jobs_done")
+                if progress:
+                    print(f"\r{worker}: {rendered} Zeilen gerendert", end="", flush=True)
+
+                # Keep the rest of the batch leased while rendering is slow
+                if time.monotonic() - renewed > lease / 3:
+                    queue_db.renew(worker, lease)
+                    renewed = time.monotonic()
+    except KeyboardInterrupt:
+        released = queue_db.release(worker)
+        if progress:
+            print(f"\n{worker}: abgebrochen, {released} Aufträge freigegeben")
+        raise
+    finally:
+        queue_db.close()
+
+    if progress and rendered:
+        print()
+    return rendered
+
+
+# -----------------------------------------------------------------------------
+# ENGINE POOL
+# -----------------------------------------------------------------------------
+def _engine_pool_worker(conn, profile: tuple, engine_factory, backend: str = "pyttsx3",
+                        postprocess: Optional[str] = None) -> None:
+    """Worker process: one engine, configured once for its profile"""
+    voice_id, rate, volume = profile
+    processor = AudioProcessor.from_spec(postprocess) if postprocess else None
+    # Like playback: synthesize at full volume, the processor applies it
+    tts = _render_tts(voice_id, rate, 1.0 if processor is not None else volume, backend, engine_factory)
+    tts.audio_cache = None
+    conn.send(tts.is_initialized and (tts.native is not None or tts._ensure_engine()))
+
+    while True:
+        try:
+            text = conn.recv()
+        except (EOFError, OSError):
+            break
+        if text is None:
+            break
+        try:
+            audio = tts.render_to_bytes(text)
+            if audio and processor is not None:
+                audio = processor.process_wav(audio, gain=volume)
+            conn.send(audio)
+        except Exception:
+            conn.send(None)
+
+
+class _PoolWorker:
+    __slots__ = ("profile", "process", "conn", "busy", "broken", "last_used")
+
+    def __init__(self, profile: tuple) -> None:
+        self.profile = profile
+        self.process = None
+        self.conn = None
+        self.busy = True
+        self.broken = False
+        self.last_used = time.monotonic()
+
+    def start(self, context, engine_factory, settings: tuple, timeout: float = 30.0) -> None:
+        self.conn, child_conn = context.Pipe()
+        self.process = context.Process(target=_engine_pool_worker,
+                                       args=(child_conn, self.profile, engine_factory, *settings),
+                                       name=f"engine-{self.profile[0]}", daemon=True)
+        self.process.start()
+        child_conn.close()
+
+        if not self.conn.poll(timeout) or not self.conn.recv():
+            self.broken = True
+            raise RuntimeError(f"Engine für Stimme {self.profile[0]} konnte nicht gestartet werden")
+
+    def stop(self) -> None:
+        if self.process is None:
+            return
+        try:
+            self.conn.send(None)
+        except (OSError, ValueError):
+            pass
+        self.process.join(1.0)
+        if self.process.is_alive():
+            self.process.terminate()
+        self.conn.close()
+        self.process = None
+
+
+class EnginePool:
+    """Worker processes with one engine each, pinned to a (voice, rate, volume) profile
+
+    Requests are routed to an idle engine that already has the requested
+    profile, so engines never change their properties. If no such engine
+    exists a new one is started, replacing the longest idle engine once the
+    pool is full. Engines idle for longer than idle_timeout are shut down,
+    an engine that takes longer than render_timeout for one text is killed.
+    Engines use the given backend and post-processing spec, so their audio
+    matches what the shared ArchTTS plays.
+    """
+
+    def __init__(self, size: Optional[int] = None, idle_timeout: float = 60.0, engine_factory=None,
+                 backend: str = "pyttsx3", postprocess: Optional[str] = None,
+                 render_timeout: float = 60.0) -> None:
+        self.size = max(1, size or os.cpu_count() or 1)
+        self.idle_timeout = idle_timeout
+        self.engine_factory = engine_factory
+        self.backend = backend
+        self.postprocess = postprocess
+        self.render_timeout = render_timeout
+        self.spawned = 0
+        self.reused = 0
+        self.reclaimed = 0
+        # Engines must not inherit the parent's espeak state
+        import multiprocessing
+
+        self._context = multiprocessing.get_context("spawn")
+        self._workers: List[_PoolWorker] = []
+        self._condition = threading.Condition()
+        self._closed = False
+        self._reaper = threading.Thread(target=self._reap_idle, name="engine-pool-reaper", daemon=True)
+        self._reaper.start()
+
+    def render(self, text: str, profile: tuple) -> Optional[bytes]:
+        """Render text with an engine for profile; blocks while the pool is busy"""
+        try:
+            worker = self._acquire(profile)
+        except RuntimeError as e:
+            metrics.incr("errors", op="engine_pool")
+            print(f"TTS Fehler: {e}")
+            return None
+
+        try:
+            with metrics.timer("engine_pool_render"):
+                worker.conn.send(text)
+                if not worker.conn.poll(self.render_timeout):
+                    worker.broken = True
+                    metrics.incr("errors", op="engine_pool_timeout")
+                    print(f"TTS Fehler: Engine antwortet nicht nach {self.render_timeout:.0f}s")
+                    return None
+                return worker.conn.recv()
+        except (EOFError, OSError):
+            worker.broken = True
+            metrics.incr("errors", op="engine_pool")
+            return None
+        finally:
+            self._release(worker)
+
+    def close(self) -> None:
+        with self._condition:
+            self._closed = True
+            stopped, self._workers = self._workers, []
+            self._condition.notify_all()
+        for worker in stopped:
+            worker.stop()
+
+    def stats(self) -> dict:
+        with self._condition:
+            return {
+                "size": self.size,
+                "engines": [{"profile": list(worker.profile), "busy": worker.busy} for worker in self._workers],
+                "spawned": self.spawned,
+                "reused": self.reused,
+                "reclaimed": self.reclaimed,
+            }
+
+    def _acquire(self, profile: tuple) -> _PoolWorker:
+        evicted = None
+        with self._condition:
+            while True:
+                if self._closed:
+                    raise RuntimeError("Engine-Pool ist geschlossen")
+
+                idle = [worker for worker in self._workers if not worker.busy]
+                for worker in idle:
+                    if worker.profile == profile:
+                        worker.busy = True
+                        self.reused += 1
+                        metrics.incr("engine_pool_reused")
+                        return worker
+
+                if len(self._workers) >= self.size and idle:
+                    evicted = min(idle, key=lambda worker: worker.last_used)
+                    self._workers.remove(evicted)
+                    self.reclaimed += 1
+                if len(self._workers) < self.size:
+                    worker = _PoolWorker(profile)
+                    self._workers.append(worker)
+                    break
+
+                self._condition.wait()
+
+        # Stopping and starting processes is slow, don't hold the lock meanwhile
+        if evicted is not None:
+            evicted.stop()
+        try:
+            worker.start(self._context, self.engine_factory, (self.backend, self.postprocess))
+        except Exception:
+            self._release(worker)
+            raise
+
+        self.spawned += 1
+        metrics.incr("engine_pool_spawned")
+        return worker
+
+    def _release(self, worker: _PoolWorker) -> None:
+        with self._condition:
+            worker.busy = False
+            worker.last_used = time.monotonic()
+            remove = worker.broken or self._closed
+            if remove and worker in self._workers:
+                self._workers.remove(worker)
+            self._condition.notify_all()
+        if remove:
+            worker.stop()
+
+    def _reap_idle(self) -> None:
+        while True:
+            with self._condition:
+                if self._closed:
+                    return
+                self._condition.wait(timeout=max(1.0, self.idle_timeout / 2))
+                now = time.monotonic()
+                expired = [worker for worker in self._workers
+                           if not worker.busy and now - worker.last_used > self.idle_timeout]
+                for worker in expired:
+                    self._workers.remove(worker)
+                    self.reclaimed += 1
+                    metrics.incr("engine_pool_reclaimed")
+            for worker in expired:
+                worker.stop()
+
+
+# -----------------------------------------------------------------------------
+# SPEECH SERVER
+# -----------------------------------------------------------------------------
+class SpeechServer:
+    """Minimal asyncio HTTP/1.1 server in front of one ArchTTS instance
+
+    POST /speak    {"text": ...}       -> queued on the speech worker
+    POST /render   {"text": ..., "voice", "rate", "volume"} -> audio/wav bytes
+    GET  /voices                       -> voice list
+    GET  /settings, POST /settings     -> rate, volume and voice
+
+    Render requests are collected into batches for the engine thread and
+    identical requests that are still in flight share one result. With an
+    EnginePool, batches are spread across its engines and requests may pick
+    their own voice, rate and volume.
+    """
+
+    MAX_BODY = 1024 * 1024
+    ROUTES = ("/voices", "/settings", "/speak", "/render")
+    ENQUEUE_TIMEOUT = 5.0
+
+    def __init__(self, tts: ArchTTS, speaker: SpeechWorker, batch_size: int = 16,
+                 pool: Optional[EnginePool] = None) -> None:
+        self.tts = tts
+        self.speaker = speaker
+        self.batch_size = batch_size
+        self.pool = pool
+        self.coalesced = 0
+        self._in_flight: Dict[str, "asyncio.Future"] = {}
+        self._render_queue: Optional["asyncio.Queue"] = None
+
+    async def serve(self, host: str = "127.0.0.1", port: int = 8765, unix_path: Optional[str] = None) -> None:
+        import asyncio
+
+        self._render_queue = asyncio.Queue()
+        batcher = asyncio.create_task(self._render_batches())
+
+        if unix_path:
+            if os.path.exists(unix_path):
+                os.remove(unix_path)
+            server = await asyncio.start_unix_server(self._handle_connection, path=unix_path)
+            print(f"Sprachserver läuft auf unix:{unix_path}")
+        else:
+            server = await asyncio.start_server(self._handle_connection, host, port)
+            print(f"Sprachserver läuft auf http://{host}:{port}")
+
+        try:
+            async with server:
+                await server.serve_forever()
+        finally:
+            batcher.cancel()
+            if unix_path and os.path.exists(unix_path):
+                os.remove(unix_path)
+
+    async def _handle_connection(self, reader: "asyncio.StreamReader", writer: "asyncio.StreamWriter") -> None:
+        import asyncio
+
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line.strip():
+                    break
+
+                try:
+                    method, target, version = request_line.decode("latin-1").split()
+                except ValueError:
+                    await self._respond(writer, 400, {"error": "Ungültige Anfrage"}, keep_alive=False)
+                    break
+
+                headers = {}
+                while True:
+                    line = await reader.readline()
+                    if line in (b"\r\n", b"\n", b""):
+                        break
+                    name, _, value = line.decode("latin-1").partition(":")
+                    headers[name.strip().lower()] = value.strip()
+
+                try:
+                    length = int(headers.get("content-length", "0") or 0)
+                except ValueError:
+                    length = -1
+                if length < 0:
+                    await self._respond(writer, 400, {"error": "Ungültige Content-Length"}, keep_alive=False)
+                    break
+                if length > self.MAX_BODY:
+                    await self._respond(writer, 413, {"error": "Anfrage zu groß"}, keep_alive=False)
+                    break
+                body = await reader.readexactly(length) if length else b""
+
+                keep_alive = headers.get("connection", "").lower() != "close" and version == "HTTP/1.1"
+                status, payload = await self._dispatch(method, target.split("?", 1)[0], body)
+                await self._respond(writer, status, payload, keep_alive)
+                if not keep_alive:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+    @staticmethod
+    async def _respond(writer: "asyncio.StreamWriter", status: int, payload, keep_alive: bool) -> None:
+        if isinstance(payload, bytes):
+            content_type, body = "audio/wav", payload
+        else:
+            content_type, body = "application/json", json.dumps(payload, ensure_ascii=False).encode("utf-8")
+
+        head = (f"HTTP/1.1 {status} {http.HTTPStatus(status).phrase}\r\n"
+                f"Content-Type: {content_type}\r\n"
+                f"Content-Length: {len(body)}\r\n"
+                f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n")
+        writer.write(head.encode("latin-1") + body)
+        await writer.drain()
+
+    async def _dispatch(self, method: str, path: str, body: bytes):
+        try:
+            data = json.loads(body) if body else {}
+            if not isinstance(data, dict):
+                raise ValueError
+        except ValueError:
+            return 400, {"error": "Body muss ein JSON-Objekt sein"}
+
+        # Label by route, arbitrary client paths would create unbounded series
+        route = path if path in self.ROUTES else "unknown"
+        with metrics.timer("server_request", route=route):
+            if path == "/voices" and method == "GET":
+                return 200, self._voices()
+            if path == "/settings" and method == "GET":
+                return 200, dict(self.tts.settings, voice_id=self.tts.current_voice_id)
+            if path == "/settings" and method == "POST":
+                return self._update_settings(data)
+
+            if path in ("/speak", "/render") and method == "POST":
+                text = data.get("text", "")
+                if not isinstance(text, str):
+                    return 400, {"error": "text muss ein String sein"}
+                text = text.strip()
+                if not text:
+                    return 400, {"error": "Kein Text angegeben"}
+                if path == "/speak":
+                    if not await self._enqueue(text):
+                        return 503, {"error": "Sprachausgabe ausgelastet"}
+                    return 202, {"queued": True, "pending": self.speaker.pending}
+
+                try:
+                    profile = self._render_profile(data)
+                except (TypeError, ValueError, IndexError):
+                    return 400, {"error": "Ungültige Stimme oder Einstellungen"}
+                if self.pool is None and profile != self._default_profile():
+                    return 400, {"error": "Eigene Stimme/Einstellungen nur mit --pool-size"}
+
+                audio = await self._render(text, profile)
+                if audio is None:
+                    return 500, {"error": "Rendern fehlgeschlagen"}
+                return 200, audio
+
+        return 404, {"error": f"Unbekannter Pfad: {method} {path}"}
+
+    async def _enqueue(self, text: str) -> bool:
+        if self.speaker.policy != "block":
+            return self.speaker.enqueue(text)
+
+        # A full queue would block the event loop and with it every connection
+        import asyncio
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(None, self.speaker.enqueue, text, self.ENQUEUE_TIMEOUT)
+
+    def _default_profile(self) -> tuple:
+        # The volume the listener hears, also when post-processing applies it
+        voice_id, rate, _ = self.tts.profile()
+        return voice_id, rate, self.tts.settings["volume"]
+
+    def _render_profile(self, data: dict) -> tuple:
+        voice_id, rate, volume = self._default_profile()
+        if "voice" in data:
+            index = self._voice_index(data["voice"])
+            if index is None:
+                raise ValueError(data["voice"])
+            voice_id = self.tts.available_voices[index].id
+        if "rate" in data:
+            rate = max(50, min(400, int(data["rate"])))
+        if "volume" in data:
+            volume = max(0.0, min(1.0, float(data["volume"])))
+        return voice_id, rate, volume
+
+    def _voice_index(self, voice) -> Optional[int]:
+        """Index for a voice number or id from a request, None if there is no such voice"""
+        # bool is an int subclass, and negative numbers would index from the end
+        if isinstance(voice, bool):
+            return None
+        if isinstance(voice, int):
+            return voice if 0 <= voice < len(self.tts.available_voices) else None
+        if isinstance(voice, str):
+            return self.tts.catalog.index_of(voice)
+        return None
+
+    def _voices(self) -> List[dict]:
+        catalog = self.tts.catalog
+        return [
+            dict(voice.to_dict(), index=index, backend=catalog.backend_of(index),
+                 active=voice.id == self.tts.current_voice_id)
+            for index, voice in enumerate(self.tts.available_voices)
+        ]
+
+    def _update_settings(self, data: dict):
+        try:
+            if "voice" in data:
+                voice = data["voice"]
+                index = self._voice_index(voice)
+                if index is None or not self.tts.change_voice(index):
+                    return 400, {"error": f"Unbekannte Stimme: {voice}"}
+            if "rate" in data or "volume" in data:
+                rate = int(data["rate"]) if "rate" in data else None
+                volume = float(data["volume"]) if "volume" in data else None
+                if not self.tts.change_settings(rate=rate, volume=volume):
+                    return 503, {"error": "TTS Engine nicht verfügbar"}
+        except (TypeError, ValueError):
+            return 400, {"error": "Ungültige Einstellungen"}
+
+        return 200, dict(self.tts.settings, voice_id=self.tts.current_voice_id)
+
+    async def _render(self, text: str, profile: tuple) -> Optional[bytes]:
+        import asyncio
+
+        key = AudioCache.make_key(self.tts.normalize(text), *profile)
+        future = self._in_flight.get(key)
+        if future is not None:
+            self.coalesced += 1
+            metrics.incr("server_coalesced")
+            return await asyncio.shield(future)
+
+        future = asyncio.get_running_loop().create_future()
+        self._in_flight[key] = future
+        await self._render_queue.put((text, profile, future))
+        try:
+            return await asyncio.shield(future)
+        finally:
+            self._in_flight.pop(key, None)
+
+    async def _render_batches(self) -> None:
+        """Hand pending render requests to the engine thread in batches"""
+        import asyncio
+
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = [await self._render_queue.get()]
+            while len(batch) < self.batch_size and not self._render_queue.empty():
+                batch.append(self._render_queue.get_nowait())
+
+            metrics.incr("server_batches")
+            metrics.incr("server_batched_requests", len(batch))
+            try:
+                if self.pool is not None:
+                    results = await asyncio.gather(*(
+                        loop.run_in_executor(None, self.pool.render, text, profile)
+                        for text, profile, _ in batch
+                    ))
+                else:
+                    texts = [text for text, _, _ in batch]
+                    results = await loop.run_in_executor(None, self._render_many, texts)
+            except Exception as e:
+                metrics.incr("errors", op="server_render")
+                results = [None] * len(batch)
+                print(f"TTS Fehler: {e}")
+
+            for (_, _, future), audio in zip(batch, results):
+                if not future.done():
+                    future.set_result(audio)
+
+    def _render_many(self, texts: List[str]) -> List[Optional[bytes]]:
+        results = [self.tts.render_to_bytes(text) for text in texts]
+        processor = self.tts.postprocessor
+        if processor is not None:
+            gain = self.tts.settings["volume"]
+            results = [processor.process_wav(audio, gain) if audio else audio for audio in results]
+        return results
+
+
+# -----------------------------------------------------------------------------
+# WATCH MODE
+# -----------------------------------------------------------------------------
+class Inotify:
+    """Minimal inotify binding through ctypes; only tells that a watched file changed"""
+
+    IN_MODIFY = 0x2
+    IN_ATTRIB = 0x4
+    IN_CLOSE_WRITE = 0x8
+    IN_DELETE_SELF = 0x400
+    IN_MOVE_SELF = 0x800
+    IN_NONBLOCK = 0o4000
+    IN_CLOEXEC = 0o2000000
+    MASK = IN_MODIFY | IN_ATTRIB | IN_CLOSE_WRITE | IN_DELETE_SELF | IN_MOVE_SELF
+
+    def __init__(self) -> None:
+        libc = ctypes.CDLL(ctypes.util.find_library("c") or "libc.so.6", use_errno=True)
+        if not hasattr(libc, "inotify_init1"):
+            raise OSError("inotify wird nicht unterstützt")
+        libc.inotify_add_watch.argtypes = [ctypes.c_int, ctypes.c_char_p, ctypes.c_uint32]
+        libc.inotify_rm_watch.argtypes = [ctypes.c_int, ctypes.c_int]
+
+        self.fd = libc.inotify_init1(self.IN_NONBLOCK | self.IN_CLOEXEC)
+        if self.fd < 0:
+            errno = ctypes.get_errno()
+            raise OSError(errno, os.strerror(errno))
+        self._libc = libc
+        self._watch: Optional[int] = None
+
+    def watch(self, path: str) -> None:
+        """Watch path instead of the previous file, e.g. after log rotation"""
+        if self._watch is not None:
+            self._libc.inotify_rm_watch(self.fd, self._watch)
+            self._watch = None
+        watch = self._libc.inotify_add_watch(self.fd, os.fsencode(path), self.MASK)
+        if watch < 0:
+            errno = ctypes.get_errno()
+            raise OSError(errno, os.strerror(errno), path)
+        self._watch = watch
+
+    def wait(self, timeout: float) -> bool:
+        """Block until the file changed or timeout passed"""
+        ready, _, _ = select.select([self.fd], [], [], timeout)
+        if not ready:
+            return False
+        # The events themselves do not matter, the follower stats the file anyway
+        try:
+            while os.read(self.fd, 4096):
+                pass
+        except BlockingIOError:
+            pass
+        return True
+
+    def close(self) -> None:
+        os.close(self.fd)
+
+
+class _LineSplitter:
+    """Cuts bytes into lines; an unterminated rest waits for the next read"""
+
+    _partial = b""
+
+    def _split(self, data: bytes) -> List[str]:
+        *lines, self._partial = (self._partial + data).split(b"\n")
+        return [line.decode("utf-8", "replace").rstrip("\r") for line in lines]
+
+
+class FileFollower(_LineSplitter):
+    """Returns the lines appended to a file, like tail -F
+
+    Only new bytes are read, with pread() at the remembered offset. A file
+    that shrank was truncated and is read again from the start, and a new
+    inode under the same path (log rotation) is followed after the rest of
+    the old file was read. inotify wakes the reader early; without it the
+    file is polled every `poll_interval` seconds.
+    """
+
+    MAX_READ = 1 << 20
+
+    def __init__(self, path: str, from_start: bool = False, poll_interval: float = 0.5) -> None:
+        self.path = path
+        self.poll_interval = poll_interval
+        self._fd: Optional[int] = None
+        self._inode: Optional[Tuple[int, int]] = None
+        self._offset = 0
+        try:
+            self._inotify: Optional[Inotify] = Inotify()
+        except OSError:
+            self._inotify = None
+        self._open(from_start)
+
+    def _open(self, from_start: bool) -> None:
+        try:
+            fd = os.open(self.path, os.O_RDONLY | os.O_CLOEXEC)
+        except FileNotFoundError:
+            return
+        info = os.fstat(fd)
+        self._fd = fd
+        self._inode = (info.st_dev, info.st_ino)
+        self._offset = 0 if from_start else info.st_size
+        if self._inotify is not None:
+            try:
+                self._inotify.watch(self.path)
+            except OSError:
+                self._inotify.close()
+                self._inotify = None
+
+    def read_lines(self, timeout: float) -> List[str]:
+        """New complete lines, waiting up to timeout for some to arrive"""
+        lines = self._read()
+        if lines or timeout <= 0:
+            return lines
+        if self._inotify is not None and self._fd is not None:
+            self._inotify.wait(min(timeout, self.poll_interval))
+        else:
+            time.sleep(min(timeout, self.poll_interval))
+        return self._read()
+
+    def _read(self) -> List[str]:
+        try:
+            info = os.stat(self.path)
+        except FileNotFoundError:
+            info = None
+
+        if self._fd is None:
+            if info is None:
+                return []
+            # Created after we started: everything in it is new
+            self._open(from_start=True)
+            if self._fd is None:
+                return []
+        elif info is None or (info.st_dev, info.st_ino) != self._inode:
+            # Rotated or removed: finish the old file, then switch to the new one
+            lines = self._read_fd(os.fstat(self._fd).st_size)
+            if info is not None:
+                os.close(self._fd)
+                self._fd = None
+                self._partial = b""
+                self._open(from_start=True)
+            return lines
+        elif info.st_size < self._offset:
+            self._offset = 0
+            self._partial = b""
+            metrics.incr("watch_truncations")
+
+        return self._read_fd(info.st_size)
+
+    def _read_fd(self, size: int) -> List[str]:
+        if size <= self._offset:
+            return []
+        data = os.pread(self._fd, min(size - self._offset, self.MAX_READ), self._offset)
+        self._offset += len(data)
+        return self._split(data)
+
+    def close(self) -> None:
+        if self._fd is not None:
+            os.close(self._fd)
+            self._fd = None
+        if self._inotify is not None:
+            self._inotify.close()
+            self._inotify = None
+
+
+class PipeFollower(_LineSplitter):
+    """Returns the lines written into a named pipe
+
+    The pipe is opened read-write, so it never reports end-of-file when a
+    writer closes it and any number of writers may come and go.
+    """
+
+    def __init__(self, path: str) -> None:
+        self.path = path
+        self._fd = os.open(path, os.O_RDWR | os.O_NONBLOCK | os.O_CLOEXEC)
+
+    def read_lines(self, timeout: float) -> List[str]:
+        ready, _, _ = select.select([self._fd], [], [], max(0.0, timeout))
+        if not ready:
+            return []
+        chunks = []
+        try:
+            while True:
+                data = os.read(self._fd, 65536)
+                if not data:
+                    break
+                chunks.append(data)
+        except BlockingIOError:
+            pass
+        return self._split(b"".join(chunks))
+
+    def close(self) -> None:
+        os.close(self._fd)
+
+
+def open_follower(path: str, from_start: bool = False, poll_interval: float = 0.5):
+    """PipeFollower for a named pipe, FileFollower for anything else"""
+    try:
+        if stat.S_ISFIFO(os.stat(path).st_mode):
+            return PipeFollower(path)
+    except FileNotFoundError:
+        pass
+    return FileFollower(path, from_start, poll_interval)
+
+
+class WatchFeeder:
+    """Turns a stream of event lines into a bounded amount of speech
+
+    Lines seen within the last `dedupe` seconds are dropped. Lines arriving
+    within `coalesce` seconds of the first line of a burst are spoken as one
+    utterance, at most `max_lines` of them plus a count of the rest. A
+    token bucket allows `burst` utterances at once and `rate` per minute on
+    average; anything above is dropped instead of queued, and the
+    SpeechWorker's bounded queue caps what is waiting to be spoken.
+    """
+
+    def __init__(self, speaker: "SpeechWorker", rate: float = 20.0, burst: int = 3, dedupe: float = 30.0,
+                 coalesce: float = 0.5, max_lines: int = 3, echo: bool = True) -> None:
+        self.speaker = speaker
+        self.rate = rate
+        self.burst = burst
+        self.dedupe = dedupe
+        self.coalesce = coalesce
+        self.max_lines = max_lines
+        self.echo = echo
+
+        self._tokens = float(burst)
+        self._refilled = time.monotonic()
+        self._seen: Dict[str, float] = {}
+        self._pending: List[str] = []
+        self._pending_since: Optional[float] = None
+        self.stats = {"lines": 0, "duplicates": 0, "utterances": 0, "rate_limited": 0, "rejected": 0}
+
+    def add(self, line: str, now: Optional[float] = None) -> None:
+        line = line.strip()
+        if not line:
+            return
+        now = time.monotonic() if now is None else now
+        self.stats["lines"] += 1
+
+        if self.dedupe > 0:
+            # Measured from the last accepted copy, so a steady repeat is spoken once per window
+            last = self._seen.get(line)
+            if last is not None and now - last < self.dedupe:
+                self.stats["duplicates"] += 1
+                metrics.incr("watch_lines", result="duplicate")
+                return
+            self._seen[line] = now
+            if len(self._seen) > 4096:
+                self._seen = {text: seen for text, seen in self._seen.items() if now - seen < self.dedupe}
+
+        if not self._pending:
+            self._pending_since = now
+        self._pending.append(line)
+
+    def due(self, now: Optional[float] = None) -> Optional[float]:
+        """Seconds until the pending burst is spoken, None if nothing is pending"""
+        if not self._pending:
+            return None
+        now = time.monotonic() if now is None else now
+        return max(0.0, self._pending_since + self.coalesce - now)
+
+    def flush(self, now: Optional[float] = None) -> None:
+        """Speak the pending burst once its coalescing window is over"""
+        now = time.monotonic() if now is None else now
+        if not self._pending or now - self._pending_since < self.coalesce:
+            return
+
+        lines, self._pending = self._pending, []
+        text = ". ".join(line.rstrip(".") for line in lines[:self.max_lines])
+        if len(lines) > self.max_lines:
+            more = NORMALIZATION_RULES[self.speaker.tts.language()]["more"]
+            text += ". " + more.format(len(lines) - self.max_lines)
+
+        elapsed = max(0.0, now - self._refilled)
+        self._tokens = min(float(self.burst), self._tokens + elapsed * self.rate / 60.0)
+        self._refilled = now
+        if self._tokens < 1.0:
+            self.stats["rate_limited"] += 1
+            metrics.incr("watch_lines", len(lines), result="rate_limited")
+            return
+        self._tokens -= 1.0
+
+        if self.speaker.enqueue(text):
+            self.stats["utterances"] += 1
+            metrics.incr("watch_lines", len(lines), result="spoken")
+            if self.echo:
+                print(text, flush=True)
+        else:
+            self.stats["rejected"] += 1
+            metrics.incr("watch_lines", len(lines), result="rejected")
+
+
+# -----------------------------------------------------------------------------
+# TERMINAL RENDERING
+# -----------------------------------------------------------------------------
+class Screen:
+    """Frame buffer for the terminal UI
 
-            # Show additional info if available
-            if hasattr(voice, 'age'):
-                print(f"      Age: {voice.age}")
+    Output is collected as lines of the current frame and sent with a
+    single write on flush(). Rows that are identical to the previous frame
+    are skipped, so redrawing the menu only touches the rows that changed.
+    Static blocks (banner, borders, menu) are rendered once per terminal
+    size through static(). Lines wider than the terminal wrap, so rows are
+    tracked physically: every line knows its first row and its height.
+    Frames taller than the terminal scroll, so they are always drawn in full.
+    """
 
-            if hasattr(voice, 'gender'):
-                print(f"      Gender: {voice.gender}")
-            print()
+    HOME_CLEAR = "\x1b[H\x1b[2J"
+    CLEAR_LINE = "\x1b[2K"
+    CLEAR_BELOW = "\x1b[J"
+    ESCAPE = re.compile(r"\x1b\[[0-9;?]*[A-Za-z]")
 
-    def change_voice(self, voice_index: int) -> bool:
-        """Change to a specific voice by index"""
-        if not self.available_voices or voice_index < 0 or voice_index >= len(self.available_voices):
-            return False
+    def __init__(self, stream=None) -> None:
+        self.stream = stream if stream is not None else sys.stdout
+        self.lines: List[str] = []
+        # (first row, height, text) per line of the frame on the terminal
+        self._previous: Optional[List[Tuple[int, int, str]]] = None
+        self._size: Optional[os.terminal_size] = None
+        self._static: Dict[tuple, List[str]] = {}
 
-        try:
-            selected_voice = self.available_voices[voice_index]
-            self.current_voice_id = selected_voice.id
-            self.settings["voice"] = selected_voice.name
+    @staticmethod
+    def size() -> os.terminal_size:
+        return shutil.get_terminal_size()
 
-            if self.tts_engine:
-                self.tts_engine.setProperty('voice', self.current_voice_id)
+    def static(self, name: str, build, *key) -> List[str]:
+        """Lines of a static block, rendered by build(columns) once per terminal size"""
+        size = self.size()
+        cache_key = (name, size, *key)
+        lines = self._static.get(cache_key)
+        if lines is None:
+            if len(self._static) > 32:
+                self._static.clear()
+            lines = self._static[cache_key] = build(size.columns)
+        return lines
 
-            print(f"Stimme geändert zu: {selected_voice.name}")
-            return True
+    def begin(self) -> None:
+        """Start a new frame; it replaces the previous one on the next flush"""
+        self.lines = []
 
-        except Exception as e:
-            print(f"Fehler beim Ändern der Stimme: {e}")
-            return False
+    def write(self, text: str = "") -> None:
+        self.lines.extend(text.split("\n"))
 
-    def change_settings(self, rate=None, volume=None):
-        """Change TTS settings"""
-        if not self.is_initialized:
-            return False
+    def extend(self, lines: List[str]) -> None:
+        self.lines.extend(lines)
 
-        try:
-            if rate is not None:
-                # Validate rate (typically 50-400 WPM)
-                rate = max(50, min(400, rate))
-                self.settings["rate"] = rate
-                self.tts_engine.setProperty('rate', rate)
-                print(f"Geschwindigkeit auf {rate} WPM gesetzt")
+    def invalidate(self) -> None:
+        """Forget what is on the terminal, the next flush redraws everything"""
+        self._previous = None
 
-            if volume is not None:
-                # Validate volume (0.0 to 1.0)
-                volume = max(0.0, min(1.0, volume))
-                self.settings["volume"] = volume
-                self.tts_engine.setProperty('volume', volume)
-                print(f"Lautstärke auf {int(volume * 100)}% gesetzt")
-            return True
+    @classmethod
+    def width(cls, text: str) -> int:
+        """Terminal cells text takes up, without escape sequences"""
+        text = cls.ESCAPE.sub("", text)
+        if text.isascii():
+            return len(text)
+        return sum(0 if unicodedata.combining(char) else 2 if unicodedata.east_asian_width(char) in "WF" else 1
+                   for char in text)
 
-        except Exception as e:
-            print(f"Fehler beim Ändern der Einstellungen: {e}")
-            return False
+    @classmethod
+    def layout(cls, lines: List[str], columns: int) -> Tuple[List[Tuple[int, int, str]], int]:
+        """(first row, height, text) of every line and the total number of rows"""
+        columns = max(1, columns)
+        placed = []
+        row = 0
+        for line in lines:
+            height = max(1, -(-cls.width(line) // columns))
+            placed.append((row, height, line))
+            row += height
+        return placed, row
 
-    def test_voice(self, text="Test deutschen Stimme mit festival-de."):
-        """Test the current voice with sample text"""
-        return self.speak_text(text)
+    def flush(self) -> None:
+        """Send the frame; the cursor ends up behind the last line"""
+        size = self.size()
+        frame, rows = self.layout(self.lines, size.columns)
+        output = []
 
-    def get_status(self) -> str:
-        """Returns current TTS status"""
-        if not self.is_initialized:
-            return "TTS Engine nicht initialisiert"
+        if rows >= size.lines:
+            output.append(self.HOME_CLEAR)
+            output.append("\n".join(self.lines))
+            self.stream.write("".join(output))
+            self.stream.flush()
+            self._previous = None
+            return
 
-        status = f"pyttsx3 TTS Engine aktiv\n"
-        status += f"Aktuelle Stimme: {self.settings['voice']}\n"
-        status += f"Geschwindigkeit: {self.settings['rate']} WPM\n"
-        status += f"Lautstärke: {int(self.settings['volume'] * 100)}%\n"
-        status += f"Verfügbare Stimmen: {len(self.available_voices)}"
+        previous = self._previous
+        if previous is None or size != self._size:
+            output.append(self.HOME_CLEAR)
+            previous = []
 
-        return status
+        last = len(frame) - 1
+        for index, placed in enumerate(frame):
+            # The last line is always rewritten to leave the cursor behind it
+            if index == last or index >= len(previous) or previous[index] != placed:
+                output.append(self._draw(*placed))
+        previous_rows = previous[-1][0] + previous[-1][1] if previous else 0
+        if previous_rows > rows:
+            output.append(f"\x1b[{rows + 1};1H{self.CLEAR_BELOW}")
+            if frame:
+                output.append(self._draw(*frame[-1]))
 
-    def reinitialize(self):
-        """Reinitialize the TTS engine"""
-        if self.tts_engine:
-            try:
-                self.tts_engine.stop()
-            except Exception:
-                pass
-        self.initialize_engine()
+        self.stream.write("".join(output))
+        self.stream.flush()
+        self._previous = frame
+        self._size = size
 
-    @staticmethod
-    def _select_best_voice(voices):
-        german_keywords = ['german', 'deutsch', 'de-de', 'de_de', 'de', 'festival_de']
-        english_keywords = ['english', 'en-us', 'en_us', 'en-gb']
-        
-        for voice in voices:
-            voice_name = voice.name.lower() if voice.name else ""
-            voice_id = voice.id.lower() if voice.id else ""
-            
-            if any(keyword in voice_name or keyword in voice_id for keyword in german_keywords):
-                if 'festival' in voice_id and 'de' in voice_id:
-                    return voice
-                    
-        for voice in voices:
-            voice_name = voice.name.lower() if voice.name else ""
-            voice_id = voice.id.lower() if voice.id else ""
-            
-            if any(keyword in voice_name or keyword in voice_id for keyword in german_keywords):
-                return voice
-                
-        for voice in voices:
-            voice_name = voice.name.lower() if voice.name else ""
-            voice_id = voice.id.lower() if voice.id else ""
-            
-            if any(keyword in voice_name or keyword in voice_id for keyword in english_keywords):
-                return voice
-                
-        return None
+    def _draw(self, row: int, height: int, line: str) -> str:
+        # Clear every row the line wraps onto, then write it from its first row
+        cleared = "".join(f"\x1b[{row + offset + 1};1H{self.CLEAR_LINE}" for offset in range(1, height))
+        return f"{cleared}\x1b[{row + 1};1H{self.CLEAR_LINE}{line}"
 
-    @staticmethod
-    def _get_voice_type(voice_id):
-        if "festival" in voice_id and "de" in voice_id:
-            return " [festival-de - DEUTSCH]"
-        elif "festival" in voice_id:
-            return " [festival]"
-        elif "espeak" in voice_id:
-            return " [espeak]"
-        return ""
+    def answered(self, answer: str) -> None:
+        """Record the input echoed behind the last line after input() returned"""
+        if self.lines:
+            self.lines[-1] += answer
+        if self._previous is not None:
+            placed, rows = self.layout(self.lines, self._size.columns)
+            if rows + 1 >= self._size.lines:
+                # The newline after the answer scrolled the terminal
+                self._previous = None
+            else:
+                self._previous = placed
 
+    @contextlib.contextmanager
+    def capture(self):
+        """Collect print() output of the block into the frame"""
+        buffer = io.StringIO()
+        try:
+            with contextlib.redirect_stdout(buffer):
+                yield
+        finally:
+            text = buffer.getvalue()
+            if text:
+                self.write(text[:-1] if text.endswith("\n") else text)
 
 
 # -----------------------------------------------------------------------------
@@ -249,7 +4895,10 @@ class ArchTTS:
 class UI:
     """Terminal UI class for displaying menus and formatted output."""
 
-    def __init__(self) -> None:
+    def __init__(self, tts: Optional[ArchTTS] = None, corpus_path: str = "text.txt") -> None:
+        import colorama
+        colorama.init()
+
         self.banner: str = r'''
                                        ______
                     |\_______________ (_____\\______________
@@ -279,57 +4928,89 @@ class UI:
             f"{self.colors['accent']}└{border_line}┘{self.colors['reset']}"
         )
 
+        # All output goes through one frame buffer per screen
+        self.screen = Screen()
+
         # TTS System
-        self.tts = ArchTTS()
+        self.tts = tts if tts is not None else ArchTTS.shared()
+        self.speaker = SpeechWorker(self.tts)
 
-    def _speak_text_async(self, text):
-        def speak_async():
-            self.tts.speak_text(text)
+        # Phrase file for task_1, picked without short-term repeats
+        self.lines = LineStore(corpus_path)
+        self.sampler = PhraseSampler(self.lines, mode="window")
+        self.prefetcher = Prefetcher(self.tts, self.sampler)
 
-        thread = threading.Thread(target=speak_async)
-        thread.start()
-        thread.join()
+    def _speak_text_async(self, text: str, audio: Optional[bytes] = None) -> bool:
+        if not self.speaker.enqueue(text, audio=audio):
+            self.message("warning", "Sprachausgabe ausgelastet, Text verworfen.")
+            return False
+        return True
 
-    @staticmethod
-    def clear() -> None:
-        os.system("clear")
+    def clear(self) -> None:
+        self.screen.begin()
 
     def print_banner(self) -> None:
         self.clear()
-        print(f"{self.colors['main']}{self.banner}{self.colors['reset']}")
+        self.screen.extend(self.screen.static("banner", self._banner_lines, self.tts.is_initialized,
+                                              self.tts.settings["voice"]))
+
+    def _banner_lines(self, columns: int) -> List[str]:
+        lines = f"{self.colors['main']}{self.banner}{self.colors['reset']}".split("\n")
 
         # TTS Status
         if self.tts.is_initialized:
-            print(f"{self.colors['tts']}[TTS] pyttsx3 geladen - {self.tts.settings['voice']}{self.colors['reset']}")
+            lines.append(f"{self.colors['tts']}[TTS] pyttsx3 geladen - {self.tts.settings['voice']}{self.colors['reset']}")
         else:
-            print(
+            lines.append(
                 f"{self.colors['error']}[TTS] Nicht verfügbar - installiere: sudo pacman -S espeak-ng festival festival-de{self.colors['reset']}")
+        return lines
+
+    def centered(self, text: str, columns: int, color: str = "main") -> str:
+        return f"{self.colors[color]}{text.center(columns)}{self.colors['reset']}"
 
     def print_centered(self, text: str, color: str = "main") -> None:
-        terminal_width: int = shutil.get_terminal_size().columns
-        print(f"{self.colors[color]}{text.center(terminal_width)}{self.colors['reset']}")
+        if text == self.top_border or text == self.bottom_border:
+            self.screen.extend(self.screen.static("border", lambda columns: [self.centered(text, columns, color)],
+                                                  text, color))
+        else:
+            self.screen.write(self.centered(text, self.screen.size().columns, color))
+
+    def write(self, text: str = "") -> None:
+        self.screen.write(text)
 
     def input_prompt(self, prompt: str) -> str:
-        return input(f"{self.colors['accent']}[?] {prompt}{self.colors['reset']} > ")
+        self.screen.write(f"{self.colors['accent']}[?] {prompt}{self.colors['reset']} > ")
+        self.screen.flush()
+        answer = input()
+        self.screen.answered(answer)
+        return answer
+
+    def option_line(self, key: str, text: str) -> str:
+        return f" {self.colors['accent']}{key}{self.colors['reset']} > {self.colors['main']}{text}"
 
     def menu_option(self, key: str, text: str) -> None:
-        print(f" {self.colors['accent']}{key}{self.colors['reset']} > {self.colors['main']}{text}")
+        self.screen.write(self.option_line(key, text))
 
     def message(self, msg_type: str, text: str) -> None:
-        print(f"{self.colors[msg_type]}[{msg_type[0].upper()}] {text}{self.colors['reset']}")
+        self.screen.write(f"{self.colors[msg_type]}[{msg_type[0].upper()}] {text}{self.colors['reset']}")
 
     def display_menu(self) -> None:
         self.print_banner()
-        self.print_centered(self.top_border)
-        self.menu_option("0", "Beenden")
-        self.menu_option("1", "Zufälligen Text vorlesen")
-        self.menu_option("2", "TTS Einstellungen ändern")
-        self.menu_option("3", "TTS Status anzeigen")
-        self.menu_option("4", "Verfügbare Stimmen anzeigen")
-        self.menu_option("5", "Stimme ändern")
-        self.menu_option("6", "Text eingeben und vorlesen")
-        self.menu_option("7", "TTS Engine neu initialisieren")
-        self.print_centered(self.bottom_border)
+        self.screen.extend(self.screen.static("menu", self._menu_lines))
+
+    def _menu_lines(self, columns: int) -> List[str]:
+        return [
+            self.centered(self.top_border, columns),
+            self.option_line("0", "Beenden"),
+            self.option_line("1", "Zufälligen Text vorlesen"),
+            self.option_line("2", "TTS Einstellungen ändern"),
+            self.option_line("3", "TTS Status anzeigen"),
+            self.option_line("4", "Verfügbare Stimmen anzeigen"),
+            self.option_line("5", "Stimme ändern"),
+            self.option_line("6", "Text eingeben und vorlesen"),
+            self.option_line("7", "TTS Engine neu initialisieren"),
+            self.centered(self.bottom_border, columns),
+        ]
 
     def task_header(self) -> None:
         self.print_banner()
@@ -342,11 +5023,14 @@ class UI:
 def task_1(ui: UI) -> None:
     ui.task_header()
 
-    filename: str = "text.txt"
+    filename: str = ui.lines.path
 
     try:
-        # Check if the file exists and create it if not
-        if not os.path.exists(filename):
+        try:
+            with metrics.timer("line_pick"):
+                random_line, audio = ui.prefetcher.next()
+        except FileNotFoundError:
+            # Create the file with sample text if it does not exist
             default_lines = [
                 "Hallo!",
                 "I use Arch btw"
@@ -354,22 +5038,15 @@ def task_1(ui: UI) -> None:
             with open(filename, "w", encoding="utf-8") as file:
                 file.write('\n'.join(default_lines))
             ui.message("warning", f"Datei {filename} wurde mit Beispieltext erstellt.")
+            random_line, audio = ui.prefetcher.next()
 
-        # Read the text file
-        with open(filename, "r", encoding="utf-8") as file:
-            lines: List[str] = file.readlines()
-
-        # Clean lines
-        lines = [line.strip() for line in lines if line.strip()]
-
-        if lines:
-            random_line: str = lines[randint(0, len(lines) - 1)]
+        if random_line:
             ui.print_centered(f'"{random_line}"', "success")
 
             if ui.tts.is_initialized:
 
-                # TTS in separatem Thread für bessere UI-Responsivität
-                ui._speak_text_async(random_line)
+                # TTS im Hintergrund-Worker, das Menü bleibt bedienbar
+                ui._speak_text_async(random_line, audio)
             else:
                 ui.message("error",
                            "TTS nicht verfügbar! Installiere: pip install pyttsx3 && sudo pacman -S espeak-ng festival festival-de")
@@ -397,27 +5074,30 @@ def task_2(ui: UI) -> None:
 
     settings = ui.tts.settings
 
-    print(f"Aktuelle Einstellungen:")
-    print(f"  Geschwindigkeit: {settings['rate']} WPM")
-    print(f"  Lautstärke: {int(settings['volume'] * 100)}%")
-    print(f"  Stimme: {settings['voice']}")
-    print()
+    ui.write(f"Aktuelle Einstellungen:")
+    ui.write(f"  Geschwindigkeit: {settings['rate']} WPM")
+    ui.write(f"  Lautstärke: {int(settings['volume'] * 100)}%")
+    ui.write(f"  Stimme: {settings['voice']}")
+    ui.write()
 
     try:
         new_speed = ui.input_prompt(f"Neue Geschwindigkeit (50-400, aktuell {settings['rate']})")
         if new_speed.strip():
             speed = int(new_speed)
-            ui.tts.change_settings(rate=speed)
+            with ui.screen.capture():
+                ui.tts.change_settings(rate=speed)
 
         new_volume = ui.input_prompt(f"Neue Lautstärke (0-100%, aktuell {int(settings['volume'] * 100)}%)")
         if new_volume.strip():
             volume = int(new_volume) / 100.0
-            ui.tts.change_settings(volume=volume)
+            with ui.screen.capture():
+                ui.tts.change_settings(volume=volume)
 
         # Test the new settings
         test = ui.input_prompt("Einstellungen testen? (y/n)")
         if test.lower() == 'y':
-            ui.tts.test_voice("Test wird gestartet...")
+            with ui.screen.capture():
+                ui.tts.test_voice("Test wird gestartet...")
 
     except ValueError:
         ui.message("error", "Ungültige Eingabe!")
@@ -430,14 +5110,19 @@ def task_3(ui: UI) -> None:
     ui.task_header()
     ui.print_centered("TTS Status", "accent")
 
-    print(ui.tts.get_status())
-    print()
+    ui.write(ui.tts.get_status())
+    prefetcher = ui.prefetcher
+    if prefetcher.hits or prefetcher.misses:
+        ui.write(f"Vorab-Rendering: {prefetcher.hits} Treffer / {prefetcher.misses} Fehlschläge, "
+                 f"{prefetcher.buffered_bytes / 1024:.0f} KB gepuffert")
+    ui.write()
 
     if ui.tts.is_initialized:
         ui.print_centered(ui.bottom_border)
         test = ui.input_prompt("Status-Test durchführen? (y/n)")
         if test.lower() == 'y':
-            ui.tts.test_voice("Test für TTS Engine wird gestartet...")
+            with ui.screen.capture():
+                ui.tts.test_voice("Test für TTS Engine wird gestartet...")
 
     ui.input_prompt("Enter drücken um zum Menü zurückzukehren")
 
@@ -446,7 +5131,8 @@ def task_4(ui: UI) -> None:
     ui.task_header()
     ui.print_centered("Verfügbare Stimmen", "accent")
 
-    ui.tts.list_voices()
+    with ui.screen.capture():
+        ui.tts.list_voices()
 
     ui.print_centered(ui.bottom_border)
     ui.input_prompt("Enter drücken um zum Menü zurückzukehren")
@@ -462,18 +5148,36 @@ def task_5(ui: UI) -> None:
         ui.input_prompt("Enter drücken um zum Menü zurückzukehren")
         return
 
-    ui.tts.list_voices()
+    with ui.screen.capture():
+        ui.tts.list_voices()
 
     try:
         ui.print_centered(ui.bottom_border)
-        voice_input = ui.input_prompt("Stimmen-Nummer eingeben")
+        voice_input = ui.input_prompt("Stimmen-Nummer oder Suchbegriff eingeben (z.B. de, festival)")
+
+        # Non-numeric input searches the voice catalog first
+        if voice_input.strip() and not voice_input.strip().isdigit():
+            matches = ui.tts.catalog.search(voice_input)
+            if not matches:
+                ui.message("warning", f"Keine Stimme gefunden für: {voice_input.strip()}")
+                voice_input = ""
+            else:
+                ui.task_header()
+                with ui.screen.capture():
+                    ui.tts.list_voices(matches)
+                ui.print_centered(ui.bottom_border)
+                voice_input = ui.input_prompt("Stimmen-Nummer eingeben")
+
         if voice_input.strip():
             voice_index = int(voice_input)
 
-            if ui.tts.change_voice(voice_index):
+            with ui.screen.capture():
+                changed = ui.tts.change_voice(voice_index)
+            if changed:
                 test = ui.input_prompt("Neue Stimme testen? (y/n)")
                 if test.lower() == 'y':
-                    ui.tts.test_voice("Hallo! Dies ist die neue Stimme.")
+                    with ui.screen.capture():
+                        ui.tts.test_voice("Hallo! Dies ist die neue Stimme.")
             else:
                 ui.message("error", "Ungültige Stimmen-Nummer!")
 
@@ -515,7 +5219,8 @@ def task_7(ui: UI) -> None:
     ui.print_centered("TTS Engine neu initialisieren", "accent")
 
     ui.message("warning", "TTS Engine wird neu initialisiert...")
-    ui.tts.reinitialize()
+    with ui.screen.capture():
+        ui.tts.reinitialize()
 
     if ui.tts.is_initialized:
         ui.message("success", "TTS Engine erfolgreich neu initialisiert!")
@@ -534,10 +5239,761 @@ def error(ui: UI) -> None:
     ui.input_prompt("Enter drücken um zum Menü zurückzukehren")
 
 
+# -----------------------------------------------------------------------------
+# BENCHMARKS
+# -----------------------------------------------------------------------------
+def _timing_summary(timings: List[float]) -> dict:
+    return {
+        "runs": len(timings),
+        "min_ms": round(min(timings) * 1000, 3),
+        "median_ms": round(statistics.median(timings) * 1000, 3),
+        "max_ms": round(max(timings) * 1000, 3),
+    }
+
+
+def benchmark_startup(runs: int = 5) -> dict:
+    """Measure the time from constructing the UI until the menu could be drawn
+
+    "cold" removes the voice cache before every run and therefore includes
+    pyttsx3.init() plus the voice scan, "warm" restores everything from the
+    cache and must not create an engine at all. Runs use a voice cache and
+    phrase file in a temporary directory, the user's files are not touched.
+    """
+    results = {}
+    with tempfile.TemporaryDirectory(prefix="trashtalk-startup-") as directory:
+        voice_cache_path = os.path.join(directory, "voices.json")
+        corpus_path = os.path.join(directory, "text.txt")
+        with open(corpus_path, "w", encoding="utf-8") as file:
+            file.write("\n".join(BENCHMARK_CORPUS) + "\n")
+
+        for mode in ("cold", "warm"):
+            timings = []
+            engine_created = False
+            for _ in range(runs):
+                if mode == "cold" and os.path.exists(voice_cache_path):
+                    os.remove(voice_cache_path)
+                gc.collect()
+
+                start = time.perf_counter()
+                ui = UI(ArchTTS(voice_cache_path=voice_cache_path), corpus_path)
+                timings.append(time.perf_counter() - start)
+
+                engine_created = engine_created or ui.tts.tts_engine is not None
+                ui.speaker.shutdown()
+                ui.prefetcher.close()
+                ui.lines.close()
+                del ui
+
+            results[mode] = dict(_timing_summary(timings), engine_created=engine_created)
+
+    if results["warm"]["median_ms"]:
+        results["speedup"] = round(results["cold"]["median_ms"] / results["warm"]["median_ms"], 1)
+    return results
+
+
+BENCHMARK_CORPUS = (
+    "Hallo!",
+    "I use Arch btw",
+    "Das ist ein kurzer deutscher Satz.",
+    "This is a slightly longer English sentence used to measure synthesis speed.",
+    "Ein längerer Absatz mit mehreren Sätzen. Er misst, wie schnell der erste Satz hörbar wird. "
+    "Danach folgen noch weitere Sätze, damit die Gesamtdauer deutlich länger ist. Ende.",
+)
+
+
+class FakeEngine:
+    """In-process stand-in for a pyttsx3 engine, benchmarks without audio hardware
+
+    Synthesis cost is simulated from the text length and save_to_file
+    writes silent WAV files whose length follows the configured rate.
+    """
+
+    SAMPLE_RATE = 22050
+
+    def __init__(self, chars_per_second: float = 20000.0) -> None:
+        self.chars_per_second = chars_per_second
+        self._properties = {
+            "rate": 200,
+            "volume": 1.0,
+            "voice": None,
+            "voices": [
+                VoiceInfo("fake/de", "Fake Deutsch", ["de"]),
+                VoiceInfo("fake/en-us", "Fake English", ["en-us"]),
+                VoiceInfo("festival_de_fake", "Fake festival-de", ["de"]),
+            ],
+        }
+        self._queue: List[Tuple[str, Optional[str]]] = []
+        self._callbacks: Dict[str, dict] = {}
+        self._next_token = 0
+
+    def getProperty(self, name):
+        return self._properties[name]
+
+    def setProperty(self, name, value) -> None:
+        self._properties[name] = value
+
+    def connect(self, topic: str, callback):
+        self._next_token += 1
+        self._callbacks.setdefault(topic, {})[self._next_token] = callback
+        return topic, self._next_token
+
+    def disconnect(self, token) -> None:
+        topic, number = token
+        self._callbacks.get(topic, {}).pop(number, None)
+
+    def say(self, text: str, name=None) -> None:
+        self._queue.append((text, None))
+
+    def save_to_file(self, text: str, filename: str, name=None) -> None:
+        self._queue.append((text, filename))
+
+    def runAndWait(self) -> None:
+        queued, self._queue = self._queue, []
+        for text, filename in queued:
+            time.sleep(len(text) / self.chars_per_second)
+            self._notify("started-utterance", name=None)
+            if filename:
+                words = max(1, len(text.split()))
+                frames = int(words * 60.0 / self._properties["rate"] * self.SAMPLE_RATE)
+                with wave.open(filename, "wb") as wav_file:
+                    wav_file.setnchannels(1)
+                    wav_file.setsampwidth(2)
+                    wav_file.setframerate(self.SAMPLE_RATE)
+                    wav_file.writeframes(bytes(frames * 2))
+            self._notify("finished-utterance", name=None, completed=True)
+
+    def stop(self) -> None:
+        self._queue = []
+
+    def _notify(self, topic: str, **kwargs) -> None:
+        for callback in list(self._callbacks.get(topic, {}).values()):
+            callback(**kwargs)
+
+
+BENCHMARK_BACKENDS = {
+    "fake": FakeEngine,
+    "pyttsx3": None,  # ArchTTS default
+}
+
+
+def _percentile(values: List[float], percent: float) -> float:
+    """Linear interpolation between the closest ranks"""
+    ordered = sorted(values)
+    position = (len(ordered) - 1) * percent / 100.0
+    lower = int(position)
+    upper = min(lower + 1, len(ordered) - 1)
+    return ordered[lower] + (ordered[upper] - ordered[lower]) * (position - lower)
+
+
+def _distribution(values: List[float], scale: float = 1000.0, digits: int = 3) -> dict:
+    if not values:
+        return {}
+    return {
+        "mean": round(statistics.fmean(values) * scale, digits),
+        "p50": round(_percentile(values, 50) * scale, digits),
+        "p95": round(_percentile(values, 95) * scale, digits),
+        "p99": round(_percentile(values, 99) * scale, digits),
+        "max": round(max(values) * scale, digits),
+    }
+
+
+def load_benchmark_corpus(files: List[str], max_lines: int) -> List[str]:
+    """Built-in sentences plus up to max_lines lines of every given file"""
+    corpus = list(BENCHMARK_CORPUS)
+    for path in files:
+        store = LineStore(path)
+        try:
+            corpus.extend(parse_phrase(store.line(number))[0] for number in range(min(len(store), max_lines)))
+        except FileNotFoundError:
+            continue
+        finally:
+            store.close()
+    return corpus
+
+
+def run_benchmark(backend: str = "fake", rates: Tuple[int, ...] = (160,),
+                  voice_backends: Tuple[Optional[str], ...] = (None,),
+                  corpus: Optional[List[str]] = None, repeat: int = 3) -> dict:
+    """Measure init time, time to first audio, real-time factor and latencies
+
+    Every utterance is rendered to a temporary WAV file, so nothing is
+    played back. Time to first audio is the render time of the first
+    sentence, which is what the streaming path waits for on a cache miss.
+    """
+    corpus = corpus or list(BENCHMARK_CORPUS)
+    engine_factory = BENCHMARK_BACKENDS[backend]
+    runs = []
+
+    with tempfile.TemporaryDirectory(prefix="trashtalk-bench-") as work_dir:
+        for voice_backend in voice_backends:
+            for rate in rates:
+                # Fresh instance and voice cache for every run -> cold engine
+                start = time.perf_counter()
+                tts = ArchTTS(engine_factory=engine_factory,
+                              voice_cache_path=os.path.join(work_dir, f"voices-{len(runs)}.json"))
+                engine_ready = tts.is_initialized and tts._ensure_engine()
+                init_time = time.perf_counter() - start
+
+                run = {"backend": backend, "voice_backend": voice_backend or "auto", "rate": rate,
+                       "init_ms": round(init_time * 1000, 3)}
+                runs.append(run)
+                if not engine_ready:
+                    run["error"] = "Engine konnte nicht initialisiert werden"
+                    continue
+
+                if voice_backend:
+                    voices = tts.catalog.by_backend(voice_backend)
+                    if not voices:
+                        run["error"] = f"Keine Stimme für Backend {voice_backend}"
+                        continue
+                    tts.current_voice_id = voices[0].id
+                tts.settings["rate"] = max(50, min(400, rate))
+                tts.audio_cache = None
+                run["voice"] = tts.current_voice_id
+
+                synth_times, first_audio, real_time_factors = [], [], []
+                audio_seconds = characters = 0.0
+                path = os.path.join(work_dir, "utterance.wav")
+                for iteration in range(repeat):
+                    for text in corpus:
+                        start = time.perf_counter()
+                        tts.render_to_file(split_sentences(text)[0], path)
+                        first_audio.append(time.perf_counter() - start)
+
+                        start = time.perf_counter()
+                        if not tts.render_to_file(text, path):
+                            continue
+                        elapsed = time.perf_counter() - start
+                        duration = wav_duration(path)
+
+                        if "first_utterance_ms" not in run:
+                            run["first_utterance_ms"] = round(elapsed * 1000, 3)
+                        synth_times.append(elapsed)
+                        if duration:
+                            real_time_factors.append(elapsed / duration)
+                        audio_seconds += duration
+                        characters += len(text)
+
+                total_synth = sum(synth_times)
+                run.update({
+                    "utterances": len(synth_times),
+                    "synth_ms": _distribution(synth_times),
+                    "time_to_first_audio_ms": _distribution(first_audio),
+                    "real_time_factor": _distribution(real_time_factors, scale=1.0, digits=4),
+                    "audio_seconds": round(audio_seconds, 3),
+                    "chars_per_second": round(characters / total_synth, 1) if total_synth else 0.0,
+                })
+
+    return {
+        "meta": {
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "backend": backend,
+            "corpus_size": len(corpus),
+            "repeat": repeat,
+        },
+        "runs": runs,
+        # ru_maxrss is reported in kilobytes on Linux
+        "peak_rss_kb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+    }
+
+
+# -----------------------------------------------------------------------------
+# COMMAND LINE
+# -----------------------------------------------------------------------------
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(description="TT Tool - ohne Befehl startet das Menü")
+    parser.add_argument("--metrics", default=os.environ.get("TRASHTALK_METRICS"),
+                        help="Metriken aufzeichnen: memory, jsonl:DATEI, prom:DATEI (kommagetrennt)")
+    parser.add_argument("--soundbank", default=None, help="Vorgerenderte Phrasen aus dieser Soundbank abspielen")
+    parser.add_argument("--backend", choices=ArchTTS.BACKENDS,
+                        default=os.environ.get("TRASHTALK_BACKEND", "pyttsx3"),
+                        help="Synthese über pyttsx3 oder direkt über libespeak-ng")
+    # Own dest: render, batch and benchmark have an "output" of their own
+    parser.add_argument("--output", dest="audio_output", default=os.environ.get("TRASHTALK_OUTPUT"),
+                        help="Audio über Ringpuffer ausgeben: device, null, null:realtime, wav:DATEI")
+    parser.add_argument("--latency", type=float, default=0.1,
+                        help="Puffer der Audio-Ausgabe in Sekunden (Standard: 0.1)")
+    parser.add_argument("--postprocess", default=os.environ.get("TRASHTALK_POSTPROCESS"),
+                        help="Audio mit NumPy nachbearbeiten, z.B. trim,rms:-20 oder trim,peak,resample:16000")
+    parser.add_argument("--timing", action="store_true",
+                        help="Zeit vom Prozessstart bis zum ersten Audio ausgeben (stderr)")
+    commands = parser.add_subparsers(dest="command")
+
+    # One-shot commands for scripts, cron jobs and hooks; they never build the UI.
+    # Call them as "python -m main", a script passed by path is recompiled on every start
+    speak = commands.add_parser("speak", help="Text vorlesen und beenden (ohne Text: stdin)")
+    speak.add_argument("text", nargs="*", help="Vorzulesender Text")
+    _add_voice_arguments(speak)
+
+    random_line = commands.add_parser("random", help="Zufällige Zeile aus der Textdatei vorlesen")
+    random_line.add_argument("--file", default="text.txt", help="Textdatei (Standard: text.txt)")
+    random_line.add_argument("--tag", default=None, help="Nur Zeilen mit diesem Tag")
+    random_line.add_argument("--print-only", action="store_true", help="Zeile nur ausgeben, nicht vorlesen")
+    _add_voice_arguments(random_line)
+
+    voices = commands.add_parser("voices", help="Verfügbare Stimmen auflisten")
+    voices.add_argument("query", nargs="?", default=None, help="Suchbegriff, z.B. de oder festival")
+    voices.add_argument("--json", action="store_true", help="Ausgabe als JSON")
+
+    render = commands.add_parser("render", help="Text in eine WAV-Datei rendern")
+    render.add_argument("text", nargs="*", help="Zu rendernder Text (ohne Text: stdin)")
+    render.add_argument("-o", "--output", required=True, help="Ziel-WAV-Datei")
+    _add_voice_arguments(render)
+
+    watch = commands.add_parser("watch", help="Datei oder Named Pipe verfolgen und neue Zeilen vorlesen")
+    watch.add_argument("path", help="Datei (wie tail -F) oder Named Pipe")
+    watch.add_argument("--from-start", action="store_true", help="Vorhandenen Inhalt der Datei mit vorlesen")
+    watch.add_argument("--rate", type=float, default=20.0, help="Äußerungen pro Minute im Mittel (Standard: 20)")
+    watch.add_argument("--burst", type=int, default=3, help="Äußerungen, die sofort erlaubt sind (Standard: 3)")
+    watch.add_argument("--dedupe", type=float, default=30.0,
+                       help="Gleiche Zeilen innerhalb so vieler Sekunden verwerfen (0 = aus)")
+    watch.add_argument("--coalesce", type=float, default=0.5,
+                       help="Zeilen innerhalb so vieler Sekunden zusammenfassen (Standard: 0.5)")
+    watch.add_argument("--max-lines", type=int, default=3, help="Zeilen pro zusammengefasster Äußerung")
+    watch.add_argument("--queue-size", type=int, default=4, help="Maximale Länge der Sprachwarteschlange")
+    watch.add_argument("--policy", choices=SpeechWorker.POLICIES, default="drop-oldest",
+                       help="Verhalten bei voller Warteschlange")
+    watch.add_argument("--poll", type=float, default=0.5, help="Abfrageintervall ohne inotify in Sekunden")
+
+    render_queue = commands.add_parser("queue", help="Fortsetzbare Render-Warteschlange in einer SQLite-Datei")
+    queue_commands = render_queue.add_subparsers(dest="queue_command", required=True)
+    queue_init = queue_commands.add_parser("init", help="Aufträge für jede Zeile einer Textdatei anlegen")
+    queue_init.add_argument("db", help="Warteschlangen-Datei")
+    queue_init.add_argument("input", help="Textdatei, eine Zeile pro Audiodatei")
+    queue_init.add_argument("output", help="Zielverzeichnis für WAV-Dateien")
+    queue_init.add_argument("--voice", default=None, help="Stimmen-ID (Standard: automatisch)")
+    queue_init.add_argument("--rate", type=int, default=None, help="Geschwindigkeit in WPM")
+    queue_init.add_argument("--volume", type=float, default=None, help="Lautstärke 0.0 - 1.0")
+    queue_init.add_argument("--max-attempts", type=int, default=3, help="Versuche pro Zeile (Standard: 3)")
+    queue_init.add_argument("--journal", choices=RenderQueue.JOURNAL_MODES, default="wal",
+                            help="SQLite-Journal; delete für Dateien auf NFS (Standard: wal)")
+    queue_work = queue_commands.add_parser("work", help="Aufträge abarbeiten, bis die Warteschlange leer ist")
+    queue_work.add_argument("db", help="Warteschlangen-Datei")
+    queue_work.add_argument("-j", "--workers", type=int, default=1, help="Anzahl Prozesse (Standard: 1)")
+    queue_work.add_argument("--batch-size", type=int, default=16, help="Aufträge pro Abholung")
+    queue_work.add_argument("--lease", type=float, default=120.0,
+                            help="Sekunden, nach denen liegengebliebene Aufträge neu vergeben werden")
+    queue_status = queue_commands.add_parser("status", help="Fortschritt anzeigen")
+    queue_status.add_argument("db", help="Warteschlangen-Datei")
+    queue_status.add_argument("--json", action="store_true", help="Ausgabe als JSON")
+    queue_retry = queue_commands.add_parser("retry", help="Fehlgeschlagene Aufträge erneut einreihen")
+    queue_retry.add_argument("db", help="Warteschlangen-Datei")
+
+    soundbank = commands.add_parser("soundbank", help="Soundbank-Datei bauen, verdichten oder anzeigen")
+    soundbank.add_argument("action", choices=("build", "compact", "info"))
+    soundbank.add_argument("bank", help="Soundbank-Datei")
+    soundbank.add_argument("corpus", nargs="?", default="text.txt", help="Textdatei für build (Standard: text.txt)")
+
+    batch = commands.add_parser("batch", help="Textdatei komplett in WAV-Dateien rendern")
+    batch.add_argument("input", help="Textdatei, eine Zeile pro Audiodatei")
+    batch.add_argument("output", help="Zielverzeichnis für WAV-Dateien und manifest.json")
+    batch.add_argument("-j", "--workers", type=int, default=None, help="Anzahl Prozesse (Standard: CPU-Kerne)")
+    batch.add_argument("--chunksize", type=int, default=None, help="Zeilen pro Arbeitspaket")
+    batch.add_argument("--voice", default=None, help="Stimmen-ID (Standard: automatisch)")
+    batch.add_argument("--rate", type=int, default=None, help="Geschwindigkeit in WPM")
+    batch.add_argument("--volume", type=float, default=None, help="Lautstärke 0.0 - 1.0")
+
+    benchmark = commands.add_parser("benchmark", help="Latenz und Durchsatz des TTS-Pfads messen (JSON)")
+    benchmark.add_argument("--backend", choices=sorted(BENCHMARK_BACKENDS), default="pyttsx3",
+                           help="fake läuft ohne Audio-Hardware, z.B. auf CI")
+    benchmark.add_argument("--rates", type=_int_list, default=[160], help="Geschwindigkeiten, z.B. 120,160,240")
+    benchmark.add_argument("--voices", type=_str_list, default=[None],
+                           help="Stimmen-Backends, z.B. espeak,festival (Standard: automatisch)")
+    benchmark.add_argument("--corpus", action="append", default=None,
+                           help="Zusätzliche Textdatei (mehrfach möglich, Standard: text.txt)")
+    benchmark.add_argument("--max-lines", type=int, default=50, help="Höchstens so viele Zeilen pro Datei")
+    benchmark.add_argument("--repeat", type=int, default=3, help="Durchläufe über den Korpus")
+    benchmark.add_argument("-o", "--output", default=None, help="JSON in Datei statt stdout schreiben")
+
+    serve = commands.add_parser("serve", help="HTTP-Sprachserver (TCP oder Unix-Socket) starten")
+    serve.add_argument("--host", default="127.0.0.1", help="Adresse (Standard: 127.0.0.1)")
+    serve.add_argument("--port", type=int, default=8765, help="Port (Standard: 8765)")
+    serve.add_argument("--unix", default=None, help="Unix-Socket-Pfad statt TCP")
+    serve.add_argument("--batch-size", type=int, default=16, help="Render-Anfragen pro Engine-Durchlauf")
+    serve.add_argument("--queue-size", type=int, default=64, help="Maximale Länge der Sprach-Warteschlange")
+    serve.add_argument("--policy", choices=SpeechWorker.POLICIES, default="reject",
+                       help="Verhalten bei voller Warteschlange")
+    serve.add_argument("--pool-size", type=int, default=0,
+                       help="Engine-Prozesse für /render mit eigener Stimme (0 = aus)")
+    serve.add_argument("--pool-idle", type=float, default=60.0,
+                       help="Sekunden, nach denen ungenutzte Engine-Prozesse beendet werden")
+
+    bench_startup = commands.add_parser("bench-startup", help="Startzeit bis zum Menü messen (kalt/warm)")
+    bench_startup.add_argument("-n", "--runs", type=int, default=5, help="Messungen pro Modus")
+
+    return parser
+
+
+def _int_list(value: str) -> List[int]:
+    return [int(part) for part in value.split(",") if part.strip()]
+
+
+def _str_list(value: str) -> List[str]:
+    return [part.strip() for part in value.split(",") if part.strip()]
+
+
+def command_benchmark(args: argparse.Namespace) -> int:
+    corpus = load_benchmark_corpus(args.corpus or ["text.txt"], args.max_lines)
+    report = run_benchmark(args.backend, tuple(args.rates), tuple(args.voices), corpus, args.repeat)
+
+    output = json.dumps(report, ensure_ascii=False, indent=2)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as file:
+            file.write(output + "\n")
+    else:
+        print(output)
+    return 0 if not any("error" in run for run in report["runs"]) else 1
+
+
+def command_serve(args: argparse.Namespace) -> int:
+    import asyncio
+
+    tts = ArchTTS.shared()
+    if not tts.is_initialized:
+        return 1
+
+    speaker = SpeechWorker(tts, maxsize=args.queue_size, policy=args.policy)
+    pool = None
+    if args.pool_size > 0:
+        postprocess = args.postprocess if tts.postprocessor is not None else None
+        pool = EnginePool(args.pool_size, args.pool_idle, tts.engine_factory,
+                          backend=tts.backend, postprocess=postprocess)
+    server = SpeechServer(tts, speaker, batch_size=args.batch_size, pool=pool)
+    try:
+        asyncio.run(server.serve(args.host, args.port, args.unix))
+    except KeyboardInterrupt:
+        print("\nServer wird beendet...")
+    finally:
+        speaker.shutdown()
+        if pool is not None:
+            pool.close()
+    return 0
+
+
+def _add_voice_arguments(parser: argparse.ArgumentParser) -> None:
+    parser.add_argument("--voice", default=None, help="Stimmen-Nummer, -ID oder Suchbegriff")
+    parser.add_argument("--rate", type=int, default=None, help="Geschwindigkeit in WPM")
+    parser.add_argument("--volume", type=float, default=None, help="Lautstärke 0.0 - 1.0")
+
+
+def _read_text(args: argparse.Namespace) -> str:
+    return " ".join(args.text) if args.text else sys.stdin.read().strip()
+
+
+def _one_shot_tts(args: argparse.Namespace) -> Optional[ArchTTS]:
+    """ArchTTS with the voice options of a one-shot command applied
+
+    Status messages go to stderr so stdout stays usable in pipes.
+    """
+    with contextlib.redirect_stdout(sys.stderr):
+        tts = ArchTTS.shared()
+        if not tts.is_initialized:
+            return None
+
+        if args.voice is not None:
+            if args.voice.isdigit():
+                index = int(args.voice)
+            else:
+                index = tts.catalog.index_of(args.voice)
+                if index is None:
+                    matches = tts.catalog.search(args.voice)
+                    index = matches[0] if matches else None
+            if index is None or not tts.change_voice(index):
+                print(f"Keine Stimme gefunden für: {args.voice}")
+                return None
+
+        tts.change_settings(rate=args.rate, volume=args.volume)
+    return tts
+
+
+def _speak_once(tts: ArchTTS, text: str, timing: bool) -> int:
+    # Everything before speak_text() is startup cost of this process
+    startup = process_uptime()
+    with contextlib.redirect_stdout(sys.stderr):
+        spoken = tts.speak_text(text)
+
+    if tts.last_time_to_first_audio is not None:
+        total = startup + tts.last_time_to_first_audio
+        metrics.observe("process_to_audio", total)
+        if timing:
+            print(f"Start bis Audio: {total * 1000:.0f} ms (Prozess {startup * 1000:.0f} ms, "
+                  f"Synthese {tts.last_time_to_first_audio * 1000:.0f} ms)", file=sys.stderr)
+    return 0 if spoken else 1
+
+
+def command_speak(args: argparse.Namespace) -> int:
+    text = _read_text(args)
+    if not text:
+        print("Kein Text eingegeben!", file=sys.stderr)
+        return 1
+
+    tts = _one_shot_tts(args)
+    if tts is None:
+        return 1
+    return _speak_once(tts, text, args.timing)
+
+
+def command_random(args: argparse.Namespace) -> int:
+    try:
+        store = LineStore(args.file)
+        # Window mode remembers recent picks only in memory, useless for one pick
+        text = PhraseSampler(store, mode="weighted").pick(args.tag)
+    except (FileNotFoundError, IOError, OSError) as e:
+        print(f"Fehler beim Verarbeiten der Datei: {e}", file=sys.stderr)
+        return 1
+
+    if not text:
+        print("Die Textdatei enthält keine passenden Zeilen.", file=sys.stderr)
+        return 1
+
+    print(text, flush=True)
+    if args.print_only:
+        return 0
+
+    tts = _one_shot_tts(args)
+    if tts is None:
+        return 1
+    return _speak_once(tts, text, args.timing)
+
+
+def command_voices(args: argparse.Namespace) -> int:
+    with contextlib.redirect_stdout(sys.stderr):
+        tts = ArchTTS.shared()
+    catalog = tts.catalog
+    indices = catalog.search(args.query) if args.query else list(range(len(catalog.voices)))
+
+    if args.json:
+        print(json.dumps([dict(VoiceInfo.from_voice(catalog.voices[index]).to_dict(), index=index,
+                               backend=catalog.backend_of(index)) for index in indices], indent=2))
+    else:
+        for index in indices:
+            voice = catalog.voices[index]
+            current = "*" if voice.id == tts.current_voice_id else " "
+            print(f"{current} {index:3d}  {voice.id}  {voice.name}  "
+                  f"[{', '.join(catalog.languages_of(index)) or '-'}, {catalog.backend_of(index)}]")
+    return 0 if indices else 1
+
+
+def command_render(args: argparse.Namespace) -> int:
+    text = _read_text(args)
+    if not text:
+        print("Kein Text eingegeben!", file=sys.stderr)
+        return 1
+
+    tts = _one_shot_tts(args)
+    if tts is None:
+        return 1
+    with contextlib.redirect_stdout(sys.stderr):
+        return 0 if tts.render_to_file(text, args.output) else 1
+
+
+def _queue_worker(path: str, batch_size: int, lease: float) -> None:
+    try:
+        work_queue(path, batch_size=batch_size, lease=lease)
+    except KeyboardInterrupt:
+        pass
+
+
+def command_watch(args: argparse.Namespace) -> int:
+    tts = ArchTTS.shared()
+    if not tts.is_initialized:
+        return 1
+
+    try:
+        follower = open_follower(args.path, args.from_start, args.poll)
+    except OSError as e:
+        print(f"Fehler beim Verarbeiten der Datei: {e}")
+        return 1
+
+    speaker = SpeechWorker(tts, maxsize=args.queue_size, policy=args.policy)
+    feeder = WatchFeeder(speaker, rate=args.rate, burst=args.burst, dedupe=args.dedupe,
+                         coalesce=args.coalesce, max_lines=args.max_lines)
+    print(f"Beobachte {args.path} (Strg+C beendet)", file=sys.stderr)
+    try:
+        while True:
+            due = feeder.due()
+            for line in follower.read_lines(args.poll if due is None else due):
+                feeder.add(line)
+            feeder.flush()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        follower.close()
+        speaker.shutdown()
+
+    stats = feeder.stats
+    print(f"\n{stats['lines']} Zeilen, {stats['utterances']} gesprochen, {stats['duplicates']} doppelt, "
+          f"{stats['rate_limited']} gedrosselt, {stats['rejected']} abgewiesen", file=sys.stderr)
+    return 0
+
+
+def command_queue(args: argparse.Namespace) -> int:
+    import sqlite3
+
+    try:
+        if args.queue_command == "init":
+            queue_db = RenderQueue(args.db, journal_mode=args.journal)
+            added = queue_db.add_corpus(args.input, args.output, voice_id=args.voice, rate=args.rate,
+                                        volume=args.volume, backend=args.backend,
+                                        max_attempts=args.max_attempts)
+            print(f"{added} neue Aufträge, {queue_db.status()['total']} insgesamt")
+            queue_db.close()
+            return 0
+
+        if args.queue_command == "work":
+            if args.workers <= 1:
+                try:
+                    work_queue(args.db, batch_size=args.batch_size, lease=args.lease)
+                except KeyboardInterrupt:
+                    return 130
+            else:
+                import multiprocessing
+
+                # Fail once here instead of in every worker process
+                queue_db = RenderQueue(args.db, create=False)
+                try:
+                    queue_db.settings()
+                finally:
+                    queue_db.close()
+
+                # Every process opens its own connection and engine; Ctrl-C reaches all of them
+                context = multiprocessing.get_context("spawn")
+                workers = [context.Process(target=_queue_worker, args=(args.db, args.batch_size, args.lease))
+                           for _ in range(args.workers)]
+                for worker in workers:
+                    worker.start()
+                try:
+                    for worker in workers:
+                        worker.join()
+                except KeyboardInterrupt:
+                    for worker in workers:
+                        worker.join()
+                    return 130
+
+        queue_db = RenderQueue(args.db, create=False)
+        if args.queue_command == "retry":
+            print(f"{queue_db.retry_failed()} Aufträge erneut eingereiht")
+        status = queue_db.status()
+        queue_db.close()
+    except (FileNotFoundError, IOError, OSError, ValueError, sqlite3.Error) as e:
+        print(f"Fehler beim Verarbeiten der Datei: {e}")
+        return 1
+
+    if getattr(args, "json", False):
+        print(json.dumps(status, indent=2))
+    else:
+        print(f"{status['done']}/{status['total']} fertig, {status['pending']} offen, "
+              f"{status['running']} in Arbeit ({status['workers']} Worker), {status['failed']} fehlgeschlagen, "
+              f"{status['audio_seconds']:.1f}s Audio")
+    return 0 if not status["failed"] else 1
+
+
+def command_soundbank(args: argparse.Namespace) -> int:
+    try:
+        if args.action == "build":
+            tts = ArchTTS.shared()
+            if not tts.is_initialized:
+                return 1
+            bank = Soundbank.build(args.bank, args.corpus, tts)
+        else:
+            bank = Soundbank(args.bank)
+    except (FileNotFoundError, IOError, OSError, ValueError) as e:
+        print(f"Fehler beim Verarbeiten der Datei: {e}")
+        return 1
+
+    if args.action == "compact":
+        print(f"{bank.compact() / (1024 * 1024):.1f} MB freigegeben")
+    print(f"{len(bank)} Phrasen, {os.path.getsize(args.bank) / (1024 * 1024):.1f} MB, "
+          f"Stimmen: {', '.join(str(voice) for voice in bank.voices) or '-'}")
+    bank.close()
+    return 0
+
+
+def command_batch(args: argparse.Namespace) -> int:
+    try:
+        manifest = render_batch(args.input, args.output, workers=args.workers, chunksize=args.chunksize,
+                                voice_id=args.voice, rate=args.rate, volume=args.volume, backend=args.backend,
+                                postprocess=args.postprocess)
+    except (FileNotFoundError, IOError, OSError) as e:
+        print(f"Fehler beim Verarbeiten der Datei: {e}")
+        return 1
+
+    stats = manifest["stats"]
+    print(f"{stats['rendered']}/{stats['lines']} Zeilen in {stats['wall_time']:.1f}s gerendert "
+          f"({stats['lines_per_second']} Zeilen/s, {stats['audio_seconds']:.1f}s Audio, "
+          f"{stats['workers']} Prozesse)")
+    return 0 if not stats["failed"] else 1
+
+
 # -----------------------------------------------------------------------------
 # MAIN PROGRAM
 # -----------------------------------------------------------------------------
-def main() -> None:
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = build_parser()
+    args = parser.parse_args(argv)
+
+    try:
+        configure_metrics(args.metrics)
+    except (ValueError, OSError) as e:
+        parser.error(str(e))
+
+    try:
+        return run_command(args)
+    finally:
+        metrics.flush()
+
+
+def run_command(args: argparse.Namespace) -> int:
+    if args.backend != "pyttsx3" and args.command not in ("batch", "benchmark", "bench-startup", "queue"):
+        with contextlib.redirect_stdout(sys.stderr):
+            ArchTTS.shared().use_backend(args.backend)
+    if args.audio_output and args.command not in ("batch", "benchmark", "bench-startup", "soundbank", "queue"):
+        try:
+            sink = create_sink(args.audio_output)
+        except (ValueError, OSError) as e:
+            print(f"Audio-Ausgabe nicht verfügbar: {e}", file=sys.stderr)
+            return 1
+        ArchTTS.shared().use_output(sink, args.latency)
+    if args.postprocess:
+        try:
+            processor = AudioProcessor.from_spec(args.postprocess)
+        except (ImportError, ValueError) as e:
+            print(f"Nachbearbeitung nicht verfügbar: {e}", file=sys.stderr)
+            return 1
+        if args.command not in ("batch", "benchmark", "bench-startup", "queue"):
+            with contextlib.redirect_stdout(sys.stderr):
+                ArchTTS.shared().use_postprocessing(processor)
+    if args.soundbank and args.command != "soundbank":
+        try:
+            ArchTTS.shared().soundbank = Soundbank(args.soundbank)
+        except (OSError, ValueError) as e:
+            print(f"Soundbank nicht geladen: {e}")
+
+    if args.command == "speak":
+        return command_speak(args)
+    if args.command == "random":
+        return command_random(args)
+    if args.command == "voices":
+        return command_voices(args)
+    if args.command == "render":
+        return command_render(args)
+    if args.command == "watch":
+        return command_watch(args)
+    if args.command == "queue":
+        return command_queue(args)
+    if args.command == "soundbank":
+        return command_soundbank(args)
+    if args.command == "batch":
+        return command_batch(args)
+    if args.command == "benchmark":
+        return command_benchmark(args)
+    if args.command == "serve":
+        return command_serve(args)
+    if args.command == "bench-startup":
+        print(json.dumps(benchmark_startup(args.runs), indent=2))
+        return 0
 
     print("pyttsx3 gefunden")
     
@@ -559,7 +6015,7 @@ def main() -> None:
             match command:
                 case "0":
                     print("UwU")
-                    return
+                    return 0
                 case "1":
                     task_1(ui)
                 case "2":
@@ -581,7 +6037,12 @@ def main() -> None:
         print("\nProgramm wird beendet...")
     except Exception as e:
         print(f"Unerwarteter Fehler: {e}")
+    finally:
+        ui.prefetcher.close()
+        ui.speaker.shutdown()
+
+    return 0
 
 
 if __name__ == "__main__":
-    main()
+    raise SystemExit(main())
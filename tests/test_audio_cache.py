@@ -0,0 +1,73 @@
+import os
+
+import main
+
+
+def store(cache, key, size):
+    temp_path = cache.temp_path_for(key)
+    with open(temp_path, "wb") as file:
+        file.write(bytes(size))
+    return cache.store(key, temp_path)
+
+
+def test_key_depends_on_text_and_voice_settings():
+    key = main.AudioCache.make_key("Hallo  Welt", "de", 150, 1.0)
+    assert key == main.AudioCache.make_key("Hallo Welt", "de", 150, 1.0)
+    assert key != main.AudioCache.make_key("Hallo Welt", "en", 150, 1.0)
+    assert key != main.AudioCache.make_key("Hallo Welt", "de", 160, 1.0)
+    assert key != main.AudioCache.make_key("Hallo Welt", "de", 150, 0.5)
+
+
+def test_lookup_hit_and_miss(tmp_path):
+    cache = main.AudioCache(str(tmp_path), max_bytes=1000)
+    assert cache.lookup("a") is None
+    path = store(cache, "a", 100)
+    assert cache.lookup("a") == path
+    assert (cache.hits, cache.misses) == (1, 1)
+
+
+def test_evicts_least_recently_used(tmp_path):
+    cache = main.AudioCache(str(tmp_path), max_bytes=300)
+    for key in "abc":
+        store(cache, key, 100)
+    cache.lookup("a")
+    store(cache, "d", 100)
+
+    assert cache.lookup("b") is None
+    assert all(cache.lookup(key) for key in "acd")
+    assert cache.total_bytes == 300
+    assert not os.path.exists(cache.path_for("b"))
+
+
+def test_keeps_newest_entry_over_budget(tmp_path):
+    cache = main.AudioCache(str(tmp_path), max_bytes=100)
+    store(cache, "a", 50)
+    store(cache, "b", 500)
+    assert len(cache) == 1
+    assert cache.lookup("b")
+
+
+def test_empty_render_is_not_stored(tmp_path):
+    cache = main.AudioCache(str(tmp_path))
+    assert store(cache, "a", 0) is None
+    assert len(cache) == 0
+
+
+def test_reload_keeps_order_and_drops_leftovers(tmp_path):
+    cache = main.AudioCache(str(tmp_path), max_bytes=1000)
+    for number, key in enumerate("abc"):
+        store(cache, key, 100)
+        os.utime(cache.path_for(key), (1000 + number, 1000 + number))
+    open(cache.temp_path_for("d"), "wb").close()
+
+    reloaded = main.AudioCache(str(tmp_path), max_bytes=200)
+    assert len(reloaded) == 2
+    assert reloaded.lookup("a") is None
+    assert not any(name.endswith(".tmp.wav") for name in os.listdir(tmp_path))
+
+
+def test_clear(tmp_path):
+    cache = main.AudioCache(str(tmp_path))
+    store(cache, "a", 10)
+    cache.clear()
+    assert (len(cache), cache.total_bytes, os.listdir(tmp_path)) == (0, 0, [])
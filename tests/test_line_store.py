@@ -0,0 +1,72 @@
+import os
+
+import pytest
+
+import main
+
+
+def touch_later(path):
+    """Give the file a new mtime, even within the filesystem's timestamp resolution"""
+    stat = os.stat(path)
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10 ** 9))
+
+
+@pytest.fixture
+def text_file(tmp_path):
+    path = tmp_path / "text.txt"
+    path.write_text("eins\n\n  \nzwei\r\ndrei", encoding="utf-8")
+    return str(path)
+
+
+def test_lines_skip_blank_lines(text_file):
+    store = main.LineStore(text_file)
+    assert len(store) == 3
+    assert [store.line(number) for number in range(3)] == ["eins", "zwei", "drei"]
+    with pytest.raises(IndexError):
+        store.line(3)
+    store.close()
+
+
+def test_index_is_reused(text_file):
+    main.LineStore(text_file).refresh()
+    index_path = os.path.join(os.path.dirname(text_file), ".text.txt.idx")
+    built = os.stat(index_path).st_mtime_ns
+
+    store = main.LineStore(text_file)
+    assert len(store) == 3
+    assert os.stat(index_path).st_mtime_ns == built
+    store.close()
+
+
+def test_index_is_rebuilt_when_the_file_changes(text_file):
+    store = main.LineStore(text_file)
+    assert len(store) == 3
+    version = store.version
+
+    with open(text_file, "w", encoding="utf-8") as file:
+        file.write("neu\n")
+    touch_later(text_file)
+    assert len(store) == 1
+    assert store.line_if_current(0, version) is None
+    assert store.line(0) == "neu"
+    store.close()
+
+    # A fresh store does not trust the stale sidecar either
+    store = main.LineStore(text_file)
+    assert len(store) == 1
+    store.close()
+
+
+def test_append_extends_file_and_index(text_file):
+    store = main.LineStore(text_file)
+    store.append("vier")
+    assert len(store) == 4
+    assert store.line(3) == "vier"
+    assert open(text_file, encoding="utf-8").read().endswith("drei\nvier\n")
+    with pytest.raises(ValueError):
+        store.append("zwei\nZeilen")
+    store.close()
+
+    reopened = main.LineStore(text_file)
+    assert [reopened.line(number) for number in range(len(reopened))] == ["eins", "zwei", "drei", "vier"]
+    reopened.close()
@@ -0,0 +1,48 @@
+import pytest
+
+import main
+
+
+@pytest.mark.parametrize("text, expected", [
+    ("Das kostet 5 €", "Das kostet fünf Euro"),
+    ("1.234,50 €", "eintausendzweihundertvierunddreißig Euro fünfzig Cent"),
+    ("€0,99", "neunundneunzig Cent"),
+    ("2,5 € und 12:00", "zwei Komma fünf Euro und zwölf Uhr"),
+    ("Um 12:30 Uhr", "Um zwölf Uhr dreißig"),
+    ("Es hat -5 Grad", "Es hat minus fünf Grad"),
+    ("Seite 5-10", "Seite fünf - zehn"),
+    ("Der 1. Platz", "Der erste Platz"),
+    ("am 3. Mai", "am dritten Mai"),
+    ("Ich habe 3. Dann gehe ich.", "Ich habe drei. Dann gehe ich."),
+    ("Version 2.5", "Version zwei Punkt fünf"),
+    ("Nr. 5", "Nummer fünf"),
+    ("Äpfel, Birnen usw.", "Äpfel, Birnen und so weiter."),
+    ("z.B. heute", "zum Beispiel heute"),
+    ("LG Fernseher", "LG Fernseher"),
+    ("lg und MfG", "liebe Grüße und mit freundlichen Grüßen"),
+    ("50%", "fünfzig Prozent"),
+])
+def test_german(text, expected):
+    assert main.normalize_text(text, "de") == expected
+
+
+@pytest.mark.parametrize("text, expected", [
+    ("$5.50", "five dollars fifty cents"),
+    ("$1", "one dollar"),
+    ("the 1st, 2nd, 3rd and 21st", "the first, second, third and twenty-first"),
+    ("the 12th and 1,000th", "the twelfth and one thousandth"),
+    ("at 12:05 or 7:00", "at twelve oh five or seven o'clock"),
+    ("-3 degrees", "minus three degrees"),
+    ("e.g. now", "for example now"),
+    ("idk, IDK", "I don't know, IDK"),
+])
+def test_english(text, expected):
+    assert main.normalize_text(text, "en") == expected
+
+
+def test_unknown_language_falls_back_to_german():
+    assert main.normalize_text("3", "xx") == "drei"
+
+
+def test_ssml_is_escaped():
+    assert main.normalize_text("a < b", "de", ssml=True) == '<speak xml:lang="de">a &lt; b</speak>'
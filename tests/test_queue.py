@@ -0,0 +1,72 @@
+import pytest
+
+import main
+
+
+@pytest.fixture
+def render_queue(tmp_path):
+    corpus = tmp_path / "text.txt"
+    corpus.write_text("eins\n\nzwei\ndrei\n", encoding="utf-8")
+    jobs = main.RenderQueue(str(tmp_path / "queue.db"))
+    jobs.add_corpus(str(corpus), str(tmp_path / "out"))
+    yield jobs
+    jobs.close()
+
+
+def test_add_corpus_creates_one_job_per_line(render_queue, tmp_path):
+    assert render_queue.status()["pending"] == 3
+    # Adding the same corpus again keeps the existing jobs
+    assert render_queue.add_corpus(str(tmp_path / "text.txt"), str(tmp_path / "out")) == 0
+    assert render_queue.settings()["output"] == str(tmp_path / "out")
+
+
+def test_claim_and_complete(render_queue):
+    claimed = render_queue.claim("a", batch_size=2)
+    assert [text for _, _, text in claimed] == ["eins", "zwei"]
+    assert render_queue.claim("b", batch_size=5) == [(3, 2, "drei")]
+    assert render_queue.claim("c") == []
+
+    assert render_queue.complete(claimed[0][0], "a", 1.5, 0.1)
+    # Only the lease owner may complete a job
+    assert not render_queue.complete(claimed[1][0], "b", 1.0, 0.1)
+    status = render_queue.status()
+    assert (status["done"], status["running"], status["audio_seconds"]) == (1, 3 - 1, 1.5)
+
+
+def test_fail_retries_until_max_attempts(render_queue):
+    for attempt in range(3):
+        job_id = render_queue.claim("a", batch_size=1)[0][0]
+        render_queue.fail(job_id, "a", "kaputt", max_attempts=3)
+    assert render_queue.status()["failed"] == 1
+    assert render_queue.retry_failed() == 1
+    assert render_queue.status()["pending"] == 3
+
+
+def test_expired_lease_is_claimed_again_and_fails_eventually(render_queue):
+    for attempt in range(3):
+        claimed = render_queue.claim(f"worker {attempt}", batch_size=1, lease=-1.0, max_attempts=3)
+        assert claimed[0][2] == "eins"
+    # The third lease ran out as well, the job is not handed out a fourth time
+    assert render_queue.claim("d", batch_size=1, max_attempts=3)[0][2] == "zwei"
+    row = render_queue.db.execute("SELECT state, error FROM jobs WHERE text = 'eins'").fetchone()
+    assert (row["state"], row["error"]) == ("failed", "Lease abgelaufen")
+
+
+def test_release_does_not_count_the_attempt(render_queue):
+    render_queue.claim("a", batch_size=3)
+    assert render_queue.release("a") == 3
+    row = render_queue.db.execute("SELECT MAX(attempts) FROM jobs").fetchone()
+    assert row[0] == 0
+
+
+def test_missing_queue_is_not_created(tmp_path):
+    with pytest.raises(ValueError):
+        main.RenderQueue(str(tmp_path / "fehlt.db"), create=False)
+    assert not (tmp_path / "fehlt.db").exists()
+
+
+def test_uninitialised_queue_has_no_settings(tmp_path):
+    jobs = main.RenderQueue(str(tmp_path / "leer.db"))
+    with pytest.raises(ValueError):
+        jobs.settings()
+    jobs.close()
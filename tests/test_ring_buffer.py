@@ -0,0 +1,70 @@
+import pytest
+
+import main
+
+
+def test_write_and_read_wrap_around():
+    ring = main.RingBuffer(8)
+    out = memoryview(bytearray(8))
+    assert ring.write(b"abcdef") == 6
+    assert ring.read_into(out[:4]) == 4
+    assert bytes(out[:4]) == b"abcd"
+
+    # Wraps past the end of the storage
+    assert ring.write(b"ghijklmnop") == 6
+    assert (ring.available(), ring.free()) == (8, 0)
+    assert ring.read_into(out) == 8
+    assert bytes(out) == b"efghijkl"
+    assert ring.available() == 0
+
+
+def test_skip_to_stays_within_written_data():
+    ring = main.RingBuffer(16)
+    ring.write(b"0123456789")
+    ring.skip_to(4)
+    assert ring.available() == 6
+    ring.skip_to(100)
+    assert (ring.read, ring.available()) == (10, 0)
+    ring.skip_to(2)
+    assert ring.read == 10
+
+
+class RecordingSink(main.AudioSink):
+    def __init__(self):
+        self.formats = []
+        self.data = bytearray()
+
+    def open(self, sample_rate, channels=1):
+        self.formats.append((sample_rate, channels))
+
+    def write(self, pcm):
+        self.data += pcm
+
+
+def test_audio_sink_needs_write():
+    with pytest.raises(TypeError):
+        main.AudioSink()
+
+
+@pytest.mark.parametrize("sample_rate, channels", [(16000, 1), (48000, 2)])
+def test_player_plays_every_byte(sample_rate, channels):
+    sink = RecordingSink()
+    player = main.RingBufferPlayer(sink, latency=0.05)
+    pcm = bytes(range(256)) * (sample_rate * channels // 128)
+    try:
+        assert player.play_pcm(pcm, sample_rate, channels)
+    finally:
+        player.close()
+    assert sink.formats[0] == (sample_rate, channels)
+    assert bytes(sink.data) == pcm
+
+
+def test_player_plays_streams_in_order():
+    sink = RecordingSink()
+    player = main.RingBufferPlayer(sink, latency=0.05)
+    try:
+        assert player.play_pcm(b"\x01\x00" * 1000, 16000, wait=False)
+        assert player.play_pcm(b"\x02\x00" * 1000, 16000)
+    finally:
+        player.close()
+    assert bytes(sink.data) == b"\x01\x00" * 1000 + b"\x02\x00" * 1000
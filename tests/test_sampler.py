@@ -0,0 +1,73 @@
+import os
+from collections import Counter
+
+import pytest
+
+import main
+
+
+def make_sampler(tmp_path, lines, **options):
+    path = tmp_path / "text.txt"
+    path.write_text("".join(f"{line}\n" for line in lines), encoding="utf-8")
+    return main.PhraseSampler(main.LineStore(str(path)), **options)
+
+
+def test_weighted_pick_follows_weights(tmp_path):
+    sampler = make_sampler(tmp_path, ["a\t3", "b\t1", "c\t0"], mode="weighted")
+    counts = Counter(sampler.pick() for _ in range(8000))
+    assert counts["c"] == 0
+    assert 2.5 < counts["a"] / counts["b"] < 3.5
+
+
+def test_window_never_repeats_recent_lines(tmp_path):
+    sampler = make_sampler(tmp_path, [f"line {number}\t{10 if number == 0 else 1}" for number in range(6)],
+                           mode="window", window=3)
+    picks = [sampler.pick() for _ in range(3000)]
+    for position in range(3, len(picks)):
+        assert picks[position] not in picks[position - 3:position]
+
+
+def test_window_fallback_is_weighted_and_skips_weight_zero(tmp_path):
+    # "a" carries almost all weight, so most picks after it go through the fallback
+    sampler = make_sampler(tmp_path, ["a\t100", "b\t5", "c\t1", "d\t1", "e\t0"], mode="window", window=1)
+    picks = [sampler.pick() for _ in range(20000)]
+    after_a = Counter(current for previous, current in zip(picks, picks[1:]) if previous == "a")
+    assert after_a["e"] == 0
+    assert 3.5 < after_a["b"] / after_a["c"] < 7.0
+
+
+def test_window_with_only_weight_zero_left_returns_recent_line(tmp_path):
+    sampler = make_sampler(tmp_path, ["a\t1", "b\t0", "c\t0"], mode="window", window=2)
+    assert {sampler.pick() for _ in range(200)} == {"a"}
+
+
+def test_shuffle_plays_every_line_once_per_round(tmp_path):
+    lines = [f"line {number}" for number in range(7)]
+    sampler = make_sampler(tmp_path, lines, mode="shuffle")
+    for _ in range(3):
+        assert sorted(sampler.pick() for _ in lines) == sorted(lines)
+
+
+def test_tags(tmp_path):
+    sampler = make_sampler(tmp_path, ["a\t1\tgruss", "b\t1\tgruss,abschied", "c", "d\t1\tAbschied"])
+    assert sampler.tags() == ["abschied", "gruss"]
+    assert {sampler.pick("gruss") for _ in range(200)} == {"a", "b"}
+    assert {sampler.pick("ABSCHIED") for _ in range(200)} == {"b", "d"}
+    assert sampler.pick("unbekannt") is None
+
+
+def test_sidecar_is_rebuilt_when_the_corpus_changes(tmp_path):
+    sampler = make_sampler(tmp_path, ["a", "b"], mode="weighted")
+    assert sampler.pick() in ("a", "b")
+    assert os.path.exists(sampler.path)
+
+    path = tmp_path / "text.txt"
+    path.write_text("neu\n", encoding="utf-8")
+    stat = path.stat()
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10 ** 9))
+    assert sampler.pick() == "neu"
+
+
+def test_unknown_mode():
+    with pytest.raises(ValueError):
+        main.PhraseSampler(None, mode="zufall")
@@ -0,0 +1,68 @@
+import io
+import os
+
+import pytest
+
+import main
+
+
+@pytest.fixture
+def screen(monkeypatch):
+    monkeypatch.setattr(main.Screen, "size", staticmethod(lambda: os.terminal_size((10, 24))))
+    return main.Screen(io.StringIO())
+
+
+def draw(screen, lines):
+    screen.stream.seek(0)
+    screen.stream.truncate()
+    screen.begin()
+    screen.extend(lines)
+    screen.flush()
+    return screen.stream.getvalue()
+
+
+def test_width_ignores_escapes_and_counts_wide_characters():
+    assert main.Screen.width("\x1b[1;31mrot\x1b[0m") == 3
+    assert main.Screen.width("日本") == 4
+    assert main.Screen.width("é") == 1
+
+
+def test_layout_wraps_long_lines():
+    placed, rows = main.Screen.layout(["kurz", "x" * 25, "", "日本語日本語"], 10)
+    assert placed == [(0, 1, "kurz"), (1, 3, "x" * 25), (4, 1, ""), (5, 2, "日本語日本語")]
+    assert rows == 7
+
+
+def test_first_frame_is_drawn_in_full(screen):
+    output = draw(screen, ["a", "b"])
+    assert output.startswith(main.Screen.HOME_CLEAR)
+    assert "\x1b[1;1H" in output and "\x1b[2;1H" in output
+
+
+def test_unchanged_rows_are_skipped(screen):
+    draw(screen, ["a", "b", "c", "d"])
+    output = draw(screen, ["a", "B", "c", "d"])
+    assert main.Screen.HOME_CLEAR not in output
+    assert "\x1b[2;1H" in output and "B" in output
+    assert "\x1b[1;1H" not in output and "\x1b[3;1H" not in output
+    # The last line is always rewritten to leave the cursor behind it
+    assert "\x1b[4;1H" in output
+
+
+def test_wrapped_line_clears_all_its_rows(screen):
+    draw(screen, ["a", "b", "c"])
+    output = draw(screen, ["a", "x" * 15, "c"])
+    assert "\x1b[3;1H" + main.Screen.CLEAR_LINE in output
+    assert "\x1b[4;1H" in output
+
+
+def test_shorter_frame_clears_below(screen):
+    draw(screen, ["a", "b", "c"])
+    output = draw(screen, ["a"])
+    assert "\x1b[2;1H" + main.Screen.CLEAR_BELOW in output
+
+
+def test_frame_taller_than_terminal_is_redrawn(screen):
+    lines = [str(number) for number in range(30)]
+    draw(screen, lines)
+    assert draw(screen, lines).startswith(main.Screen.HOME_CLEAR)
@@ -0,0 +1,62 @@
+import main
+
+
+def key(number):
+    return main.AudioCache.make_key(f"Satz {number}", "de", 150, 1.0)
+
+
+def pcm(value, frames):
+    return bytes([value, 0]) * frames
+
+
+def test_append_and_lookup(tmp_path):
+    bank = main.Soundbank(str(tmp_path / "bank"))
+    bank.append([(key(1), pcm(1, 100), 22050, 1, "de"), (key(2), pcm(2, 50), 16000, 2, "en")])
+    view, sample_rate, channels = bank.lookup(key(2))
+    assert (bytes(view), sample_rate, channels) == (pcm(2, 50), 16000, 2)
+    view.release()
+    assert bank.lookup(key(3)) is None
+    assert bank.voices == ["de", "en"]
+    bank.close()
+
+    reopened = main.Soundbank(str(tmp_path / "bank"))
+    assert len(reopened) == 2
+    assert bytes(reopened.lookup(key(1))[0]) == pcm(1, 100)
+    reopened.close()
+
+
+def test_uncommitted_entries_are_invisible_until_commit(tmp_path):
+    bank = main.Soundbank(str(tmp_path / "bank"))
+    bank.append([(key(1), pcm(1, 10), 22050, 1, None)], commit=False)
+    assert bank.lookup(key(1)) is None
+    assert bank._contains(key(1))
+    bank.append([])
+    assert bytes(bank.lookup(key(1))[0]) == pcm(1, 10)
+    bank.close()
+
+
+def test_replace_and_compact(tmp_path):
+    path = tmp_path / "bank"
+    bank = main.Soundbank(str(path))
+    bank.append([(key(1), pcm(1, 1000), 22050, 1, None), (key(2), pcm(2, 10), 22050, 1, None)])
+    bank.append([(key(1), pcm(3, 10), 22050, 1, None)])
+    size = path.stat().st_size
+
+    assert bank.compact() > 2000
+    assert path.stat().st_size < size
+    assert len(bank) == 2
+    assert bytes(bank.lookup(key(1))[0]) == pcm(3, 10)
+    assert bytes(bank.lookup(key(2))[0]) == pcm(2, 10)
+    bank.close()
+
+
+def test_views_survive_appends_and_compaction(tmp_path):
+    bank = main.Soundbank(str(tmp_path / "bank"))
+    bank.append([(key(1), pcm(1, 100), 22050, 1, None)])
+    view = bank.lookup(key(1))[0]
+
+    bank.append([(key(1), pcm(2, 100), 22050, 1, None)])
+    bank.compact()
+    bank.close()
+    assert bytes(view) == pcm(1, 100)
+    view.release()